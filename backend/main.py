@@ -1,21 +1,51 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from sqlalchemy.orm import Session
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple, Union
 import numpy as np
 from datetime import datetime
-import uuid
+import json
+import os
+import tempfile
 
 # Fix import paths
 from backend.models.prediction_model import PredictionModel
-from backend.models.database import get_db, PredictionRecord
-from backend.schemas.prediction import PredictionRequest, PredictionResponse, BackwashPoint
-from backend.utils.validators import validate_parameters
+from backend.models.optimizer import BackwashOptimizer
+from backend.models.sensitivity import SensitivityAnalyzer
+from backend.models.fleet import FleetSimulator
+from backend.models.database import (
+    SessionLocal, get_db, init_db, prediction_record_values, get_prediction_history as query_prediction_history,
+    count_prediction_history, encode_history_cursor, get_rollups, get_sensor_series, list_sensor_series,
+    PredictionRecord
+)
+from backend.models.export import EXPORT_MEDIA_TYPES, export_records
+from backend.models.ingestion import MAX_GAP_SECONDS, ingest_sensor_file, series_curves
+from backend.models.live import TrainStateStore
+from backend.models.lookup import LookupTable
+from backend.models.persistence import PredictionWriter
+from backend.models.registry import ModelRegistry, UnknownModelError
+from backend.models.surrogate import SurrogateModel
+from backend.models.training import TrainingScheduler
+from backend.schemas.prediction import (
+    PredictionRequest, PredictionResponse, BackwashPoint, ColumnarPredictionRequest,
+    AdvancedPredictionRequest, CurveData, MAX_CURVE_STEPS, EnsemblePredictionRequest, OptimizationRequest, LongHorizonRequest, SensorReading,
+    FleetSimulationRequest, SummaryRequest, ModelRegistration, DefaultModelUpdate, SensitivityRequest
+)
+from backend.utils.validators import PARAMETER_RANGES, validate_curves, validate_parameters
+from backend.utils.executor import PredictionExecutor, ExecutorSaturatedError, call_model_method
+from backend.utils.cache import PredictionCache
+from backend.utils.wire import FRAME_MEDIA_TYPE, FrameError, accepts_frame, decode_frame, encode_frame
+
+API_VERSION = "1.0.0"
 
 app = FastAPI(
     title="Intelligent UF Backwash API",
     description="API for predicting UF membrane pressure and backwash requirements",
-    version="1.0.0"
+    version=API_VERSION
 )
 
 # CORS middleware
@@ -27,128 +57,1052 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize prediction model
-prediction_model = PredictionModel()
+# Prediction models by version; requests pick one or get the default
+model_registry = ModelRegistry.from_env()
+
+# Simulations run on a worker pool, each worker holding its own model per version
+prediction_executor = PredictionExecutor.from_env(model_registry)
+
+# Surrogate training runs in a separate process; published artifacts are registered as versions
+training_scheduler = TrainingScheduler.from_env(model_registry)
+
+# Precomputed summary grid, memory-mapped read-only and shared by every process
+lookup_table = LookupTable.from_env()
+
+# Seeded predictions are deterministic, so their results can be reused
+prediction_cache = PredictionCache.from_env()
+
+# Predictions are persisted in bulk by a background task
+prediction_writer = PredictionWriter.from_env()
+
+# Live per-train states fed by sensor streams; updates are O(1) and run on the event loop
+live_states = TrainStateStore.from_env()
+LIVE_MAX_MESSAGE_BYTES = 4096
+
+# Scenarios simulated together by the batch endpoint
+BATCH_CHUNK_SIZE = 1024
+PARAMETER_NAMES = list(PARAMETER_RANGES)
+prediction_request_list = TypeAdapter(List[PredictionRequest])
+
+class IncrementalStreamingResponse(StreamingResponse):
+    """
+    Streaming response for endpoints that keep reading the request body
+    
+    StreamingResponse watches for client disconnects by reading from the
+    ASGI receive channel, which would swallow body chunks the content
+    iterator has not consumed yet. A disconnect still surfaces here as a
+    failing send.
+    """
+    
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+@app.on_event("startup")
+async def start_prediction_executor():
+    """Start and warm up the prediction workers"""
+    prediction_executor.start()
+
+@app.on_event("startup")
+async def start_prediction_writer():
+    """Create missing tables and start the write-behind flush task"""
+    if prediction_writer.enabled:
+        init_db()
+        prediction_writer.start()
+
+@app.on_event("startup")
+async def start_training_scheduler():
+    """Start surrogate training and artifact polling"""
+    training_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_training_scheduler():
+    """Stop surrogate training"""
+    await training_scheduler.stop()
+
+@app.on_event("shutdown")
+async def stop_prediction_writer():
+    """Flush queued prediction records"""
+    await prediction_writer.stop()
+
+@app.on_event("shutdown")
+async def stop_prediction_executor():
+    """Wait for running simulations and stop the workers"""
+    prediction_executor.shutdown()
+
+def saturated_error(error: ExecutorSaturatedError) -> HTTPException:
+    """Build the response for work refused by a saturated pool"""
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": "1"})
+
+def resolve_model_version(version: Optional[str]) -> str:
+    """Registered model version for a request, the current default when not given"""
+    try:
+        return model_registry.resolve(version)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+async def run_prediction(kind: str, request: Dict[str, Any], model_version: str,
+                         **kwargs) -> Tuple[Dict[str, Any], bool]:
+    """
+    Run a model method on the worker pool, caching seeded results
+    
+    Args:
+        kind: Prediction kind used to namespace cache keys
+        request: Request fields identifying the prediction
+        model_version: Resolved model version, part of the cache key
+        **kwargs: Arguments for ``call_model_method``; unseeded
+            predictions are never cached
+        
+    Returns:
+        Tuple of (prediction result, whether it came from the cache)
+    """
+    cache_key = None
+    if kwargs.get("seed") is not None:
+        cache_key = prediction_cache.make_key(kind, dict(request, model_version=model_version))
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            return cached, True
+    
+    result = await prediction_executor.run(call_model_method, model_version=model_version, **kwargs)
+    if cache_key is not None:
+        prediction_cache.put(cache_key, result)
+    return result, False
 
 @app.get("/")
 async def root():
     """Root endpoint"""
-    return {"message": "Intelligent UF Backwash API", "version": "1.0.0"}
+    return {"message": "Intelligent UF Backwash API", "version": API_VERSION}
 
 @app.get("/api/model/info")
 async def get_model_info():
     """Get model information and supported parameters"""
     return {
-        "model_version": "1.0.0",
+        "model_version": model_registry.default_version,
+        "available_versions": [model["version"] for model in model_registry.describe()["models"]],
         "supported_parameters": {
-            "turbidity": {"min": 0.0, "max": 2.0, "unit": "NTU"},
-            "ph": {"min": 4.0, "max": 10.0, "unit": ""},
-            "temperature": {"min": 15.0, "max": 35.0, "unit": "°C"},
-            "flow_rate": {"min": 10.0, "max": 50.0, "unit": "GPM"},
-            "inlet_pressure": {"min": 20.0, "max": 80.0, "unit": "PSIG"}
+            name: {"min": spec["min"], "max": spec["max"], "unit": spec["unit"]}
+            for name, spec in PARAMETER_RANGES.items()
         },
         "fouling_statuses": ["clean", "mild", "moderate", "severe", "critical"],
         "pressure_threshold": 7.0,
         "max_time_steps": 50
     }
 
+@app.get("/api/models")
+async def list_models():
+    """Registered model versions and the default"""
+    return {"success": True, **model_registry.describe()}
+
+@app.post("/api/models", status_code=201)
+async def register_model(registration: ModelRegistration):
+    """
+    Register a calibrated variant of the heuristic model
+    
+    Workers load and warm it on its first request. Learned models are
+    registered at startup from MODEL_REGISTRY_PATH.
+    """
+    if registration.version in model_registry:
+        raise HTTPException(status_code=409, detail=f"Model version {registration.version} is already registered")
+    try:
+        await run_in_threadpool(
+            model_registry.register_calibrated, registration.version, registration.overrides,
+            registration.description, registration.make_default
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, **model_registry.describe()}
+
+@app.put("/api/models/default")
+async def set_default_model(update: DefaultModelUpdate):
+    """
+    Switch the default model version
+    
+    Requests already admitted finish on the version they resolved; new
+    requests without ``model_version`` use the new default.
+    """
+    try:
+        previous = model_registry.set_default(update.version)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"success": True, "previous": previous, "default": update.version}
+
+def frame_response(content: Dict[str, Any], data_key: str) -> Response:
+    """Send a prediction response as a binary frame, pressure_data as a float32 array"""
+    data = dict(content[data_key])
+    arrays = {"pressure_data": data.pop("pressure_data")}
+    return Response(encode_frame(dict(content, **{data_key: data}), arrays),
+                    media_type=FRAME_MEDIA_TYPE)
+
+async def read_advanced_request(
+        http_request: Request) -> Tuple[AdvancedPredictionRequest, Dict[str, np.ndarray]]:
+    """
+    Advanced prediction body, either JSON or a binary frame, validated
+    
+    A frame carries the request fields as metadata and the curves
+    (``turbidity_curve`` etc.) as arrays, decoded without copying; the
+    arrays get the same length and range checks as JSON curves.
+    
+    Returns:
+        Tuple of (validated request, curve arrays of a frame)
+    """
+    content_type = http_request.headers.get("content-type", "").split(";")[0].strip()
+    body = await http_request.body()
+    try:
+        if content_type != FRAME_MEDIA_TYPE:
+            return AdvancedPredictionRequest.model_validate_json(body), {}
+        meta, arrays = decode_frame(body)
+        request = AdvancedPredictionRequest.model_validate(meta)
+    except FrameError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid request body: {e}")
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+    
+    unknown = sorted(set(arrays) - set(CurveData.model_fields))
+    too_long = sorted(name for name, array in arrays.items() if array.shape[0] > MAX_CURVE_STEPS)
+    result = validate_curves({name: array for name, array in arrays.items() if name not in unknown})
+    if unknown or too_long or not result["valid"]:
+        if unknown:
+            error = f"Unknown curves: {', '.join(unknown)}"
+        elif too_long:
+            error = f"Curves longer than {MAX_CURVE_STEPS} steps: {', '.join(too_long)}"
+        else:
+            error = result["error"]
+        raise RequestValidationError([{
+            "type": "parameter_range", "loc": ("body", "curve_data"), "msg": error, "input": None,
+            "ctx": {"violations": result["violations"], "ranges": result.get("ranges", {})}
+        }])
+    return request, arrays
+
+def load_series_curves(series_id: int, series_start: Union[str, datetime, None],
+                       time_steps: int) -> Dict[str, np.ndarray]:
+    """Curves of a stored sensor series for a prediction, as ``curve_data`` entries"""
+    try:
+        if isinstance(series_start, str):
+            series_start = datetime.fromisoformat(series_start)
+        db = SessionLocal()
+        try:
+            series = get_sensor_series(db, series_id, with_curves=True)
+            if series is None:
+                raise HTTPException(status_code=404, detail=f"Sensor series {series_id} not found")
+            return series_curves(series, time_steps, series_start)
+        finally:
+            db.close()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def merged_curve_data(curve_data: Optional[Dict[str, Any]], series_id: Optional[int],
+                            series_start: Union[str, datetime, None], time_steps: int) -> Optional[Dict[str, Any]]:
+    """Request curves, completed from a stored sensor series when ``series_id`` is given"""
+    if series_id is None:
+        return curve_data
+    stored = await run_in_threadpool(load_series_curves, series_id, series_start, time_steps)
+    stored.update({name: curve for name, curve in (curve_data or {}).items() if curve is not None})
+    return stored
+
 @app.post("/api/predict", response_model=PredictionResponse)
-async def predict_backwash(request: PredictionRequest):
-    """Predict pressure drop and backwash requirements"""
+async def predict_backwash(request: PredictionRequest, http_request: Request):
+    """
+    Predict pressure drop and backwash requirements
+    
+    Clients sending ``Accept: application/x-uf-frame`` get a binary frame
+    with pressure_data as a float32 array instead of JSON.
+    """
     try:
         # Validate input parameters
         validation_result = validate_parameters(request.parameters.dict())
         if not validation_result["valid"]:
             raise HTTPException(status_code=400, detail=validation_result["error"])
         
-        # Generate prediction
-        prediction_result = prediction_model.predict(
-            parameters=request.parameters.dict(),
-            fouling_status=request.fouling_status,
-            time_steps=request.time_steps,
-            pressure_threshold=request.pressure_threshold
-        )
+        # Generate prediction, reusing the result of an identical seeded request
+        model_version = resolve_model_version(request.model_version)
+        if request.engine == "event":
+            # Noise-free expected value, jumping between backwash events
+            prediction_result, cache_hit = await run_prediction(
+                "predict", request.model_dump(), model_version,
+                method="predict_expected",
+                parameters=request.parameters.dict(),
+                fouling_status=request.fouling_status,
+                time_steps=request.time_steps,
+                pressure_threshold=request.pressure_threshold
+            )
+        else:
+            prediction_result, cache_hit = await run_prediction(
+                "predict", request.model_dump(), model_version,
+                method="predict",
+                parameters=request.parameters.dict(),
+                fouling_status=request.fouling_status,
+                time_steps=request.time_steps,
+                pressure_threshold=request.pressure_threshold,
+                seed=request.seed
+            )
+        
+        # Persisted by the write-behind queue, outside the request path
+        await prediction_writer.enqueue(prediction_record_values(
+            prediction_result, request.parameters.dict(), request.fouling_status,
+            request.time_steps, request.pressure_threshold, model_version=model_version
+        ))
+        
+        metadata = {
+            "model_version": model_version,
+            "prediction_timestamp": datetime.utcnow().isoformat(),
+            "confidence_score": prediction_result.get("confidence_score", 0.9),
+            "cache_hit": cache_hit
+        }
+        if accepts_frame(http_request.headers.get("accept")):
+            return frame_response({"success": True, "prediction_data": prediction_result,
+                                   "metadata": metadata}, "prediction_data")
         
         # Create response
         response = PredictionResponse(
             success=True,
             prediction_data=prediction_result,
-            metadata={
-                "model_version": "1.0.0",
-                "prediction_timestamp": datetime.utcnow().isoformat(),
-                "confidence_score": prediction_result.get("confidence_score", 0.9)
-            }
+            metadata=metadata
         )
         
         return response
         
+    except HTTPException:
+        raise
+    except ExecutorSaturatedError as e:
+        raise saturated_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/predict/advanced")
-async def predict_advanced(request: Dict[str, Any]):
-    """Advanced prediction with curve data"""
+async def predict_advanced(http_request: Request,
+                           body: Tuple[AdvancedPredictionRequest, Dict[str, np.ndarray]] = Depends(read_advanced_request)):
+    """
+    Advanced prediction with curve data
+    
+    Curves may be sent as a binary frame (``Content-Type:
+    application/x-uf-frame``), and ``Accept: application/x-uf-frame``
+    returns pressure_data as a float32 array.
+    """
+    request, frame_curves = body
     try:
-        # Extract curve data if provided
-        curve_data = request.get("curve_data", {})
+        # Extract curve data if provided, as arrays for the vectorized trend
+        curve_data = request.curve_data.model_dump(exclude_none=True) if request.curve_data else {}
+        curve_data.update(frame_curves)
+        curve_data = await merged_curve_data(
+            curve_data or None, request.series_id, request.series_start, request.time_steps
+        ) or {}
+        curve_arrays = {
+            name: np.asarray(curve, dtype=float)
+            for name, curve in curve_data.items() if curve is not None
+        }
         
         # Generate prediction with curve data
-        prediction_result = prediction_model.predict_with_curves(
-            base_parameters=request["parameters"],
+        model_version = resolve_model_version(request.model_version)
+        prediction_result, cache_hit = await run_prediction(
+            "predict_advanced", dict(request.model_dump(mode="json"), curve_data=curve_arrays), model_version,
+            method="predict_with_curves",
+            base_parameters=request.parameters.model_dump(),
+            curve_data=curve_arrays,
+            fouling_status=request.fouling_status,
+            time_steps=request.time_steps,
+            seed=request.seed
+        )
+        
+        content = {
+            "success": True,
+            "prediction_data": prediction_result,
+            "metadata": {
+                "model_version": model_version,
+                "prediction_timestamp": datetime.utcnow().isoformat(),
+                "uses_curve_data": bool(curve_data),
+                "series_id": request.series_id,
+                "cache_hit": cache_hit
+            }
+        }
+        if accepts_frame(http_request.headers.get("accept")):
+            return frame_response(content, "prediction_data")
+        return content
+        
+    except HTTPException:
+        raise
+    except ExecutorSaturatedError as e:
+        raise saturated_error(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/predict/summary")
+async def predict_summary(request: SummaryRequest):
+    """
+    Fouling rate, efficiency and time to the first backwash
+    
+    The version is ``model_version`` or the current default. It is
+    answered from the precomputed lookup table when the table was built
+    from that version, its measured interpolation error is within its
+    limits and the query lies on its grid. Without an explicit
+    ``model_version``, the latest trained surrogate answers next if it was
+    trained on the default's records and its holdout metrics pass the
+    registry's quality limits. Otherwise the version itself answers;
+    heuristic versions run the expected-value engine. The model is
+    evaluated in this process, without a worker round trip.
+    """
+    parameters = request.parameters.model_dump()
+    model_version = resolve_model_version(request.model_version)
+    surrogate_version = None
+    if (lookup_table is not None and lookup_table.model_version == model_version and lookup_table.accurate()
+            and lookup_table.covers(parameters, request.pressure_threshold, request.time_steps)):
+        model, source = lookup_table, "table"
+    else:
+        if request.model_version is None:
+            surrogate_version = model_registry.summary_surrogate(model_version)
+        answering = surrogate_version or model_version
+        model = model_registry.loaded_model(answering) or await run_in_threadpool(model_registry.model, answering)
+        source = "surrogate" if isinstance(model, SurrogateModel) else "model"
+        if source == "surrogate":
+            surrogate_version = answering
+    try:
+        summary = model.predict_summary(
+            parameters=parameters,
+            fouling_status=request.fouling_status,
+            time_steps=request.time_steps,
+            pressure_threshold=request.pressure_threshold
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return {
+        "success": True,
+        "summary": summary,
+        "metadata": {
+            "model_version": model_version,
+            "source": source,
+            "surrogate": source == "surrogate",
+            "surrogate_version": surrogate_version,
+            "prediction_timestamp": datetime.utcnow().isoformat()
+        }
+    }
+
+@app.post("/api/predict/ensemble")
+async def predict_ensemble(request: EnsemblePredictionRequest):
+    """Monte Carlo ensemble with pressure bands and backwash distributions"""
+    try:
+        curve_data = request.curve_data.model_dump(exclude_none=True) if request.curve_data else None
+        curve_data = await merged_curve_data(curve_data, request.series_id, request.series_start,
+                                             request.time_steps)
+        
+        model_version = resolve_model_version(request.model_version)
+        ensemble_result, cache_hit = await run_prediction(
+            "predict_ensemble", request.model_dump(), model_version,
+            method="predict_ensemble",
+            parameters=request.parameters.model_dump(),
+            fouling_status=request.fouling_status,
+            time_steps=request.time_steps,
+            pressure_threshold=request.pressure_threshold,
+            realizations=request.realizations,
             curve_data=curve_data,
-            fouling_status=request.get("fouling_status", "clean"),
-            time_steps=request.get("time_steps", 20)
+            seed=request.seed
         )
         
         return {
             "success": True,
-            "prediction_data": prediction_result,
+            "ensemble_data": ensemble_result,
             "metadata": {
-                "model_version": "1.0.0",
+                "model_version": model_version,
                 "prediction_timestamp": datetime.utcnow().isoformat(),
-                "uses_curve_data": bool(curve_data)
+                "uses_curve_data": curve_data is not None,
+                "series_id": request.series_id,
+                "cache_hit": cache_hit
             }
         }
         
+    except HTTPException:
+        raise
+    except ExecutorSaturatedError as e:
+        raise saturated_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/history")
-async def get_prediction_history(
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    limit: int = 100
-):
-    """Get prediction history"""
+@app.post("/api/predict/long-horizon")
+async def predict_long_horizon(request: LongHorizonRequest):
+    """
+    Long-horizon simulation streamed as newline-delimited JSON
+    
+    Emits one ``chunk`` line per ``chunk_size`` steps and a final
+    ``summary`` line with the online metrics. The simulation advances only
+    as fast as the client reads, on Starlette's thread pool, with this
+    process's instance of the model rather than a pool worker's.
+    """
+    model = await run_in_threadpool(model_registry.model, resolve_model_version(request.model_version))
+    chunks = model.simulate_long_horizon(
+        parameters=request.parameters.model_dump(),
+        fouling_status=request.fouling_status,
+        total_steps=request.total_steps,
+        pressure_threshold=request.pressure_threshold,
+        chunk_size=request.chunk_size,
+        seed=request.seed,
+        engine=request.engine,
+        include_pressure=request.include_pressure
+    )
+    
+    def lines():
+        for chunk in chunks:
+            if chunk["type"] == "chunk" and request.include_pressure:
+                chunk["pressure_data"] = np.round(chunk["pressure_data"], 2).tolist()
+            yield json.dumps(chunk) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/api/optimize/backwash")
+async def optimize_backwash(request: OptimizationRequest):
+    """Search threshold, duration and lockout policies for the efficiency/backwash Pareto front"""
+    try:
+        model_version = resolve_model_version(request.model_version)
+        workers = prediction_executor.fan_out(request.workers)
+        optimization_result = await prediction_executor.run(
+            run_optimizer,
+            model_version=model_version,
+            slots=workers,
+            parameters=request.parameters.model_dump(),
+            fouling_status=request.fouling_status,
+            time_steps=request.time_steps,
+            thresholds=request.thresholds,
+            durations=request.durations,
+            lockouts=request.lockouts,
+            replicates=request.replicates,
+            cost_weights=request.cost_weights,
+            prune=request.prune,
+            workers=workers,
+            seed=request.seed
+        )
+        
+        return {
+            "success": True,
+            "optimization_data": optimization_result,
+            "metadata": {
+                "model_version": model_version,
+                "optimization_timestamp": datetime.utcnow().isoformat()
+            }
+        }
+        
+    except HTTPException:
+        raise
+    except ExecutorSaturatedError as e:
+        raise saturated_error(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def run_optimizer(prediction_model: PredictionModel, **kwargs) -> Dict[str, Any]:
+    """Run the backwash policy optimizer inside a worker"""
+    return BackwashOptimizer(prediction_model).optimize(**kwargs)
+
+@app.post("/api/analyze/sensitivity")
+async def analyze_sensitivity(request: SensitivityRequest):
+    """
+    Which water quality parameters drive fouling rate, efficiency and backwash count
+    
+    Returns finite-difference sensitivities at the operating point and
+    Morris and Sobol indices over the parameter ranges.
+    """
+    try:
+        model_version = resolve_model_version(request.model_version)
+        workers = prediction_executor.fan_out(request.workers)
+        sensitivity_result = await prediction_executor.run(
+            run_sensitivity,
+            model_version=model_version,
+            slots=workers,
+            parameters=request.parameters.model_dump(),
+            fouling_status=request.fouling_status,
+            time_steps=request.time_steps,
+            pressure_threshold=request.pressure_threshold,
+            methods=request.methods,
+            ranges=request.ranges,
+            samples=request.samples,
+            trajectories=request.trajectories,
+            replicates=request.replicates,
+            workers=workers,
+            seed=request.seed
+        )
+        
+        return {
+            "success": True,
+            "sensitivity_data": sensitivity_result,
+            "metadata": {
+                "model_version": model_version,
+                "analysis_timestamp": datetime.utcnow().isoformat()
+            }
+        }
+        
+    except HTTPException:
+        raise
+    except ExecutorSaturatedError as e:
+        raise saturated_error(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def run_sensitivity(prediction_model: PredictionModel, **kwargs) -> Dict[str, Any]:
+    """Run the sensitivity analysis inside a worker"""
+    return SensitivityAnalyzer(prediction_model).analyze(**kwargs)
+
+@app.post("/api/simulate/fleet")
+async def simulate_fleet(request: FleetSimulationRequest):
+    """Simulate a plant of trains sharing a limited backwash capacity"""
     try:
-        # This would typically query the database
-        # For now, return mock data
+        trains = request.trains
+        model_version = resolve_model_version(request.model_version)
+        fleet_result = await prediction_executor.run(
+            run_fleet,
+            model_version=model_version,
+            parameters={
+                name: [getattr(train.parameters, name) for train in trains]
+                for name in PARAMETER_NAMES
+            },
+            fouling_status=[train.fouling_status for train in trains],
+            pressure_threshold=[train.pressure_threshold for train in trains],
+            time_steps=request.time_steps,
+            backwash_capacity=request.backwash_capacity,
+            step_seconds=request.step_seconds,
+            policy=request.policy,
+            seed=request.seed,
+            include_series=request.include_series
+        )
+        
         return {
             "success": True,
-            "history": [
-                {
-                    "id": str(uuid.uuid4()),
-                    "timestamp": "2024-01-15T10:30:00Z",
-                    "parameters": {
-                        "turbidity": 0.5,
-                        "ph": 7.0,
-                        "temperature": 25.0
-                    },
-                    "prediction_accuracy": 0.92
-                }
-            ],
-            "total_count": 1
+            "fleet_data": fleet_result,
+            "metadata": {
+                "model_version": model_version,
+                "simulation_timestamp": datetime.utcnow().isoformat()
+            }
         }
+        
+    except HTTPException:
+        raise
+    except ExecutorSaturatedError as e:
+        raise saturated_error(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def run_fleet(prediction_model: PredictionModel, **kwargs) -> Dict[str, Any]:
+    """Run the fleet simulator inside a worker"""
+    return FleetSimulator(prediction_model).simulate(**kwargs)
+
+@app.post("/api/predict/batch")
+async def predict_batch(request: Request, model_version: Optional[str] = None):
+    """
+    Batch prediction streamed back as newline-delimited JSON
+    
+    Accepts a JSON array of prediction requests, a columnar request, or
+    newline-delimited prediction requests (``application/x-ndjson``). The
+    NDJSON form is read incrementally, so server memory stays flat however
+    many scenarios the request holds. The whole batch uses one model
+    version, given as a query parameter; the ``model_version`` of
+    individual requests is ignored.
+    """
+    try:
+        prediction_executor.check_capacity()
+    except ExecutorSaturatedError as e:
+        raise saturated_error(e)
+    model_version = resolve_model_version(model_version)
+    
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        chunks = ndjson_request_chunks(request)
+    else:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Request body must be valid JSON")
+        
+        # Validate the whole batch up front so every error is reported at once
+        try:
+            if isinstance(body, list):
+                chunks = list_request_chunks(prediction_request_list.validate_python(body))
+            else:
+                chunks = columnar_request_chunks(ColumnarPredictionRequest.model_validate(body))
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
+    
+    return IncrementalStreamingResponse(stream_batch_results(chunks, model_version),
+                                        media_type="application/x-ndjson",
+                                        headers={"X-Model-Version": model_version})
+
+def make_batch_chunk(indices: List[int], requests: List[PredictionRequest]) -> Dict[str, Any]:
+    """
+    Convert validated prediction requests to the columnar chunk layout
+    
+    A seeded request gives the same result as ``/api/predict`` with the
+    same seed, whatever chunk it falls in or requests are around it.
+    """
+    return {
+        "indices": np.asarray(indices, dtype=np.int64),
+        "parameters": {
+            name: np.array([getattr(r.parameters, name) for r in requests], dtype=float)
+            for name in PARAMETER_NAMES
+        },
+        "fouling_status": np.array([r.fouling_status for r in requests]),
+        "time_steps": np.array([r.time_steps for r in requests], dtype=np.int64),
+        "pressure_threshold": np.array([r.pressure_threshold for r in requests], dtype=float),
+        "seed": None,
+        "scenario_seeds": [r.seed for r in requests],
+        "errors": []
+    }
+
+async def list_request_chunks(requests: List[PredictionRequest]) -> AsyncIterator[Dict[str, Any]]:
+    """Split a validated list of requests into chunks"""
+    for start in range(0, len(requests), BATCH_CHUNK_SIZE):
+        chunk = requests[start:start + BATCH_CHUNK_SIZE]
+        yield make_batch_chunk(list(range(start, start + len(chunk))), chunk)
+
+async def columnar_request_chunks(request: ColumnarPredictionRequest) -> AsyncIterator[Dict[str, Any]]:
+    """Split a columnar request into chunks without per-scenario objects"""
+    parameters = {name: np.asarray(getattr(request.parameters, name), dtype=float)
+                  for name in PARAMETER_NAMES}
+    count = len(parameters['turbidity'])
+    fouling_status = np.broadcast_to(np.asarray(request.fouling_status), (count,))
+    pressure_threshold = np.broadcast_to(np.asarray(request.pressure_threshold, dtype=float), (count,))
+    
+    for start in range(0, count, BATCH_CHUNK_SIZE):
+        window = slice(start, start + BATCH_CHUNK_SIZE)
+        indices = np.arange(start, min(start + BATCH_CHUNK_SIZE, count))
+        yield {
+            "indices": indices,
+            "parameters": {name: column[window] for name, column in parameters.items()},
+            "fouling_status": fouling_status[window],
+            "time_steps": np.full(len(indices), request.time_steps, dtype=np.int64),
+            "pressure_threshold": pressure_threshold[window],
+            "seed": None if request.seed is None else [request.seed, start],
+            "scenario_seeds": None,
+            "errors": []
+        }
+
+async def ndjson_request_chunks(request: Request) -> AsyncIterator[Dict[str, Any]]:
+    """Read newline-delimited requests from the body stream in chunks"""
+    buffer = b""
+    index = 0
+    indices, requests, errors = [], [], []
+    
+    async def lines():
+        nonlocal buffer
+        async for data in request.stream():
+            buffer += data
+            *complete, buffer = buffer.split(b"\n")
+            for line in complete:
+                yield line
+        yield buffer
+    
+    async for line in lines():
+        if not line.strip():
+            continue
+        try:
+            requests.append(PredictionRequest.model_validate_json(line))
+            indices.append(index)
+        except ValidationError as e:
+            errors.append((index, json.loads(e.json(include_url=False))))
+        index += 1
+        
+        if len(requests) + len(errors) >= BATCH_CHUNK_SIZE:
+            chunk = make_batch_chunk(indices, requests)
+            chunk["errors"] = errors
+            yield chunk
+            indices, requests, errors = [], [], []
+    
+    if requests or errors:
+        chunk = make_batch_chunk(indices, requests)
+        chunk["errors"] = errors
+        yield chunk
+
+def run_batch_chunk(prediction_model: PredictionModel, chunk: Dict[str, Any]) -> str:
+    """Simulate one chunk and render its results as NDJSON lines"""
+    lines = {index: {"index": index, "success": False, "error": error}
+             for index, error in chunk["errors"]}
+    
+    # Scenarios with the same horizon, and all seeded or all not, are simulated together
+    scenario_seeds = chunk["scenario_seeds"]
+    seeded = (np.zeros(len(chunk["indices"]), dtype=bool) if scenario_seeds is None
+              else np.array([seed is not None for seed in scenario_seeds], dtype=bool))
+    for time_steps in np.unique(chunk["time_steps"]):
+        for group in (False, True):
+            selected = (chunk["time_steps"] == time_steps) & (seeded == group)
+            if not selected.any():
+                continue
+            batch = prediction_model.predict_batch(
+                parameters={name: column[selected] for name, column in chunk["parameters"].items()},
+                fouling_status=chunk["fouling_status"][selected],
+                time_steps=int(time_steps),
+                pressure_threshold=chunk["pressure_threshold"][selected],
+                seed=None if chunk["seed"] is None else chunk["seed"] + [int(time_steps)],
+                scenario_seeds=[scenario_seeds[i] for i in np.flatnonzero(selected)] if group else None
+            )
+            results = prediction_model.iter_batch_results(batch)
+            for index, result in zip(chunk["indices"][selected].tolist(), results):
+                lines[index] = {"index": index, "success": True, "prediction_data": result}
+    
+    return "".join(json.dumps(lines[index]) + "\n" for index in sorted(lines))
+
+async def stream_batch_results(chunks: AsyncIterator[Dict[str, Any]],
+                               model_version: str) -> AsyncIterator[str]:
+    """Yield NDJSON output chunk by chunk as each one finishes"""
+    async for chunk in chunks:
+        yield await prediction_executor.run(run_batch_chunk, chunk, wait=True, model_version=model_version)
+
+@app.get("/api/history")
+def get_prediction_history(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    fouling_status: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Get prediction history, newest first
+    
+    Pass ``next_cursor`` from a response as ``cursor`` to get the next
+    page; it is null on the last page. Counting every matching row is only
+    done with ``include_total``.
+    """
+    try:
+        start = datetime.fromisoformat(start_date) if start_date else None
+        end = datetime.fromisoformat(end_date) if end_date else None
+        
+        # One extra row tells whether there is a next page
+        records = query_prediction_history(
+            db, limit=limit + 1, start_date=start, end_date=end,
+            fouling_status=fouling_status, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    page = records[:limit]
+    response = {
+        "success": True,
+        "history": [record.to_dict() for record in page],
+        "count": len(page),
+        "next_cursor": encode_history_cursor(page[-1]) if len(records) > limit else None
+    }
+    if include_total:
+        response["total_count"] = count_prediction_history(
+            db, start_date=start, end_date=end, fouling_status=fouling_status
+        )
+    return response
+
+@app.get("/api/history/aggregate")
+def get_history_aggregate(
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    fouling_status: Optional[str] = None,
+    by_status: bool = True,
+    db: Session = Depends(get_db)
+):
+    """
+    Hourly or daily fouling rate, efficiency and backwash totals
+    
+    Served from the rollup tables, which are updated as predictions are
+    written, so a year of history costs a few hundred rows per status.
+    """
+    try:
+        start = datetime.fromisoformat(start_date) if start_date else None
+        end = datetime.fromisoformat(end_date) if end_date else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    buckets = get_rollups(db, granularity=granularity, start_date=start, end_date=end,
+                          fouling_status=fouling_status, by_status=by_status)
+    return {
+        "success": True,
+        "granularity": granularity,
+        "buckets": buckets
+    }
+
+@app.get("/api/export")
+def export_history(
+    format: str = Query("csv", pattern="^(csv|ndjson|parquet)$"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    fouling_status: Optional[str] = None
+):
+    """
+    Stream prediction records as CSV, NDJSON or Parquet, oldest first
+    
+    Records are read and encoded in batches while the response is sent,
+    so exports of millions of rows run in constant memory.
+    """
+    try:
+        start = datetime.fromisoformat(start_date) if start_date else None
+        end = datetime.fromisoformat(end_date) if end_date else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # The session outlives this function, it is closed once streaming ends
+    db = SessionLocal()
+    try:
+        chunks = export_records(db, format, start_date=start, end_date=end, fouling_status=fouling_status)
+    except ImportError:
+        db.close()
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+    except Exception:
+        db.close()
+        raise
+    
+    def stream():
+        try:
+            yield from chunks
+        finally:
+            db.close()
+    
+    return StreamingResponse(
+        stream(), media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="prediction_records.{format}"'}
+    )
+
+@app.post("/api/series/ingest")
+async def ingest_series(
+    request: Request,
+    train_id: str,
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    step_seconds: float = Query(60.0, gt=0),
+    max_gap_seconds: float = Query(MAX_GAP_SECONDS, gt=0,
+                                   description="Longest sensor outage interpolated across"),
+    timestamp_column: str = "timestamp",
+    column: Optional[List[str]] = Query(None, description="SENSOR=COLUMN, repeatable"),
+    source: Optional[str] = Query(None, description="Name of the log, e.g. its file name")
+):
+    """
+    Ingest a sensor log sent as the request body
+    
+    The body (CSV or Parquet, any size) is spooled to a temporary file as
+    it arrives, then read in chunks and resampled to ``step_seconds``
+    steps. Reference the returned series ``id`` as ``series_id`` in curve
+    predictions.
+    """
+    columns = None
+    if column:
+        pairs = [item.partition("=") for item in column]
+        if any(not source for _, _, source in pairs):
+            raise HTTPException(status_code=400, detail="column must be SENSOR=COLUMN")
+        columns = {sensor: source for sensor, _, source in pairs}
+    
+    handle, path = tempfile.mkstemp(suffix=f".{format}")
+    try:
+        with os.fdopen(handle, "wb") as upload:
+            async for chunk in request.stream():
+                upload.write(chunk)
+        
+        def ingest():
+            db = SessionLocal()
+            try:
+                return ingest_sensor_file(db, path, train_id, step_seconds=step_seconds,
+                                          timestamp_column=timestamp_column, columns=columns,
+                                          source=source or f"upload.{format}",
+                                          max_gap_seconds=max_gap_seconds).to_dict()
+            finally:
+                db.close()
+        
+        series = await run_in_threadpool(ingest)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        os.remove(path)
+    
+    return {"success": True, "series": series}
+
+@app.get("/api/series")
+def get_series_list(
+    train_id: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Stored sensor series, optionally for one train and overlapping a time range"""
+    try:
+        start = datetime.fromisoformat(start_date) if start_date else None
+        end = datetime.fromisoformat(end_date) if end_date else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    series = list_sensor_series(db, train_id=train_id, start_date=start, end_date=end)
+    return {"success": True, "series": [item.to_dict() for item in series]}
+
+@app.get("/api/series/{series_id}")
+def get_series(series_id: int, db: Session = Depends(get_db)):
+    """Metadata of one stored sensor series"""
+    series = get_sensor_series(db, series_id)
+    if series is None:
+        raise HTTPException(status_code=404, detail=f"Sensor series {series_id} not found")
+    return {"success": True, "series": series.to_dict()}
+
+@app.websocket("/ws/trains/{train_id}")
+async def stream_train_readings(websocket: WebSocket, train_id: str,
+                                fouling_status: str = "clean", pressure_threshold: float = 7.0,
+                                model_version: Optional[str] = None):
+    """
+    Live forecast for a UF train, one reply per sensor reading
+    
+    Each message is a JSON ``SensorReading``; the reply is the train's
+    state after that step with the forecast step of the next backwash.
+    The train state outlives the connection until it has been idle for
+    LIVE_IDLE_SECONDS, so a reconnecting client continues where it left
+    off. ``fouling_status`` and ``pressure_threshold`` apply to new states;
+    ``model_version`` is resolved once for the connection, and versions
+    without a ``step_reading`` method are refused.
+    """
+    try:
+        model = await run_in_threadpool(model_registry.model, model_version)
+    except UnknownModelError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    if not callable(getattr(model, "step_reading", None)):
+        await websocket.close(code=1008, reason=f"Model version {model_registry.resolve(model_version)} "
+                                                f"does not support live readings")
+        return
+    
+    await websocket.accept()
+    state = live_states.acquire(train_id, fouling_status, pressure_threshold)
+    try:
+        while True:
+            message = await websocket.receive_text()
+            if len(message) > LIVE_MAX_MESSAGE_BYTES:
+                await websocket.send_json({"type": "error", "detail": "Message too large"})
+                continue
+            try:
+                reading = SensorReading.model_validate_json(message)
+            except ValidationError as e:
+                await websocket.send_json({"type": "error", "detail": e.errors(include_url=False)})
+                continue
+            
+            live_states.touch(state)
+            await websocket.send_json(state.update(model, reading.model_dump()))
+    except WebSocketDisconnect:
+        pass
+
+@app.get("/api/trains/{train_id}/state")
+async def get_train_state(train_id: str):
+    """Current live state and running metrics of a UF train"""
+    state = live_states.get(train_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"No live state for train {train_id}")
+    return {"success": True, "state": state.summary()}
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "model_status": "ready"
+        "model_status": "ready",
+        "model_version": model_registry.default_version,
+        "executor": prediction_executor.stats(),
+        "cache": prediction_cache.stats(),
+        "persistence": prediction_writer.stats(),
+        "live": live_states.stats(),
+        "training": training_scheduler.stats(),
+        "lookup_table": lookup_table.stats() if lookup_table is not None else None
     }
 
 if __name__ == "__main__":
@@ -1,15 +1,88 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, JSON
+from sqlalchemy import (
+    create_engine, event, insert, inspect, text, and_, or_, case, delete, func,
+    Column, Index, Integer, String, Float, DateTime, Text, JSON, LargeBinary, UniqueConstraint
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from datetime import datetime
+from sqlalchemy.orm import deferred, sessionmaker, undefer_group
+from datetime import datetime, timedelta
+import base64
 import os
-from typing import Optional
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from backend.models.prediction_model import MODEL_VERSION
+from backend.utils.series_codec import (
+    encode_series, decode_series, decode_series_array, encode_backwash_points, decode_backwash_points
+)
 
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./uf_backwash.db")
 
+# "default" keeps the driver defaults, "production" tunes SQLite pragmas or server pools
+DATABASE_PROFILE = os.getenv("DATABASE_PROFILE", "default").lower()
+DATABASE_PROFILES = ("default", "production")
+
+def _sqlite_pragmas() -> Dict[str, Any]:
+    """PRAGMA values of the production SQLite profile"""
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        "cache_size": -int(os.getenv("SQLITE_CACHE_KIB", "65536")),
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        "temp_store": "MEMORY"
+    }
+
+def build_engine(url: str = DATABASE_URL, profile: str = DATABASE_PROFILE) -> Engine:
+    """
+    Create an engine with the settings of a profile
+    
+    The production profile runs SQLite in WAL mode, so readers no longer
+    block the writer, with relaxed syncing, a memory map, a larger page
+    cache and a busy timeout, all set on every new connection. Server
+    databases get explicit pool sizing, pre-ping, connection recycling and
+    a larger compiled statement cache.
+    
+    Args:
+        url: Database URL
+        profile: One of DATABASE_PROFILES
+        
+    Returns:
+        SQLAlchemy engine
+    """
+    if profile not in DATABASE_PROFILES:
+        raise ValueError(f"Unknown database profile: {profile}")
+    if profile == "default":
+        return create_engine(url)
+    
+    if make_url(url).get_backend_name() == "sqlite":
+        sqlite_engine = create_engine(url, connect_args={"check_same_thread": False})
+        pragmas = _sqlite_pragmas()
+        
+        @event.listens_for(sqlite_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+        
+        return sqlite_engine
+    
+    return create_engine(
+        url,
+        pool_size=int(os.getenv("DATABASE_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("DATABASE_MAX_OVERFLOW", "20")),
+        pool_timeout=float(os.getenv("DATABASE_POOL_TIMEOUT", "30")),
+        pool_recycle=int(os.getenv("DATABASE_POOL_RECYCLE", "1800")),
+        pool_pre_ping=True,
+        query_cache_size=int(os.getenv("DATABASE_STATEMENT_CACHE_SIZE", "1200"))
+    )
+
 # Create engine
-engine = create_engine(DATABASE_URL)
+engine = build_engine()
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -36,18 +109,52 @@ class PredictionRecord(Base):
     time_steps = Column(Integer, default=20)
     pressure_threshold = Column(Float, default=7.0)
     
-    # Results
-    pressure_data = Column(JSON, nullable=False)
-    backwash_points = Column(JSON, default=[])
+    # Results; pressure series and backwash points live in compact blobs,
+    # the JSON columns only hold rows written before the compact format
+    pressure_data_json = Column("pressure_data", JSON, nullable=False, default=list)
+    backwash_points_json = Column("backwash_points", JSON, default=list)
+    pressure_blob = Column(LargeBinary, nullable=True)
+    backwash_blob = Column(LargeBinary, nullable=True)
+    backwash_count = Column(Integer, nullable=True)
     fouling_rate = Column(Float, nullable=False)
     efficiency = Column(Float, nullable=False)
     recommendations = Column(JSON, default=[])
     confidence_score = Column(Float, nullable=False)
     
     # Metadata
-    model_version = Column(String, default="1.0.0")
+    model_version = Column(String, default=MODEL_VERSION)
     prediction_accuracy = Column(Float, nullable=True)
     
+    # History pages are read newest first by (timestamp, id), optionally per fouling status
+    __table_args__ = (
+        Index("ix_prediction_records_timestamp_id", "timestamp", "id"),
+        Index("ix_prediction_records_fouling_status_timestamp_id", "fouling_status", "timestamp", "id"),
+    )
+    
+    @property
+    def pressure_data(self) -> List[float]:
+        """Pressure series, decoded on access"""
+        if self.pressure_blob is not None:
+            return decode_series(self.pressure_blob)
+        return self.pressure_data_json
+    
+    @pressure_data.setter
+    def pressure_data(self, values: List[float]):
+        self.pressure_blob = encode_series(values)
+        self.pressure_data_json = []
+    
+    @property
+    def backwash_points(self) -> List[Dict[str, Any]]:
+        """Backwash points, decoded on access"""
+        if self.backwash_blob is not None:
+            return decode_backwash_points(self.backwash_blob)
+        return self.backwash_points_json or []
+    
+    @backwash_points.setter
+    def backwash_points(self, points: List[Dict[str, Any]]):
+        self.backwash_blob = encode_backwash_points(points)
+        self.backwash_points_json = []
+    
     def to_dict(self):
         """Convert record to dictionary"""
         return {
@@ -79,6 +186,78 @@ class PredictionRecord(Base):
             }
         }
 
+class PredictionRollup(Base):
+    """Hourly and daily aggregates of prediction records per fouling status"""
+    __tablename__ = "prediction_rollups"
+    
+    id = Column(Integer, primary_key=True)
+    granularity = Column(String, nullable=False)  # "hour" or "day"
+    bucket_start = Column(DateTime, nullable=False)
+    fouling_status = Column(String, nullable=False)
+    
+    record_count = Column(Integer, nullable=False, default=0)
+    fouling_rate_sum = Column(Float, nullable=False, default=0.0)
+    fouling_rate_max = Column(Float, nullable=True)
+    efficiency_sum = Column(Float, nullable=False, default=0.0)
+    efficiency_min = Column(Float, nullable=True)
+    efficiency_max = Column(Float, nullable=True)
+    backwash_count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint("granularity", "bucket_start", "fouling_status",
+                         name="uq_prediction_rollups_bucket"),
+    )
+
+
+class SensorSeries(Base):
+    """Plant sensor curves resampled to the model's step grid"""
+    __tablename__ = "sensor_series"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    train_id = Column(String, nullable=False)
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+    step_seconds = Column(Float, nullable=False)
+    point_count = Column(Integer, nullable=False)
+    
+    sensors = Column(String, nullable=False)  # comma separated, e.g. "turbidity,ph"
+    
+    # One compact series blob per sensor, loaded only when the curves are read
+    turbidity_blob = deferred(Column(LargeBinary, nullable=True), group="curves")
+    ph_blob = deferred(Column(LargeBinary, nullable=True), group="curves")
+    temperature_blob = deferred(Column(LargeBinary, nullable=True), group="curves")
+    
+    source = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_sensor_series_train_id_start_time", "train_id", "start_time"),
+    )
+    
+    def curves(self) -> Dict[str, np.ndarray]:
+        """Stored sensor curves as arrays, keyed like ``CurveData`` fields"""
+        return {
+            f"{name}_curve": decode_series_array(blob)
+            for name, blob in (("turbidity", self.turbidity_blob), ("ph", self.ph_blob),
+                               ("temperature", self.temperature_blob))
+            if blob is not None
+        }
+    
+    def to_dict(self):
+        """Convert series metadata to dictionary"""
+        return {
+            "id": self.id,
+            "train_id": self.train_id,
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat(),
+            "step_seconds": self.step_seconds,
+            "point_count": self.point_count,
+            "sensors": self.sensors.split(","),
+            "source": self.source,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
+
+
 class SystemConfig(Base):
     """Database model for system configuration"""
     __tablename__ = "system_config"
@@ -111,46 +290,377 @@ def get_db():
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
+    ensure_columns()
+    ensure_indexes()
+
+def ensure_columns():
+    """Add nullable columns introduced after a table was first created"""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+def ensure_indexes():
+    """Create indexes added to existing tables after they were first created"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+def prediction_record_values(prediction_data: dict, parameters: dict,
+                             fouling_status: str, time_steps: int = 20,
+                             pressure_threshold: float = 7.0,
+                             timestamp: Optional[datetime] = None,
+                             model_version: str = MODEL_VERSION) -> Dict[str, Any]:
+    """Column values of a prediction record, with series in the compact format"""
+    return {
+        'timestamp': timestamp or datetime.utcnow(),
+        'turbidity': parameters['turbidity'],
+        'ph': parameters['ph'],
+        'temperature': parameters['temperature'],
+        'flow_rate': parameters['flow_rate'],
+        'inlet_pressure': parameters['inlet_pressure'],
+        'fouling_status': fouling_status,
+        'time_steps': time_steps,
+        'pressure_threshold': pressure_threshold,
+        'pressure_data_json': [],
+        'backwash_points_json': [],
+        'pressure_blob': encode_series(prediction_data['pressure_data']),
+        'backwash_blob': encode_backwash_points(prediction_data['backwash_points']),
+        'backwash_count': len(prediction_data['backwash_points']),
+        'fouling_rate': prediction_data['fouling_rate'],
+        'efficiency': prediction_data['efficiency'],
+        'recommendations': prediction_data['recommendations'],
+        'confidence_score': prediction_data.get('confidence_score', 0.9),
+        'model_version': model_version
+    }
 
 def save_prediction_record(db, prediction_data: dict, parameters: dict, 
                           fouling_status: str, time_steps: int = 20, 
                           pressure_threshold: float = 7.0) -> PredictionRecord:
     """Save prediction record to database"""
-    record = PredictionRecord(
-        turbidity=parameters['turbidity'],
-        ph=parameters['ph'],
-        temperature=parameters['temperature'],
-        flow_rate=parameters['flow_rate'],
-        inlet_pressure=parameters['inlet_pressure'],
-        fouling_status=fouling_status,
-        time_steps=time_steps,
-        pressure_threshold=pressure_threshold,
-        pressure_data=prediction_data['pressure_data'],
-        backwash_points=prediction_data['backwash_points'],
-        fouling_rate=prediction_data['fouling_rate'],
-        efficiency=prediction_data['efficiency'],
-        recommendations=prediction_data['recommendations'],
-        confidence_score=prediction_data.get('confidence_score', 0.9)
+    values = prediction_record_values(
+        prediction_data, parameters, fouling_status, time_steps, pressure_threshold
     )
+    record = PredictionRecord(**values)
     
     db.add(record)
+    update_rollups(db, [values])
     db.commit()
     db.refresh(record)
     return record
 
+def save_prediction_records(db, records: List[Dict[str, Any]]) -> int:
+    """Insert many prediction records (from ``prediction_record_values``) in one statement"""
+    if not records:
+        return 0
+    
+    db.execute(insert(PredictionRecord), records)
+    update_rollups(db, records)
+    db.commit()
+    return len(records)
+
+ROLLUP_GRANULARITIES = ("hour", "day")
+
+def rollup_bucket(timestamp: datetime, granularity: str) -> datetime:
+    """Start of the hour or day containing ``timestamp``"""
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _rollup_groups(records) -> Dict[tuple, Dict[str, Any]]:
+    """Aggregate record values into rollup rows keyed by (granularity, bucket, status)"""
+    groups = {}
+    for record in records:
+        for granularity in ROLLUP_GRANULARITIES:
+            key = (granularity, rollup_bucket(record['timestamp'], granularity), record['fouling_status'])
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {
+                    'granularity': key[0], 'bucket_start': key[1], 'fouling_status': key[2],
+                    'record_count': 0, 'fouling_rate_sum': 0.0, 'fouling_rate_max': record['fouling_rate'],
+                    'efficiency_sum': 0.0, 'efficiency_min': record['efficiency'],
+                    'efficiency_max': record['efficiency'], 'backwash_count': 0
+                }
+            group['record_count'] += 1
+            group['fouling_rate_sum'] += record['fouling_rate']
+            group['fouling_rate_max'] = max(group['fouling_rate_max'], record['fouling_rate'])
+            group['efficiency_sum'] += record['efficiency']
+            group['efficiency_min'] = min(group['efficiency_min'], record['efficiency'])
+            group['efficiency_max'] = max(group['efficiency_max'], record['efficiency'])
+            group['backwash_count'] += record['backwash_count']
+    return groups
+
+def update_rollups(db, records: List[Dict[str, Any]]):
+    """
+    Fold newly written records into the rollup tables
+    
+    Runs in the caller's transaction, so rollups commit together with the
+    records. SQLite and PostgreSQL use a single upsert per batch.
+    """
+    groups = list(_rollup_groups(records).values())
+    if not groups:
+        return
+    
+    table = PredictionRollup.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        upsert = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(table)
+        new = upsert.excluded
+        db.execute(upsert.on_conflict_do_update(
+            index_elements=["granularity", "bucket_start", "fouling_status"],
+            set_={
+                "record_count": table.c.record_count + new.record_count,
+                "fouling_rate_sum": table.c.fouling_rate_sum + new.fouling_rate_sum,
+                "fouling_rate_max": case((new.fouling_rate_max > table.c.fouling_rate_max, new.fouling_rate_max),
+                                         else_=table.c.fouling_rate_max),
+                "efficiency_sum": table.c.efficiency_sum + new.efficiency_sum,
+                "efficiency_min": case((new.efficiency_min < table.c.efficiency_min, new.efficiency_min),
+                                       else_=table.c.efficiency_min),
+                "efficiency_max": case((new.efficiency_max > table.c.efficiency_max, new.efficiency_max),
+                                       else_=table.c.efficiency_max),
+                "backwash_count": table.c.backwash_count + new.backwash_count
+            }
+        ), groups)
+        return
+    
+    for group in groups:
+        existing = db.query(PredictionRollup).filter_by(
+            granularity=group['granularity'], bucket_start=group['bucket_start'],
+            fouling_status=group['fouling_status']
+        ).with_for_update().first()
+        if existing is None:
+            db.add(PredictionRollup(**group))
+            continue
+        existing.record_count += group['record_count']
+        existing.fouling_rate_sum += group['fouling_rate_sum']
+        existing.fouling_rate_max = max(existing.fouling_rate_max, group['fouling_rate_max'])
+        existing.efficiency_sum += group['efficiency_sum']
+        existing.efficiency_min = min(existing.efficiency_min, group['efficiency_min'])
+        existing.efficiency_max = max(existing.efficiency_max, group['efficiency_max'])
+        existing.backwash_count += group['backwash_count']
+
+def rebuild_rollups(db, start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None, batch_size: int = 5000) -> int:
+    """
+    Recompute the rollups of whole days from the prediction records
+    
+    The range is widened to day boundaries. Records written while the
+    rebuild runs may be counted twice, so backfill past ranges or pause
+    writers.
+    
+    Returns:
+        Number of records aggregated
+    """
+    start = rollup_bucket(start_date, "day") if start_date else None
+    end = rollup_bucket(end_date, "day") + timedelta(days=1) if end_date else None
+    
+    clear = delete(PredictionRollup)
+    if start:
+        clear = clear.where(PredictionRollup.bucket_start >= start)
+    if end:
+        clear = clear.where(PredictionRollup.bucket_start < end)
+    db.execute(clear)
+    
+    columns = (PredictionRecord.id, PredictionRecord.timestamp, PredictionRecord.fouling_status,
+               PredictionRecord.fouling_rate, PredictionRecord.efficiency, PredictionRecord.backwash_count,
+               PredictionRecord.backwash_blob, PredictionRecord.backwash_points_json)
+    aggregated = 0
+    last_id = 0
+    groups = {}
+    while True:
+        query = db.query(*columns).filter(PredictionRecord.id > last_id)
+        if start:
+            query = query.filter(PredictionRecord.timestamp >= start)
+        if end:
+            query = query.filter(PredictionRecord.timestamp < end)
+        rows = query.order_by(PredictionRecord.id).limit(batch_size).all()
+        if not rows:
+            break
+        
+        records = []
+        for row in rows:
+            backwash_count = row.backwash_count
+            if backwash_count is None:
+                # Rows from before backwash_count was stored
+                backwash_count = len(decode_backwash_points(row.backwash_blob)
+                                     if row.backwash_blob is not None else row.backwash_points_json or [])
+            records.append({'timestamp': row.timestamp, 'fouling_status': row.fouling_status,
+                            'fouling_rate': row.fouling_rate, 'efficiency': row.efficiency,
+                            'backwash_count': backwash_count})
+        
+        # Merge batch groups; sums add, extremes combine
+        for key, group in _rollup_groups(records).items():
+            total = groups.get(key)
+            if total is None:
+                groups[key] = group
+                continue
+            for name in ('record_count', 'fouling_rate_sum', 'efficiency_sum', 'backwash_count'):
+                total[name] += group[name]
+            total['fouling_rate_max'] = max(total['fouling_rate_max'], group['fouling_rate_max'])
+            total['efficiency_min'] = min(total['efficiency_min'], group['efficiency_min'])
+            total['efficiency_max'] = max(total['efficiency_max'], group['efficiency_max'])
+        
+        aggregated += len(rows)
+        last_id = rows[-1].id
+    
+    if groups:
+        db.execute(insert(PredictionRollup), list(groups.values()))
+    db.commit()
+    return aggregated
+
+def get_rollups(db, granularity: str = "day", start_date: Optional[datetime] = None,
+                end_date: Optional[datetime] = None, fouling_status: Optional[str] = None,
+                by_status: bool = True) -> List[Dict[str, Any]]:
+    """
+    Read aggregated history from the rollup tables
+    
+    Args:
+        granularity: "hour" or "day"
+        start_date: First bucket to include (inclusive)
+        end_date: Last bucket to include (inclusive)
+        fouling_status: Only this fouling status
+        by_status: One row per bucket and status; otherwise statuses are combined
+        
+    Returns:
+        Rollup dictionaries ordered by bucket
+    """
+    if granularity not in ROLLUP_GRANULARITIES:
+        raise ValueError(f"Unknown rollup granularity: {granularity}")
+    
+    query = db.query(PredictionRollup).filter(PredictionRollup.granularity == granularity)
+    if fouling_status:
+        query = query.filter(PredictionRollup.fouling_status == fouling_status)
+    if start_date:
+        query = query.filter(PredictionRollup.bucket_start >= rollup_bucket(start_date, granularity))
+    if end_date:
+        query = query.filter(PredictionRollup.bucket_start <= end_date)
+    
+    if by_status:
+        status = PredictionRollup.fouling_status
+        measures = (PredictionRollup.record_count, PredictionRollup.fouling_rate_sum,
+                    PredictionRollup.fouling_rate_max, PredictionRollup.efficiency_sum,
+                    PredictionRollup.efficiency_min, PredictionRollup.efficiency_max,
+                    PredictionRollup.backwash_count)
+        order = (PredictionRollup.bucket_start, status)
+    else:
+        status = None
+        measures = (func.sum(PredictionRollup.record_count), func.sum(PredictionRollup.fouling_rate_sum),
+                    func.max(PredictionRollup.fouling_rate_max), func.sum(PredictionRollup.efficiency_sum),
+                    func.min(PredictionRollup.efficiency_min), func.max(PredictionRollup.efficiency_max),
+                    func.sum(PredictionRollup.backwash_count))
+        order = (PredictionRollup.bucket_start,)
+        query = query.group_by(PredictionRollup.bucket_start)
+    
+    rows = query.with_entities(PredictionRollup.bucket_start, *measures,
+                               *([status] if status is not None else [])).order_by(*order).all()
+    return [{
+        "bucket_start": row[0].isoformat(),
+        "fouling_status": row[8] if status is not None else None,
+        "record_count": row[1],
+        "fouling_rate_mean": row[2] / row[1] if row[1] else None,
+        "fouling_rate_max": row[3],
+        "efficiency_mean": row[4] / row[1] if row[1] else None,
+        "efficiency_min": row[5],
+        "efficiency_max": row[6],
+        "backwash_count": row[7]
+    } for row in rows]
+
+def encode_history_cursor(record: PredictionRecord) -> str:
+    """Opaque cursor pointing just past ``record`` in history order"""
+    position = f"{record.timestamp.isoformat()}|{record.id}"
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+def decode_history_cursor(cursor: str):
+    """
+    Decode a history cursor
+    
+    Returns:
+        Tuple of (timestamp, id)
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        timestamp, record_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(record_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid history cursor: {cursor}") from e
+
 def get_prediction_history(db, limit: int = 100, offset: int = 0, 
                           start_date: Optional[datetime] = None,
-                          end_date: Optional[datetime] = None):
-    """Get prediction history from database"""
+                          end_date: Optional[datetime] = None,
+                          fouling_status: Optional[str] = None,
+                          cursor: Optional[str] = None):
+    """
+    Get prediction history from database, newest first
+    
+    Pages are read by keyset on (timestamp, id): pass the ``next_cursor``
+    of the previous page as ``cursor`` and every page costs the same index
+    range scan, however deep it is. ``offset`` still works but scans and
+    discards the skipped rows.
+    """
     query = db.query(PredictionRecord)
     
+    if fouling_status:
+        query = query.filter(PredictionRecord.fouling_status == fouling_status)
+    
     if start_date:
         query = query.filter(PredictionRecord.timestamp >= start_date)
     
     if end_date:
         query = query.filter(PredictionRecord.timestamp <= end_date)
     
-    return query.order_by(PredictionRecord.timestamp.desc()).offset(offset).limit(limit).all()
+    if cursor:
+        timestamp, record_id = decode_history_cursor(cursor)
+        # The first term bounds the index range, the second breaks timestamp ties
+        query = query.filter(
+            PredictionRecord.timestamp <= timestamp,
+            or_(PredictionRecord.timestamp < timestamp,
+                and_(PredictionRecord.timestamp == timestamp, PredictionRecord.id < record_id))
+        )
+    
+    query = query.order_by(PredictionRecord.timestamp.desc(), PredictionRecord.id.desc())
+    if offset:
+        query = query.offset(offset)
+    return query.limit(limit).all()
+
+def count_prediction_history(db, start_date: Optional[datetime] = None,
+                             end_date: Optional[datetime] = None,
+                             fouling_status: Optional[str] = None) -> int:
+    """Count the prediction records matching the history filters"""
+    query = db.query(PredictionRecord.id)
+    if fouling_status:
+        query = query.filter(PredictionRecord.fouling_status == fouling_status)
+    if start_date:
+        query = query.filter(PredictionRecord.timestamp >= start_date)
+    if end_date:
+        query = query.filter(PredictionRecord.timestamp <= end_date)
+    return query.count()
+
+def get_sensor_series(db, series_id: int, with_curves: bool = False) -> Optional[SensorSeries]:
+    """Get a stored sensor series by ID, loading the curve blobs in the same query with ``with_curves``"""
+    query = db.query(SensorSeries).filter(SensorSeries.id == series_id)
+    if with_curves:
+        query = query.options(undefer_group("curves"))
+    return query.first()
+
+def list_sensor_series(db, train_id: Optional[str] = None, start_date: Optional[datetime] = None,
+                       end_date: Optional[datetime] = None) -> List[SensorSeries]:
+    """Stored sensor series overlapping a time range, in start order"""
+    query = db.query(SensorSeries)
+    if train_id:
+        query = query.filter(SensorSeries.train_id == train_id)
+    if start_date:
+        query = query.filter(SensorSeries.end_time >= start_date)
+    if end_date:
+        query = query.filter(SensorSeries.start_time <= end_date)
+    return query.order_by(SensorSeries.train_id, SensorSeries.start_time).all()
 
 def get_prediction_by_id(db, prediction_id: int) -> Optional[PredictionRecord]:
     """Get prediction record by ID"""
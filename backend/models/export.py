@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Streaming bulk export of prediction records
+
+Usage:
+    python -m backend.models.export --format csv|ndjson|parquet [--output PATH]
+        [--start DATE] [--end DATE] [--fouling-status STATUS] [--batch-size N]
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy import Text, func, select, type_coerce
+
+from backend.models.database import SessionLocal, PredictionRecord
+from backend.utils.series_codec import decode_backwash_points, decode_series_array
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+# Scalar columns of every export row, in output order
+EXPORT_COLUMNS = [
+    "id", "timestamp", "turbidity", "ph", "temperature", "flow_rate", "inlet_pressure",
+    "fouling_status", "time_steps", "pressure_threshold", "fouling_rate", "efficiency",
+    "confidence_score", "backwash_count", "model_version"
+]
+
+# The JSON columns are only filled on rows from before compact storage;
+# they are read as text and parsed just for those rows
+_SELECTED = [getattr(PredictionRecord, name) for name in EXPORT_COLUMNS if name != "backwash_count"] + [
+    PredictionRecord.backwash_count, PredictionRecord.backwash_blob, PredictionRecord.pressure_blob,
+    type_coerce(PredictionRecord.backwash_points_json, Text).label("backwash_points_text"),
+    type_coerce(PredictionRecord.pressure_data_json, Text).label("pressure_data_text")
+]
+
+
+def _backwash_count(row) -> int:
+    if row.backwash_count is not None:
+        return row.backwash_count
+    if row.backwash_blob is not None:
+        return len(decode_backwash_points(row.backwash_blob))
+    return len(json.loads(row.backwash_points_text or "[]"))
+
+
+def _filtered(statement, start_date: Optional[datetime], end_date: Optional[datetime],
+              fouling_status: Optional[str]):
+    if fouling_status:
+        statement = statement.where(PredictionRecord.fouling_status == fouling_status)
+    if start_date:
+        statement = statement.where(PredictionRecord.timestamp >= start_date)
+    if end_date:
+        statement = statement.where(PredictionRecord.timestamp <= end_date)
+    return statement
+
+
+def pressure_width(db, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                   fouling_status: Optional[str] = None) -> int:
+    """Number of pressure columns needed for the matching records"""
+    statement = _filtered(select(func.max(PredictionRecord.time_steps)), start_date, end_date, fouling_status)
+    return db.execute(statement).scalar() or 0
+
+
+def iter_record_batches(db, width: int, start_date: Optional[datetime] = None,
+                        end_date: Optional[datetime] = None, fouling_status: Optional[str] = None,
+                        batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """
+    Read matching records oldest first, ``batch_size`` rows at a time
+
+    The query runs with ``yield_per``, a server-side cursor where the
+    driver supports one, so only one batch is held in memory. Pressure
+    series are decoded straight into a (rows, width) matrix, padded with
+    NaN past each series' end.
+
+    Args:
+        db: Database session
+        width: Pressure columns, see ``pressure_width``
+
+    Yields:
+        Dicts with one list per ``EXPORT_COLUMNS`` name, plus ``pressure``
+        (the matrix) and ``pressure_length`` (points per row)
+    """
+    statement = _filtered(select(*_SELECTED), start_date, end_date, fouling_status)
+    statement = statement.order_by(PredictionRecord.timestamp, PredictionRecord.id)
+    result = db.execute(statement.execution_options(yield_per=batch_size))
+
+    names = [name for name in EXPORT_COLUMNS if name != "backwash_count"]
+    for rows in result.partitions():
+        batch = dict(zip(names, map(list, zip(*(row[:len(names)] for row in rows)))))
+        batch["backwash_count"] = [_backwash_count(row) for row in rows]
+
+        pressure = np.full((len(rows), width), np.nan)
+        lengths = np.zeros(len(rows), dtype=int)
+        for index, row in enumerate(rows):
+            if row.pressure_blob is not None:
+                series = decode_series_array(row.pressure_blob)
+            else:
+                series = np.asarray(json.loads(row.pressure_data_text or "[]"), dtype=float)
+            lengths[index] = min(series.size, width)
+            pressure[index, :lengths[index]] = series[:width]
+        batch["pressure"] = pressure
+        batch["pressure_length"] = lengths
+        yield batch
+
+
+def _scalar_rows(batch: Dict[str, Any]) -> List[List[Any]]:
+    timestamps = [timestamp.isoformat() if timestamp else None for timestamp in batch["timestamp"]]
+    columns = [timestamps if name == "timestamp" else batch[name] for name in EXPORT_COLUMNS]
+    return [list(values) for values in zip(*columns)]
+
+
+def _csv_chunks(batches, width: int) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS + [f"pressure_{step}" for step in range(width)])
+    for batch in batches:
+        pressure = batch["pressure"].tolist()
+        for scalars, series, length in zip(_scalar_rows(batch), pressure, batch["pressure_length"].tolist()):
+            writer.writerow(scalars + series[:length] + [""] * (width - length))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _ndjson_chunks(batches) -> Iterator[bytes]:
+    for batch in batches:
+        pressure = batch["pressure"].tolist()
+        lines = []
+        for scalars, series, length in zip(_scalar_rows(batch), pressure, batch["pressure_length"].tolist()):
+            row = dict(zip(EXPORT_COLUMNS, scalars))
+            row["pressure_data"] = series[:length]
+            lines.append(json.dumps(row) + "\n")
+        yield "".join(lines).encode()
+
+
+class _ChunkSink:
+    """Write-only file that hands written bytes back in chunks"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _parquet_chunks(batches, width: int, pa, pq) -> Iterator[bytes]:
+    fields = [
+        ("id", pa.int64()), ("timestamp", pa.timestamp("us")), ("turbidity", pa.float64()),
+        ("ph", pa.float64()), ("temperature", pa.float64()), ("flow_rate", pa.float64()),
+        ("inlet_pressure", pa.float64()), ("fouling_status", pa.string()), ("time_steps", pa.int64()),
+        ("pressure_threshold", pa.float64()), ("fouling_rate", pa.float64()), ("efficiency", pa.float64()),
+        ("confidence_score", pa.float64()), ("backwash_count", pa.int64()), ("model_version", pa.string())
+    ]
+    schema = pa.schema(fields + [(f"pressure_{step}", pa.float64()) for step in range(width)])
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    try:
+        for batch in batches:
+            pressure = batch["pressure"]
+            missing = np.isnan(pressure)
+            columns = [pa.array(batch[name], type=kind) for name, kind in fields]
+            columns += [pa.array(pressure[:, step], mask=missing[:, step]) for step in range(width)]
+            # One row group per batch
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+def export_records(db, export_format: str, start_date: Optional[datetime] = None,
+                   end_date: Optional[datetime] = None, fouling_status: Optional[str] = None,
+                   batch_size: int = 1000) -> Iterator[bytes]:
+    """
+    Stream matching prediction records as CSV, NDJSON or Parquet
+
+    CSV and Parquet expand the pressure series into ``pressure_<step>``
+    columns, empty past each record's series; NDJSON keeps a
+    ``pressure_data`` array per line. Memory use depends on
+    ``batch_size``, not on the number of records.
+
+    Args:
+        db: Database session, used until the iterator is exhausted
+        export_format: One of EXPORT_MEDIA_TYPES
+        start_date: Earliest timestamp to include
+        end_date: Latest timestamp to include
+        fouling_status: Only records with this status
+        batch_size: Rows read and encoded at a time
+
+    Returns:
+        Iterator of encoded chunks
+
+    Raises:
+        ValueError: If the format is unknown
+        ImportError: If Parquet is requested without pyarrow installed
+    """
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise ValueError(f"Unknown export format: {export_format}")
+    if export_format == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+    width = pressure_width(db, start_date, end_date, fouling_status)
+    batches = iter_record_batches(db, width, start_date, end_date, fouling_status, batch_size)
+    if export_format == "csv":
+        return _csv_chunks(batches, width)
+    if export_format == "ndjson":
+        return _ndjson_chunks(batches)
+    return _parquet_chunks(batches, width, pa, pq)
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Export UF Backwash prediction records")
+    parser.add_argument("--format", choices=sorted(EXPORT_MEDIA_TYPES), default="csv", help="Output format")
+    parser.add_argument("--output", default="-", help="Output file (default: stdout)")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None, help="Earliest timestamp")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None, help="Latest timestamp")
+    parser.add_argument("--fouling-status", default=None, help="Only records with this fouling status")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows read at a time")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        for chunk in export_records(db, args.format, start_date=args.start, end_date=args.end,
+                                    fouling_status=args.fouling_status, batch_size=args.batch_size):
+            output.write(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import numpy as np
+from typing import Any, Dict, Optional, Sequence, Union
+
+from backend.models.prediction_model import PredictionModel
+
+SCHEDULING_POLICIES = ('fifo', 'pressure')
+
+# Noise drawn per block of steps, so memory does not grow with the horizon
+NOISE_BLOCK_STEPS = 256
+
+
+def simulate_shared_capacity(initial_pressure: np.ndarray, trend: np.ndarray,
+                             pressure_threshold: np.ndarray, intensity_scale: np.ndarray,
+                             time_steps: int, capacity: int, busy_steps: np.ndarray,
+                             rng: np.random.Generator, durations: Sequence[int],
+                             reference_threshold: float = 7.0, drop_factor: float = 0.5,
+                             lockout: int = 4, policy: str = 'fifo',
+                             noise: Optional[np.ndarray] = None,
+                             include_series: bool = True) -> Dict[str, Any]:
+    """
+    Advance N trains in lockstep with at most ``capacity`` backwashing at once
+
+    Trains follow the step rule of ``simulate_lockstep``, except that a
+    train reaching its threshold only requests a backwash. Requests are
+    granted while backwash slots are free and otherwise wait in a queue,
+    served first come first served (``fifo``) or highest pressure first
+    (``pressure``); a waiting train keeps fouling. A granted backwash
+    holds its slot for ``busy_steps`` of its duration.
+
+    Per-train pressure statistics are accumulated step by step, so memory
+    is O(N) plus the optional plant-level series.
+
+    Args:
+        initial_pressure: Starting pressure per train, shape (N,)
+        trend: Pressure increase per step per train, shape (N,)
+        pressure_threshold: Backwash threshold per train, shape (N,)
+        intensity_scale: Backwash intensity factor per train, shape (N,)
+        time_steps: Number of time steps to simulate
+        capacity: Backwashes that can run at the same time
+        busy_steps: Steps a slot stays busy per entry of ``durations``
+        rng: Random generator for the noise and backwash durations
+        durations: Backwash durations to draw from
+        reference_threshold: Threshold used for the intensity calculation
+        drop_factor: Fraction of pressure removed by a backwash
+        lockout: Steps after a backwash before the train requests another
+        policy: One of SCHEDULING_POLICIES
+        noise: Optional (time_steps, N) noise to use instead of drawing it
+        include_series: Also return plant-level series per step
+
+    Returns:
+        Dictionary of per-train arrays (pressure statistics, backwash
+        count, queue delays) and plant-level series
+    """
+    if policy not in SCHEDULING_POLICIES:
+        raise ValueError(f"Unknown scheduling policy: {policy}")
+    if capacity < 1:
+        raise ValueError("Backwash capacity must be at least 1")
+
+    n = initial_pressure.shape[0]
+    durations = np.asarray(durations, dtype=np.int64)
+    busy_steps = np.asarray(busy_steps, dtype=np.int64)
+
+    current = np.array(initial_pressure, dtype=float)
+    current_trend = np.array(np.broadcast_to(trend, (n,)), dtype=float)
+    last_backwash_step = np.full(n, -1, dtype=np.int64)
+    busy_until = np.zeros(n, dtype=np.int64)          # first step the train's slot is free again
+    waiting = np.zeros(n, dtype=bool)
+    request_step = np.zeros(n, dtype=np.int64)
+
+    # Per-train running statistics (Welford) and counters
+    mean = np.zeros(n)
+    m2 = np.zeros(n)
+    maximum = np.full(n, -np.inf)
+    backwash_count = np.zeros(n, dtype=np.int64)
+    backwash_seconds = np.zeros(n, dtype=np.int64)
+    delay_total = np.zeros(n, dtype=np.int64)
+    delay_max = np.zeros(n, dtype=np.int64)
+
+    if include_series:
+        plant_pressure = np.empty(time_steps)
+        plant_backwashing = np.empty(time_steps, dtype=np.int64)
+        plant_queue = np.empty(time_steps, dtype=np.int64)
+    busy_slot_steps = 0
+    saturated_steps = 0
+    max_queue = 0
+
+    for i in range(time_steps):
+        if noise is not None:
+            step_noise = noise[i]
+        else:
+            if i % NOISE_BLOCK_STEPS == 0:
+                block = rng.uniform(-0.1, 0.1, size=(min(NOISE_BLOCK_STEPS, time_steps - i), n))
+            step_noise = block[i % NOISE_BLOCK_STEPS]
+
+        delta = current - mean
+        mean += delta / (i + 1)
+        m2 += delta * (current - mean)
+        np.maximum(maximum, current, out=maximum)
+
+        # New requests join the queue
+        requesting = (current >= pressure_threshold) & ((i - last_backwash_step) > lockout) & ~waiting
+        request_step[requesting] = i
+        waiting |= requesting
+
+        active = int(np.count_nonzero(busy_until > i))
+        free = capacity - active
+        queued = np.flatnonzero(waiting)
+        if free > 0 and queued.size:
+            if queued.size > free:
+                if policy == 'fifo':
+                    order = np.lexsort((queued, request_step[queued]))
+                else:
+                    order = np.lexsort((queued, -current[queued]))
+                queued = np.sort(queued[order[:free]])
+            idx = queued
+
+            at_backwash = current[idx]
+            intensity = np.round((at_backwash - reference_threshold) * intensity_scale[idx], 1)
+            choice = rng.integers(len(durations), size=idx.size)
+            duration = durations[choice]
+
+            waiting[idx] = False
+            last_backwash_step[idx] = i
+            busy_until[idx] = i + busy_steps[choice]
+            delay = i - request_step[idx]
+            delay_total[idx] += delay
+            np.maximum.at(delay_max, idx, delay)
+            backwash_count[idx] += 1
+            backwash_seconds[idx] += duration
+            active += idx.size
+
+            # Apply backwash effect and adjust trend based on effectiveness
+            effectiveness = (intensity / 10.0 + duration / 300.0) / 2.0
+            current_trend[idx] *= 0.9 - effectiveness * 0.2
+            at_backwash = at_backwash * (1 - drop_factor)
+            current[idx] = np.where(effectiveness > 1.2, at_backwash * 0.95, at_backwash)
+
+        queue_length = int(np.count_nonzero(waiting))
+        busy_slot_steps += active
+        saturated_steps += active >= capacity
+        max_queue = max(max_queue, queue_length)
+        if include_series:
+            plant_pressure[i] = current.mean()
+            plant_backwashing[i] = active
+            plant_queue[i] = queue_length
+
+        current += current_trend + step_noise
+        np.maximum(current, 2.0, out=current)
+
+    variance = m2 / time_steps if time_steps else np.zeros(n)
+    result = {
+        'pressure_mean': mean,
+        'pressure_max': maximum,
+        'pressure_variance': variance,
+        'final_pressure': current,
+        'backwash_count': backwash_count,
+        'backwash_seconds': backwash_seconds,
+        'queue_delay_total': delay_total,
+        'queue_delay_max': delay_max,
+        'waiting': waiting,
+        'busy_slot_steps': busy_slot_steps,
+        'saturated_steps': saturated_steps,
+        'max_queue': max_queue
+    }
+    if include_series:
+        result.update(plant_pressure=plant_pressure, plant_backwashing=plant_backwashing,
+                      plant_queue=plant_queue)
+    return result
+
+
+class FleetSimulator:
+    """Simulate a plant of UF trains sharing a limited backwash capacity"""
+
+    def __init__(self, model: PredictionModel):
+        self.model = model
+        self.MAX_TRAINS = 5000
+
+    def simulate(self, parameters: Dict[str, Any],
+                 fouling_status: Union[str, Sequence[str]] = 'clean',
+                 pressure_threshold: Union[float, Sequence[float]] = 7.0,
+                 time_steps: int = 10000, backwash_capacity: int = 1,
+                 step_seconds: float = 60.0, policy: str = 'fifo',
+                 seed: Optional[int] = None, include_series: bool = True) -> Dict[str, Any]:
+        """
+        Run the fleet and summarize it per train and for the plant
+
+        Args:
+            parameters: Water quality parameters as arrays with one entry
+                per train (scalars are shared)
+            fouling_status: Fouling status, shared or per train
+            pressure_threshold: Backwash threshold, shared or per train
+            time_steps: Number of time steps to simulate
+            backwash_capacity: Trains that can backwash at the same time
+            step_seconds: Length of a time step; a backwash occupies its
+                slot for ceil(duration / step_seconds) steps
+            policy: Queue order when capacity is exhausted, one of
+                SCHEDULING_POLICIES
+            seed: Optional seed for the random generator
+            include_series: Include plant-level series per step
+
+        Returns:
+            Dictionary with ``trains`` (per-train metrics), ``plant``
+            (totals) and optionally ``series``
+        """
+        model = self.model
+        columns = {
+            name: np.atleast_1d(np.asarray(parameters.get(name, default), dtype=float))
+            for name, default in (('turbidity', 0.5), ('ph', 7.0), ('temperature', 25.0),
+                                  ('flow_rate', 20.0), ('inlet_pressure', 40.0))
+        }
+        n = max(column.shape[0] for column in columns.values())
+        if n > self.MAX_TRAINS:
+            raise ValueError(f"At most {self.MAX_TRAINS} trains can be simulated")
+        columns = {name: np.broadcast_to(column, (n,)) for name, column in columns.items()}
+
+        fouling_codes = np.broadcast_to(model.fouling_codes(fouling_status), (n,))
+        threshold = np.broadcast_to(np.asarray(pressure_threshold, dtype=float), (n,))
+        trend, intensity_scale = model._array_factors(
+            columns['turbidity'], columns['ph'], columns['temperature'],
+            model._fouling_factor_array(fouling_codes), flow_rate=columns['flow_rate']
+        )
+        busy_steps = np.maximum(np.ceil(np.asarray(model.BACKWASH_DURATIONS) / step_seconds), 1)
+
+        result = simulate_shared_capacity(
+            initial_pressure=4.0 + columns['turbidity'] * 2.0,
+            trend=trend,
+            pressure_threshold=threshold,
+            intensity_scale=intensity_scale,
+            time_steps=time_steps,
+            capacity=backwash_capacity,
+            busy_steps=busy_steps,
+            rng=np.random.default_rng(seed),
+            durations=model.BACKWASH_DURATIONS,
+            reference_threshold=model.PRESSURE_THRESHOLD,
+            drop_factor=model.PRESSURE_DROP_FACTOR,
+            policy=policy,
+            include_series=include_series
+        )
+
+        # Efficiency as efficiency_batch, from the running variance
+        count = result['backwash_count']
+        efficiency = np.maximum(0.5, 1.0 - result['pressure_variance'] / 10.0)
+        interval = np.divide(float(time_steps), count, out=np.full(n, np.nan), where=count > 0)
+        efficiency = np.where(interval < 5, efficiency * 0.9, efficiency)
+        efficiency = np.minimum(1.0, np.where(interval > 15, efficiency * 0.95, efficiency))
+
+        mean_delay = np.divide(result['queue_delay_total'], count,
+                               out=np.zeros(n), where=count > 0)
+        total_backwashes = int(count.sum())
+        output = {
+            'trains': {
+                'pressure_mean': np.round(result['pressure_mean'], 3).tolist(),
+                'pressure_max': np.round(result['pressure_max'], 2).tolist(),
+                'final_pressure': np.round(result['final_pressure'], 2).tolist(),
+                'efficiency': np.round(efficiency, 3).tolist(),
+                'backwash_count': count.tolist(),
+                'backwash_seconds': result['backwash_seconds'].tolist(),
+                'queue_delay_mean': np.round(mean_delay, 3).tolist(),
+                'queue_delay_max': result['queue_delay_max'].tolist(),
+                'waiting_at_end': result['waiting'].tolist()
+            },
+            'plant': {
+                'trains': n,
+                'time_steps': time_steps,
+                'backwash_capacity': backwash_capacity,
+                'policy': policy,
+                'pressure_mean': round(float(result['pressure_mean'].mean()), 3),
+                'pressure_max': round(float(result['pressure_max'].max()), 2),
+                'efficiency_mean': round(float(efficiency.mean()), 3),
+                'backwash_count': total_backwashes,
+                'queue_delay_mean': round(float(result['queue_delay_total'].sum()) / total_backwashes, 3)
+                if total_backwashes else 0.0,
+                'queue_delay_max': int(result['queue_delay_max'].max()),
+                'max_queue_length': result['max_queue'],
+                'capacity_utilization': round(result['busy_slot_steps'] / (backwash_capacity * time_steps), 3)
+                if time_steps else 0.0,
+                'saturated_fraction': round(result['saturated_steps'] / time_steps, 3) if time_steps else 0.0
+            }
+        }
+        if include_series:
+            output['series'] = {
+                'pressure_mean': np.round(result['plant_pressure'], 3).tolist(),
+                'backwashing': result['plant_backwashing'].tolist(),
+                'queue_length': result['plant_queue'].tolist()
+            }
+        return output
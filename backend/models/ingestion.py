@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Ingestion of plant sensor logs into stored curve series
+
+Usage:
+    python -m backend.models.ingestion PATH --train-id ID [--step-seconds S]
+        [--timestamp-column NAME] [--column SENSOR=COLUMN ...] [--chunk-rows N]
+        [--max-gap-seconds S] [--max-empty-rows N]
+"""
+
+import argparse
+import itertools
+import math
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from backend.models.database import SessionLocal, SensorSeries, init_db
+from backend.utils.series_codec import encode_series
+
+# Model curves that can be filled from sensor logs
+SENSORS = ('turbidity', 'ph', 'temperature')
+
+# Longest gap between a sensor's samples that is interpolated across
+MAX_GAP_SECONDS = 3600.0
+
+# Rows read before sensors that have no valid sample yet are dropped
+MAX_EMPTY_ROWS = 100000
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def read_sensor_chunks(path: str, timestamp_column: str = "timestamp",
+                       columns: Optional[Dict[str, str]] = None,
+                       chunk_rows: int = 100000) -> Iterator[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+    """
+    Read a CSV or Parquet sensor log in chunks
+
+    Only the timestamp and sensor columns are parsed. Timestamps may be
+    date-times or numbers of seconds since the epoch; missing or
+    unparsable sensor values become NaN.
+
+    Args:
+        path: ``.csv`` (optionally compressed, e.g. ``.csv.gz``) or ``.parquet`` file
+        timestamp_column: Name of the timestamp column
+        columns: Source column per sensor; defaults to the sensor names
+            present in the file
+        chunk_rows: Approximate rows per chunk
+
+    Yields:
+        Tuples of (seconds since the epoch, {sensor: values})
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if ".parquet" in os.path.basename(path).lower():
+        import pyarrow.parquet as pq
+        source = pq.ParquetFile(path)
+        available = source.schema_arrow.names
+        columns = _sensor_columns(columns, available, timestamp_column)
+        batches = source.iter_batches(batch_size=chunk_rows,
+                                      columns=[timestamp_column] + list(columns.values()))
+    else:
+        import pyarrow.csv as pv
+        with pv.open_csv(path) as probe:
+            available = probe.schema.names
+        columns = _sensor_columns(columns, available, timestamp_column)
+        batches = pv.open_csv(
+            path,
+            # Blocks of roughly chunk_rows rows of ~64 bytes
+            read_options=pv.ReadOptions(block_size=max(chunk_rows * 64, 1 << 20)),
+            convert_options=pv.ConvertOptions(
+                include_columns=[timestamp_column] + list(columns.values()),
+                column_types={column: pa.float64() for column in columns.values()},
+                strings_can_be_null=True
+            )
+        )
+
+    for batch in batches:
+        timestamps = batch.column(timestamp_column)
+        if pa.types.is_timestamp(timestamps.type) or pa.types.is_date(timestamps.type):
+            if pa.types.is_timestamp(timestamps.type) and timestamps.type.tz is not None:
+                timestamps = pc.cast(timestamps, pa.timestamp(timestamps.type.unit))
+            micros = pc.cast(pc.cast(timestamps, pa.timestamp("us")), pa.int64())
+            seconds = micros.to_numpy(zero_copy_only=False).astype(float) / 1e6
+        elif pa.types.is_integer(timestamps.type) or pa.types.is_floating(timestamps.type):
+            seconds = pc.cast(timestamps, pa.float64()).to_numpy(zero_copy_only=False)
+        else:
+            raise ValueError(f"Column '{timestamp_column}' does not hold timestamps ({timestamps.type})")
+
+        values = {
+            sensor: pc.cast(batch.column(column), pa.float64()).to_numpy(zero_copy_only=False)
+            for sensor, column in columns.items()
+        }
+        yield seconds, values
+
+
+def _sensor_columns(columns: Optional[Dict[str, str]], available, timestamp_column: str) -> Dict[str, str]:
+    """Validate the sensor to column mapping against the file's columns"""
+    if timestamp_column not in available:
+        raise ValueError(f"Timestamp column '{timestamp_column}' not found")
+    if columns is None:
+        columns = {sensor: sensor for sensor in SENSORS if sensor in available}
+    unknown = set(columns) - set(SENSORS)
+    if unknown:
+        raise ValueError(f"Unknown sensors: {', '.join(sorted(unknown))}")
+    missing = [column for column in columns.values() if column not in available]
+    if missing:
+        raise ValueError(f"Columns not found: {', '.join(missing)}")
+    if not columns:
+        raise ValueError(f"No sensor columns found, expected any of: {', '.join(SENSORS)}")
+    return columns
+
+
+def resample_chunks(chunks: Iterator[Tuple[np.ndarray, Dict[str, np.ndarray]]],
+                    step_seconds: float, max_gap_seconds: float = MAX_GAP_SECONDS,
+                    max_empty_rows: int = MAX_EMPTY_ROWS) -> Iterator[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+    """
+    Linearly interpolate chunked samples onto a regular step grid
+
+    The grid starts once every sensor has a sample, rounded up to a
+    multiple of ``step_seconds``. Sensors without a valid sample in the
+    first ``max_empty_rows`` rows are left out. Grid points inside a gap
+    of more than ``max_gap_seconds`` between a sensor's samples are NaN,
+    and the grid moves past a sensor that has been silent for that long,
+    so the samples carried between chunks never span more than
+    ``max_gap_seconds``. The result is the same as resampling the whole
+    log at once. NaN samples are skipped.
+
+    Args:
+        chunks: Tuples of (seconds, {sensor: values}) in time order
+        step_seconds: Grid spacing
+        max_gap_seconds: Longest gap between samples that is interpolated
+        max_empty_rows: Rows after which sensors without data are dropped
+
+    Yields:
+        Tuples of (grid seconds, {sensor: interpolated values})
+    """
+    carry = {}
+    dropped = set()
+    rows = 0
+    next_point = None
+    previous_time = -math.inf
+
+    # None marks the end of the log
+    for chunk in itertools.chain(chunks, [None]):
+        if chunk is None:
+            # Sensors that never had data
+            carry = {sensor: held for sensor, held in carry.items() if held[0].size}
+        else:
+            seconds, values = chunk
+            if seconds.size == 0:
+                continue
+            if seconds[0] < previous_time or np.any(np.diff(seconds) < 0):
+                raise ValueError("Sensor timestamps must be in ascending order")
+            previous_time = seconds[-1]
+
+            for sensor, samples in values.items():
+                if sensor in dropped:
+                    continue
+                valid = ~np.isnan(samples)
+                held_times, held_values = carry.get(sensor, (np.empty(0), np.empty(0)))
+                first_valid = int(np.argmax(valid)) if valid.any() else valid.size
+                if held_times.size == 0 and rows + first_valid >= max_empty_rows:
+                    # No data in the first max_empty_rows rows
+                    dropped.add(sensor)
+                    carry.pop(sensor, None)
+                    continue
+                carry[sensor] = (np.concatenate([held_times, seconds[valid]]),
+                                 np.concatenate([held_values, samples[valid]]))
+            rows += seconds.size
+
+        if not carry or any(times.size == 0 for times, _ in carry.values()):
+            continue
+        if next_point is None:
+            # First grid point once every sensor has data
+            first = max(times[0] for times, _ in carry.values())
+            next_point = math.ceil(first / step_seconds) * step_seconds
+
+        # Grid points every sensor has samples past, or has been silent
+        # for more than max_gap_seconds after
+        stalled = previous_time - max_gap_seconds
+        horizon = min(max(times[-1], np.nextafter(stalled, -math.inf)) for times, _ in carry.values())
+        count = int(math.floor((horizon - next_point) / step_seconds)) + 1
+        if count <= 0:
+            continue
+
+        grid = next_point + step_seconds * np.arange(count)
+        grid = grid[grid <= horizon]
+        if grid.size == 0:
+            continue
+        resampled = {sensor: _interpolate(grid, times, samples, max_gap_seconds)
+                     for sensor, (times, samples) in carry.items()}
+        next_point = grid[-1] + step_seconds
+
+        # Keep the last sample before the next grid point and everything after it
+        for sensor, (times, samples) in carry.items():
+            keep = max(int(np.searchsorted(times, next_point, side="right")) - 1, 0)
+            carry[sensor] = (times[keep:], samples[keep:])
+
+        yield grid, resampled
+
+
+def _interpolate(grid: np.ndarray, times: np.ndarray, samples: np.ndarray,
+                 max_gap_seconds: float) -> np.ndarray:
+    """Interpolate samples at grid points, NaN outside them or inside longer gaps"""
+    values = np.interp(grid, times, samples)
+    after = np.searchsorted(times, grid, side="left")
+    before = np.searchsorted(times, grid, side="right") - 1
+    bracketed = (before >= 0) & (after < times.size)
+    gaps = times[np.minimum(after, times.size - 1)] - times[np.maximum(before, 0)]
+    values[~bracketed | (gaps > max_gap_seconds)] = np.nan
+    return values
+
+
+def ingest_sensor_file(db, path: str, train_id: str, step_seconds: float = 60.0,
+                       timestamp_column: str = "timestamp", columns: Optional[Dict[str, str]] = None,
+                       chunk_rows: int = 100000, source: Optional[str] = None,
+                       max_gap_seconds: float = MAX_GAP_SECONDS,
+                       max_empty_rows: int = MAX_EMPTY_ROWS) -> SensorSeries:
+    """
+    Stream a sensor log into a stored series on the model's step grid
+
+    Memory use is bounded by the chunk size, ``max_gap_seconds`` of
+    samples and the resampled series, not by the size of the log. Steps
+    inside longer sensor outages are stored as NaN.
+
+    Args:
+        db: Database session
+        path: CSV or Parquet sensor log
+        train_id: UF train the log belongs to
+        step_seconds: Seconds per model time step
+        timestamp_column: Name of the timestamp column
+        columns: Source column per sensor, see ``read_sensor_chunks``
+        chunk_rows: Approximate rows read at a time
+        source: Name recorded for the log, the file name by default
+        max_gap_seconds: Longest sensor outage that is interpolated across
+        max_empty_rows: Rows after which sensors without data are left out
+
+    Returns:
+        The stored SensorSeries
+
+    Raises:
+        ValueError: If the log is malformed or has no overlapping sensor data
+    """
+    if step_seconds <= 0:
+        raise ValueError("step_seconds must be positive")
+    if max_gap_seconds <= 0:
+        raise ValueError("max_gap_seconds must be positive")
+
+    chunks = read_sensor_chunks(path, timestamp_column, columns, chunk_rows)
+    start = None
+    parts = {}
+    for grid, resampled in resample_chunks(chunks, step_seconds, max_gap_seconds, max_empty_rows):
+        if start is None:
+            start = grid[0]
+        for sensor, values in resampled.items():
+            parts.setdefault(sensor, []).append(values.astype(np.float32))
+
+    if start is None:
+        raise ValueError("Sensor log has no samples to resample")
+
+    curves = {sensor: np.concatenate(values) for sensor, values in parts.items()}
+    point_count = len(next(iter(curves.values())))
+    series = SensorSeries(
+        train_id=train_id,
+        start_time=_EPOCH + timedelta(seconds=float(start)),
+        end_time=_EPOCH + timedelta(seconds=float(start) + step_seconds * (point_count - 1)),
+        step_seconds=step_seconds,
+        point_count=point_count,
+        sensors=",".join(sensor for sensor in SENSORS if sensor in curves),
+        source=source or os.path.basename(path),
+        **{f"{sensor}_blob": encode_series(values) for sensor, values in curves.items()}
+    )
+    db.add(series)
+    db.commit()
+    db.refresh(series)
+    return series
+
+
+def series_curves(series: SensorSeries, time_steps: int,
+                  start: Optional[datetime] = None) -> Dict[str, np.ndarray]:
+    """
+    Curves of a stored series for a prediction of ``time_steps`` steps
+
+    Args:
+        series: Series loaded with its curves
+        time_steps: Number of time steps to predict
+        start: Time of the first step; defaults to the start of the series
+
+    Returns:
+        Curve arrays keyed like ``CurveData`` fields
+
+    Raises:
+        ValueError: If ``start`` lies outside the series
+    """
+    offset = 0
+    if start is not None:
+        offset = math.ceil((start - series.start_time).total_seconds() / series.step_seconds)
+        if offset < 0 or offset >= series.point_count:
+            raise ValueError(f"series_start is outside series {series.id} "
+                             f"({series.start_time.isoformat()} to {series.end_time.isoformat()})")
+    return {name: curve[offset:offset + time_steps] for name, curve in series.curves().items()}
+
+
+def _sensor_column(text: str) -> Tuple[str, str]:
+    sensor, _, column = text.partition("=")
+    if not column:
+        raise argparse.ArgumentTypeError(f"Expected SENSOR=COLUMN, got '{text}'")
+    return sensor, column
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Ingest a sensor log as a stored curve series")
+    parser.add_argument("path", help="CSV or Parquet sensor log")
+    parser.add_argument("--train-id", required=True, help="UF train the log belongs to")
+    parser.add_argument("--step-seconds", type=float, default=60.0, help="Seconds per model time step")
+    parser.add_argument("--timestamp-column", default="timestamp", help="Name of the timestamp column")
+    parser.add_argument("--column", type=_sensor_column, action="append", metavar="SENSOR=COLUMN",
+                        help=f"Source column of a sensor ({', '.join(SENSORS)}); repeatable")
+    parser.add_argument("--chunk-rows", type=int, default=100000, help="Rows read at a time")
+    parser.add_argument("--max-gap-seconds", type=float, default=MAX_GAP_SECONDS,
+                        help="Longest sensor outage interpolated across; longer ones are stored as NaN")
+    parser.add_argument("--max-empty-rows", type=int, default=MAX_EMPTY_ROWS,
+                        help="Rows after which sensors without data are left out")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        series = ingest_sensor_file(
+            db, args.path, args.train_id, step_seconds=args.step_seconds,
+            timestamp_column=args.timestamp_column,
+            columns=dict(args.column) if args.column else None,
+            chunk_rows=args.chunk_rows, max_gap_seconds=args.max_gap_seconds,
+            max_empty_rows=args.max_empty_rows
+        )
+        print(f"Stored series {series.id}: {series.point_count} points of "
+              f"{series.sensors} from {series.start_time.isoformat()} to {series.end_time.isoformat()}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
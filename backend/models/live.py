@@ -0,0 +1,198 @@
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from backend.models.prediction_model import PredictionModel
+from backend.models.simulation import RunningMetrics
+
+# Steps after a backwash before another one may start, as in predict
+BACKWASH_LOCKOUT = 4
+
+
+class TrainState:
+    """
+    Live prediction state of one UF train
+
+    Advances one step per sensor reading with the noise-free step rule of
+    ``PredictionModel.predict``, so every update is O(1) and the state has
+    a fixed size however long the train is streamed. The trend is
+    recomputed from each reading, scaled by the decay accumulated over
+    the backwashes so far.
+    """
+
+    __slots__ = ('train_id', 'fouling_status', 'pressure_threshold', 'step', 'pressure',
+                 'trend', 'trend_scale', 'last_backwash_step', 'metrics', 'last_seen')
+
+    def __init__(self, train_id: str, fouling_status: str = 'clean', pressure_threshold: float = 7.0):
+        self.train_id = train_id
+        self.fouling_status = fouling_status
+        self.pressure_threshold = pressure_threshold
+        self.step = 0
+        self.pressure = None           # pressure of the next step, None before the first reading
+        self.trend = 0.0
+        self.trend_scale = 1.0
+        self.last_backwash_step = -1
+        self.metrics = RunningMetrics()
+        self.last_seen = time.monotonic()
+
+    def update(self, model: PredictionModel, reading: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fold one reading into the state and forecast the next backwash
+
+        Args:
+            model: Model supplying the step rule through ``step_reading``
+            reading: Sensor values (see ``SensorReading``); a measured
+                ``pressure`` replaces the simulated one
+
+        Returns:
+            Forecast for this step
+        """
+        if reading.get('fouling_status'):
+            self.fouling_status = reading['fouling_status']
+
+        step = self.step
+        if reading.get('pressure') is not None:
+            pressure = float(reading['pressure'])
+        elif self.pressure is None:
+            pressure = 4.0 + reading['turbidity'] * 2.0
+        else:
+            pressure = self.pressure
+        self.metrics.update_linear(pressure, 0.0, 1)
+
+        due = pressure >= self.pressure_threshold and (step - self.last_backwash_step) > BACKWASH_LOCKOUT
+        result = model.step_reading(pressure, reading, self.fouling_status, due)
+        backwash = None
+        if result['backwash'] is not None:
+            backwash = {
+                'time_step': step,
+                'pressure': pressure,
+                'intensity': result['backwash']['intensity'],
+                'duration': result['backwash']['duration'],
+                'reason': 'pressure_threshold_exceeded'
+            }
+            self.metrics.record_backwashes([backwash])
+            self.last_backwash_step = step
+
+        self.trend_scale *= result['trend_decay']
+        self.trend = result['trend'] * self.trend_scale
+        self.pressure = max(result['pressure'] + self.trend, 2.0)
+        self.step = step + 1
+
+        next_step = self.next_backwash_step()
+        return {
+            'type': 'forecast',
+            'train_id': self.train_id,
+            'time_step': step,
+            'pressure': round(pressure, 2),
+            'backwash': backwash,
+            'trend': round(self.trend, 4),
+            'next_pressure': round(self.pressure, 2),
+            'next_backwash_step': next_step,
+            'steps_to_backwash': next_step - step if next_step is not None else None,
+            'fouling_rate': round(self.metrics.fouling_rate, 3),
+            'efficiency': round(self.metrics.efficiency, 3),
+            'backwash_count': self.metrics.backwash_count
+        }
+
+    def next_backwash_step(self) -> Optional[int]:
+        """Step of the next backwash if readings stay as they are, None if pressure never gets there"""
+        earliest = max(self.step, self.last_backwash_step + BACKWASH_LOCKOUT + 1)
+        if self.pressure >= self.pressure_threshold:
+            return earliest
+        if self.trend <= 0:
+            return None
+
+        # Steps until the threshold, corrected for floating point rounding
+        steps = max(math.ceil((self.pressure_threshold - self.pressure) / self.trend), 1)
+        if self.pressure + self.trend * (steps - 1) >= self.pressure_threshold:
+            steps -= 1
+        elif self.pressure + self.trend * steps < self.pressure_threshold:
+            steps += 1
+        return max(self.step + steps, earliest)
+
+    def summary(self) -> Dict[str, Any]:
+        """Current state and running metrics"""
+        return {
+            'train_id': self.train_id,
+            'fouling_status': self.fouling_status,
+            'pressure_threshold': self.pressure_threshold,
+            'time_step': self.step,
+            'next_pressure': round(self.pressure, 2) if self.pressure is not None else None,
+            'trend': round(self.trend, 4),
+            'last_backwash_step': self.last_backwash_step,
+            'fouling_rate': round(self.metrics.fouling_rate, 3),
+            'efficiency': round(self.metrics.efficiency, 3),
+            'pressure_mean': round(self.metrics.mean, 3),
+            'pressure_variance': round(self.metrics.variance, 4),
+            'backwash_count': self.metrics.backwash_count
+        }
+
+
+class TrainStateStore:
+    """
+    Bounded store of live train states
+
+    States are kept in least recently used order, so evicting the ones
+    idle for more than ``idle_seconds``, or the oldest once ``max_trains``
+    is reached, only looks at the front of the order.
+    """
+
+    def __init__(self, max_trains: int = 10000, idle_seconds: float = 900.0):
+        self.max_trains = max_trains
+        self.idle_seconds = idle_seconds
+        self._states: "OrderedDict[str, TrainState]" = OrderedDict()
+        self.evicted = 0
+
+    @classmethod
+    def from_env(cls) -> "TrainStateStore":
+        """Build a store from LIVE_MAX_TRAINS and LIVE_IDLE_SECONDS"""
+        return cls(
+            max_trains=int(os.getenv("LIVE_MAX_TRAINS", "10000")),
+            idle_seconds=float(os.getenv("LIVE_IDLE_SECONDS", "900"))
+        )
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def get(self, train_id: str) -> Optional[TrainState]:
+        """State of a train, without marking it used"""
+        return self._states.get(train_id)
+
+    def acquire(self, train_id: str, fouling_status: str = 'clean',
+                pressure_threshold: float = 7.0) -> TrainState:
+        """State of a train, created if needed, marked as just used"""
+        state = self._states.get(train_id)
+        if state is None:
+            state = TrainState(train_id, fouling_status, pressure_threshold)
+        self.touch(state)
+        return state
+
+    def touch(self, state: TrainState):
+        """
+        Mark a state as just used, evicting idle and excess states
+
+        A state evicted while its connection was quiet is put back, so an
+        open stream never loses its history.
+        """
+        now = time.monotonic()
+        state.last_seen = now
+        self._states[state.train_id] = state
+        self._states.move_to_end(state.train_id)
+
+        while self._states:
+            oldest = next(iter(self._states.values()))
+            if now - oldest.last_seen <= self.idle_seconds and len(self._states) <= self.max_trains:
+                break
+            del self._states[oldest.train_id]
+            self.evicted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Store size and eviction counters"""
+        return {
+            "trains": len(self._states),
+            "max_trains": self.max_trains,
+            "idle_seconds": self.idle_seconds,
+            "evicted": self.evicted
+        }
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Precomputed summary lookup table over a parameter grid
+
+Usage:
+    python -m backend.models.lookup --output PATH [--axis NAME=START:STOP:COUNT ...]
+        [--time-steps 5,10,20,...] [--model-version VERSION] [--workers N] [--probes N]
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from backend.models.prediction_model import MODEL_VERSION, PredictionModel
+from backend.models.simulation import efficiency_batch, fouling_rate_batch, simulate_lockstep
+from backend.utils.validators import PARAMETER_RANGES
+
+# Interpolated axes, in table order after the fouling status
+TABLE_AXES = ('turbidity', 'ph', 'temperature', 'flow_rate', 'pressure_threshold', 'time_steps')
+TABLE_OUTPUTS = ('fouling_rate', 'efficiency', 'time_to_first_backwash')
+
+# Largest interpolation error per output for the table to answer queries
+DEFAULT_MAX_ERROR = {'fouling_rate': 0.01, 'efficiency': 0.01, 'time_to_first_backwash': 1.0}
+
+
+def _parameter_axis(name: str, count: int) -> np.ndarray:
+    return np.linspace(PARAMETER_RANGES[name]['min'], PARAMETER_RANGES[name]['max'], count)
+
+
+# Water quality axes span the validated parameter ranges
+DEFAULT_AXES = {
+    'turbidity': _parameter_axis('turbidity', 9),
+    'ph': _parameter_axis('ph', 13),
+    'temperature': _parameter_axis('temperature', 9),
+    'flow_rate': _parameter_axis('flow_rate', 9),
+    'pressure_threshold': np.linspace(4.0, 10.0, 13),
+    'time_steps': np.array([5, 10, 15, 20, 25, 30, 40, 50])
+}
+
+
+def table_paths(path: str):
+    """Paths of the value array and the axes file of a table"""
+    base = path[:-4] if path.endswith('.npy') else path
+    return base + '.npy', base + '.json'
+
+
+def _evaluate_chunk(model_factory: Callable[[], PredictionModel], axes: Dict[str, list],
+                    statuses: Sequence[str], start: int, stop: int) -> np.ndarray:
+    """
+    Summaries of grid scenarios ``start:stop`` of the flattened
+    (status, turbidity, ph, temperature, flow_rate, pressure_threshold) grid
+    """
+    model = model_factory()
+    shape = (len(statuses),) + tuple(len(axes[name]) for name in TABLE_AXES[:-1])
+    index = np.unravel_index(np.arange(start, stop), shape)
+    codes = model.fouling_codes(np.asarray(statuses)[index[0]])
+    columns = [np.asarray(axes[name], dtype=float)[index[1 + offset]]
+               for offset, name in enumerate(TABLE_AXES[:-1])]
+    return _simulate_summaries(model, codes, columns, np.asarray(axes['time_steps'], dtype=int))
+
+
+def _simulate_summaries(model: PredictionModel, codes: np.ndarray, columns: Sequence[np.ndarray],
+                        horizons: np.ndarray) -> np.ndarray:
+    """
+    Summaries of scenarios at every horizon, shape (n, horizons, outputs)
+
+    Every scenario is simulated once up to the longest horizon with the
+    noise-free lockstep engine; the summary at each shorter horizon is
+    taken from the prefix of its trajectory.
+
+    Args:
+        model: Model to evaluate
+        codes: Fouling status code per scenario
+        columns: Values per scenario of the TABLE_AXES before time_steps
+        horizons: Horizons to summarise
+    """
+    turbidity, ph, temperature, flow_rate, threshold = columns
+    time_steps = int(horizons.max())
+    n = codes.shape[0]
+
+    trend, intensity_scale = model._array_factors(turbidity, ph, temperature,
+                                                  model._fouling_factor_array(codes), flow_rate=flow_rate)
+    result = simulate_lockstep(
+        initial_pressure=4.0 + turbidity * 2.0,
+        trend=trend,
+        pressure_threshold=threshold,
+        intensity_scale=intensity_scale,
+        time_steps=time_steps,
+        rng=np.random.default_rng(0),
+        durations=model.BACKWASH_DURATIONS,
+        reference_threshold=model.PRESSURE_THRESHOLD,
+        drop_factor=model.PRESSURE_DROP_FACTOR,
+        noise=np.zeros((time_steps, n)),
+        duration=np.full(n, model.EXPECTED_BACKWASH_DURATION)
+    )
+
+    values = np.empty((n, len(horizons), len(TABLE_OUTPUTS)), dtype=np.float32)
+    for column, horizon in enumerate(horizons.tolist()):
+        pressure = result['pressure'][:, :horizon]
+        mask = result['backwash_mask'][:, :horizon]
+        values[:, column, 0] = fouling_rate_batch(pressure)
+        values[:, column, 1] = efficiency_batch(pressure, mask.sum(axis=1))
+        values[:, column, 2] = np.where(mask.any(axis=1), mask.argmax(axis=1), horizon)
+    return values
+
+
+def _interpolation_error(table: "LookupTable", model: PredictionModel, probes: int,
+                         seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """
+    Error of the table against the model at random off-grid points
+
+    Args:
+        table: Table to check
+        model: Model the table was built from
+        probes: Number of random points inside the grid
+        seed: Seed of the points
+
+    Returns:
+        Largest and mean absolute error per output, over ``probes`` points
+    """
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(table._low, table._high, (probes, len(TABLE_AXES)))
+    points[:, -1] = rng.integers(int(table._low[-1]), int(table._high[-1]), probes, endpoint=True)
+    codes = rng.integers(0, len(table.fouling_statuses), probes)
+
+    horizons = np.unique(points[:, -1].astype(int))
+    exact = _simulate_summaries(model, model.fouling_codes(np.asarray(table.fouling_statuses)[codes]),
+                                [points[:, dim] for dim in range(len(TABLE_AXES) - 1)], horizons)
+    exact = exact[np.arange(probes), np.searchsorted(horizons, points[:, -1].astype(int))]
+    error = np.abs(table.interpolate(points, codes) - exact)
+    return {
+        name: {'max': round(float(error[:, index].max()), 4), 'mean': round(float(error[:, index].mean()), 4)}
+        for index, name in enumerate(TABLE_OUTPUTS)
+    }
+
+
+def build_lookup_table(path: str, axes: Optional[Dict[str, Sequence[float]]] = None,
+                       model_factory: Callable[[], PredictionModel] = PredictionModel,
+                       model_version: str = MODEL_VERSION, workers: Optional[int] = None,
+                       chunk_size: int = 20000, probes: int = 1000) -> Dict[str, Any]:
+    """
+    Evaluate the model's expected-value summaries over a parameter grid
+
+    Chunks of the grid are simulated in parallel processes and written
+    straight into a ``.npy`` file opened as a memory map, so the builder
+    never holds the whole table. The array has shape (statuses,
+    *TABLE_AXES sizes, outputs) in float32; the axes are written next to
+    it as JSON. Both files are renamed into place when complete.
+
+    The interpolation error is measured against the model at ``probes``
+    random points between the nodes and recorded in the metadata as
+    ``interpolation_error``; the API only answers from tables whose
+    error is within its limits.
+
+    Args:
+        path: Table path, with or without the ``.npy`` suffix
+        axes: Grid nodes per TABLE_AXES name (ascending); missing axes use
+            DEFAULT_AXES
+        model_factory: Picklable callable building the model to tabulate
+        model_version: Version recorded for the model
+        workers: Processes to use, all cores by default
+        chunk_size: Scenarios simulated per task
+        probes: Random off-grid points the interpolation error is measured at
+
+    Returns:
+        The table metadata
+    """
+    axes = {name: np.asarray((axes or {}).get(name, DEFAULT_AXES[name]), dtype=float).tolist()
+            for name in TABLE_AXES}
+    for name, nodes in axes.items():
+        if not nodes or np.any(np.diff(nodes) <= 0):
+            raise ValueError(f"Axis {name} needs ascending, distinct nodes")
+    if min(axes['time_steps']) < 1 or any(step != int(step) for step in axes['time_steps']):
+        raise ValueError("time_steps nodes must be positive integers")
+
+    statuses = list(model_factory().FOULING_STATUSES)
+    shape = (len(statuses),) + tuple(len(axes[name]) for name in TABLE_AXES) + (len(TABLE_OUTPUTS),)
+    scenarios = int(np.prod(shape[:-2]))
+
+    values_path, axes_path = table_paths(path)
+    directory = os.path.dirname(os.path.abspath(values_path))
+    os.makedirs(directory, exist_ok=True)
+    partial_path = values_path + '.partial'
+
+    started = time.perf_counter()
+    values = np.lib.format.open_memmap(partial_path, mode='w+', dtype=np.float32, shape=shape)
+    flat = values.reshape(scenarios, shape[-2], shape[-1])
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            starts = range(0, scenarios, chunk_size)
+            futures = {
+                pool.submit(_evaluate_chunk, model_factory, axes, statuses, start,
+                            min(start + chunk_size, scenarios)): start
+                for start in starts
+            }
+            for future, start in futures.items():
+                chunk = future.result()
+                flat[start:start + chunk.shape[0]] = chunk
+        values.flush()
+    except BaseException:
+        del flat, values
+        os.unlink(partial_path)
+        raise
+    del flat, values
+
+    metadata = {
+        'model_version': model_version,
+        'built_at': datetime.utcnow().isoformat(),
+        'build_seconds': round(time.perf_counter() - started, 3),
+        'fouling_statuses': statuses,
+        'axes': axes,
+        'outputs': list(TABLE_OUTPUTS),
+        'shape': list(shape)
+    }
+    os.replace(partial_path, values_path)
+    if probes > 0:
+        table = LookupTable(path, metadata=metadata)
+        metadata['interpolation_error'] = _interpolation_error(table, model_factory(), probes)
+        del table
+    with open(axes_path + '.partial', 'w') as file:
+        json.dump(metadata, file, indent=2)
+    os.replace(axes_path + '.partial', axes_path)
+    return metadata
+
+
+class LookupTable:
+    """
+    Read-only summary table answered by multilinear interpolation
+
+    The values are memory-mapped, so opening a table reads only its axes;
+    pages are loaded on first access and shared through the page cache by
+    every process mapping the same file.
+    """
+
+    def __init__(self, path: str, metadata: Optional[Dict[str, Any]] = None,
+                 max_error: Optional[Dict[str, float]] = None):
+        values_path, axes_path = table_paths(path)
+        if metadata is None:
+            with open(axes_path) as file:
+                metadata = json.load(file)
+        self.metadata = metadata
+        self.max_error = dict(DEFAULT_MAX_ERROR, **(max_error or {}))
+        self.model_version = self.metadata['model_version']
+        self.fouling_statuses = self.metadata['fouling_statuses']
+        self._status_codes = {status: code for code, status in enumerate(self.fouling_statuses)}
+        self._axes = [np.asarray(self.metadata['axes'][name], dtype=float) for name in TABLE_AXES]
+        self._values = np.load(values_path, mmap_mode='r')
+        if list(self._values.shape) != self.metadata['shape']:
+            raise ValueError(f"Lookup table {values_path} does not match its axes file")
+
+        # Values as rows of outputs, and each cell corner's offset from its lower corner
+        sizes = self._values.shape[:-1]
+        self._rows = np.asarray(self._values).reshape(-1, self._values.shape[-1])
+        strides = np.array([int(np.prod(sizes[dim + 1:])) for dim in range(len(sizes))])
+        self._status_stride, self._strides = strides[0], strides[1:]
+        dims = len(TABLE_AXES)
+        corner_bits = (np.arange(2 ** dims)[:, None] >> np.arange(dims)[::-1]) & 1
+        counts = np.array([nodes.size for nodes in self._axes])
+        self._corner_offsets = (corner_bits * np.where(counts > 1, self._strides, 0)).sum(axis=1)
+
+        # All axes in one sorted array, each axis scaled to [0, 1] and shifted
+        # by twice its index, so one searchsorted locates every coordinate
+        self._low = np.array([nodes[0] for nodes in self._axes])
+        self._high = np.array([nodes[-1] for nodes in self._axes])
+        self._span = np.where(counts > 1, self._high - self._low, 1.0)
+        self._shift = 2.0 * np.arange(dims)
+        self._starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        self._last_cell = np.maximum(counts - 2, 0)
+        self._nodes = np.concatenate(self._axes)
+        self._keys = np.concatenate([(nodes - low) / span + shift for nodes, low, span, shift
+                                     in zip(self._axes, self._low, self._span, self._shift)])
+        # Width of the cell starting at each node; 1 past an axis' last node
+        self._widths = np.concatenate([np.append(np.diff(nodes), 1.0) for nodes in self._axes])
+
+    @classmethod
+    def from_env(cls) -> Optional["LookupTable"]:
+        """
+        Open the table at LOOKUP_TABLE_PATH, None when it is not set
+
+        LOOKUP_MAX_ERROR optionally overrides DEFAULT_MAX_ERROR with a JSON
+        object of the largest interpolation error per output.
+        """
+        path = os.getenv("LOOKUP_TABLE_PATH")
+        return cls(path, max_error=json.loads(os.getenv("LOOKUP_MAX_ERROR") or "{}")) if path else None
+
+    def accurate(self) -> bool:
+        """Whether the measured interpolation error is within ``max_error`` for every output"""
+        error = self.metadata.get('interpolation_error')
+        if not error:
+            return False
+        return all(error[name]['max'] <= self.max_error[name] for name in TABLE_OUTPUTS)
+
+    def covers(self, parameters: Dict[str, float], pressure_threshold: float, time_steps: int) -> bool:
+        """Whether a query lies within the grid, so it is interpolated rather than clamped"""
+        point = [float(parameters[name]) for name in TABLE_AXES[:4]] + [pressure_threshold, time_steps]
+        return all(low <= value <= high for value, low, high in zip(point, self._low, self._high))
+
+    def interpolate(self, points: np.ndarray, status_codes: np.ndarray) -> np.ndarray:
+        """
+        Interpolated outputs at arbitrary points
+
+        Args:
+            points: Array of shape (n, len(TABLE_AXES)); values outside an
+                axis are clamped to its ends
+            status_codes: Fouling status index per point, shape (n,)
+
+        Returns:
+            Array of shape (n, len(TABLE_OUTPUTS))
+        """
+        points = np.minimum(np.maximum(np.atleast_2d(np.asarray(points, dtype=float)), self._low), self._high)
+        keys = (points - self._low) / self._span + self._shift
+        position = np.searchsorted(self._keys, keys, side='right') - 1 - self._starts
+        lower = np.minimum(np.maximum(position, 0), self._last_cell)
+        node = lower + self._starts
+        fraction = (points - self._nodes[node]) / self._widths[node]
+
+        # Weight of each cell corner, the first axis as the highest bit: (n, 2^d)
+        n = points.shape[0]
+        pairs = np.stack([1.0 - fraction, fraction], axis=2)
+        weights = pairs[:, 0]
+        for dim in range(1, len(TABLE_AXES)):
+            weights = (weights[:, :, None] * pairs[:, dim, None, :]).reshape(n, -1)
+        base = np.asarray(status_codes, dtype=np.intp) * self._status_stride + lower @ self._strides
+        # One gather of every point's cell corners: (n, 2^d, outputs)
+        cell = self._rows[base[:, None] + self._corner_offsets]
+        return np.einsum('nc,nco->no', weights, cell)
+
+    def predict_summary_batch(self, parameters: Dict[str, Any],
+                              fouling_status: Union[str, Sequence[str], np.ndarray] = 'clean',
+                              time_steps: Union[int, np.ndarray] = 20,
+                              pressure_threshold: Union[float, np.ndarray] = 7.0) -> Dict[str, np.ndarray]:
+        """Summary metrics of many scenarios, keyed by TABLE_OUTPUTS"""
+        columns = [np.atleast_1d(np.asarray(parameters[name], dtype=float)) for name in TABLE_AXES[:4]]
+        n = max(column.shape[0] for column in columns)
+        points = np.empty((n, len(TABLE_AXES)))
+        for dim, column in enumerate(columns):
+            points[:, dim] = column
+        points[:, 4] = pressure_threshold
+        points[:, 5] = time_steps
+        statuses = np.broadcast_to(np.asarray(fouling_status), (n,))
+        try:
+            codes = np.array([self._status_codes[status] for status in statuses.tolist()])
+        except KeyError as e:
+            raise ValueError(f"Unknown fouling status: {e.args[0]}") from None
+
+        outputs = self.interpolate(points, codes)
+        return {name: outputs[:, index] for index, name in enumerate(TABLE_OUTPUTS)}
+
+    def predict_summary(self, parameters: Dict[str, float], fouling_status: str = 'clean',
+                        time_steps: int = 20, pressure_threshold: float = 7.0) -> Dict[str, float]:
+        """Summary metrics of one scenario, see ``PredictionModel.predict_summary``"""
+        if fouling_status not in self._status_codes:
+            raise ValueError(f"Unknown fouling status: {fouling_status}")
+        point = [float(parameters[name]) for name in TABLE_AXES[:4]]
+        point += [float(pressure_threshold), float(time_steps)]
+        fouling_rate, efficiency, first_backwash = self.interpolate(
+            [point], [self._status_codes[fouling_status]])[0].tolist()
+        return {
+            'fouling_rate': round(fouling_rate, 3),
+            'efficiency': round(efficiency, 3),
+            'time_to_first_backwash': round(first_backwash, 2)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Table model version, grid size, build time and interpolation error"""
+        return {
+            'model_version': self.model_version,
+            'shape': self.metadata['shape'],
+            'bytes': int(self._values.nbytes),
+            'built_at': self.metadata['built_at'],
+            'interpolation_error': self.metadata.get('interpolation_error'),
+            'accurate': self.accurate()
+        }
+
+
+def _axis(text: str):
+    name, _, spec = text.partition('=')
+    try:
+        start, stop, count = spec.split(':')
+        return name, np.linspace(float(start), float(stop), int(count))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected NAME=START:STOP:COUNT, got '{text}'")
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Build the UF Backwash summary lookup table")
+    parser.add_argument("--output", required=True, help="Table path; writes PATH.npy and PATH.json")
+    parser.add_argument("--axis", type=_axis, action="append", metavar="NAME=START:STOP:COUNT",
+                        help=f"Grid of an axis ({', '.join(TABLE_AXES[:-1])}); repeatable")
+    parser.add_argument("--time-steps", default=None,
+                        help="Comma-separated horizons (default: 5,10,15,20,25,30,40,50)")
+    parser.add_argument("--model-version", default=None,
+                        help="Registered model version to tabulate (default: the default version)")
+    parser.add_argument("--workers", type=int, default=None, help="Processes to use (default: all cores)")
+    parser.add_argument("--probes", type=int, default=1000,
+                        help="Random off-grid points the interpolation error is measured at")
+    args = parser.parse_args()
+
+    from backend.models.registry import ModelRegistry
+    registry = ModelRegistry.from_env()
+    version = registry.resolve(args.model_version)
+
+    axes = dict(args.axis or [])
+    unknown = set(axes) - set(TABLE_AXES[:-1])
+    if unknown:
+        parser.error(f"Unknown axes: {', '.join(sorted(unknown))}")
+    if args.time_steps:
+        axes['time_steps'] = [int(step) for step in args.time_steps.split(',')]
+
+    metadata = build_lookup_table(args.output, axes, model_factory=registry.factory(version),
+                                  model_version=version, workers=args.workers, probes=args.probes)
+    print(f"Built {'x'.join(map(str, metadata['shape']))} table of model {version} "
+          f"in {metadata['build_seconds']} s")
+    for name, error in (metadata.get('interpolation_error') or {}).items():
+        print(f"  {name}: max error {error['max']}, mean {error['mean']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Data migrations for the UF Backwash database
+
+Usage:
+    python -m backend.models.migrations compact-storage [--batch-size N] [--vacuum]
+    python -m backend.models.migrations rebuild-rollups [--start DATE] [--end DATE]
+"""
+
+import argparse
+from datetime import datetime
+
+from sqlalchemy import update
+
+from backend.models.database import SessionLocal, PredictionRecord, engine, init_db, rebuild_rollups
+from backend.utils.series_codec import encode_series, encode_backwash_points
+
+
+def migrate_compact_storage(batch_size: int = 1000, vacuum: bool = False) -> int:
+    """
+    Move JSON pressure series and backwash points into compact blobs
+
+    Rows are converted in primary key order, ``batch_size`` per
+    transaction, so the migration can be interrupted and rerun.
+
+    Args:
+        batch_size: Rows converted per transaction
+        vacuum: Reclaim the freed space afterwards (SQLite only)
+
+    Returns:
+        Number of rows migrated
+    """
+    init_db()
+    migrated = 0
+    last_id = 0
+
+    db = SessionLocal()
+    try:
+        while True:
+            rows = (
+                db.query(PredictionRecord.id, PredictionRecord.pressure_data_json,
+                         PredictionRecord.backwash_points_json)
+                .filter(PredictionRecord.pressure_blob.is_(None), PredictionRecord.id > last_id)
+                .order_by(PredictionRecord.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            db.execute(update(PredictionRecord), [{
+                "id": row.id,
+                "pressure_blob": encode_series(row.pressure_data_json or []),
+                "backwash_blob": encode_backwash_points(row.backwash_points_json or []),
+                "pressure_data_json": [],
+                "backwash_points_json": []
+            } for row in rows])
+            db.commit()
+
+            migrated += len(rows)
+            last_id = rows[-1].id
+    finally:
+        db.close()
+
+    if vacuum and engine.dialect.name == "sqlite":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.exec_driver_sql("VACUUM")
+
+    return migrated
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="UF Backwash database migrations")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compact = subparsers.add_parser("compact-storage", help="Store pressure series as compact blobs")
+    compact.add_argument("--batch-size", type=int, default=1000, help="Rows per transaction")
+    compact.add_argument("--vacuum", action="store_true", help="Reclaim freed space (SQLite)")
+
+    rollups = subparsers.add_parser("rebuild-rollups", help="Recompute hourly and daily rollups")
+    rollups.add_argument("--start", type=datetime.fromisoformat, default=None, help="First day to rebuild")
+    rollups.add_argument("--end", type=datetime.fromisoformat, default=None, help="Last day to rebuild")
+
+    args = parser.parse_args()
+    if args.command == "compact-storage":
+        migrated = migrate_compact_storage(batch_size=args.batch_size, vacuum=args.vacuum)
+        print(f"Migrated {migrated} prediction records to compact storage")
+    elif args.command == "rebuild-rollups":
+        init_db()
+        db = SessionLocal()
+        try:
+            aggregated = rebuild_rollups(db, start_date=args.start, end_date=args.end)
+        finally:
+            db.close()
+        print(f"Rebuilt rollups from {aggregated} prediction records")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Sequence
+
+from backend.models.prediction_model import PredictionModel
+from backend.models.simulation import simulate_lockstep, efficiency_batch
+
+# Upper bound on simulated lanes (candidates x replicates) held in memory at once
+MAX_LANES_PER_CHUNK = 65536
+
+
+def evaluate_policies(model: PredictionModel, parameters: Dict[str, float], fouling_status: str,
+                      time_steps: int, thresholds: np.ndarray, durations: np.ndarray, lockouts: np.ndarray,
+                      replicates: int, seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Simulate backwash policies with common random numbers
+
+    Every candidate policy is run for the same ``replicates`` noise
+    realizations, so differences between candidates come from the policy
+    rather than from the noise.
+
+    Args:
+        model: Model whose constants and factors are simulated
+        parameters: Water quality parameters
+        fouling_status: Current fouling status
+        time_steps: Number of time steps to simulate
+        thresholds: Pressure threshold per candidate
+        durations: Backwash duration per candidate, 0 for a random duration
+        lockouts: Lockout window in steps per candidate
+        replicates: Noise realizations per candidate
+        seed: Seed for the shared noise
+
+    Returns:
+        Per-candidate means and standard errors of efficiency, backwash
+        count and backwash seconds
+    """
+    initial_pressure, trend, intensity_scale = model.simulation_inputs(parameters, fouling_status)
+
+    rng = np.random.default_rng(seed)
+    shared_noise = rng.uniform(-0.1, 0.1, size=(time_steps, replicates))
+
+    candidates = len(thresholds)
+    per_chunk = max(1, MAX_LANES_PER_CHUNK // replicates)
+    metrics = {name: np.empty(candidates) for name in
+               ('efficiency', 'efficiency_se', 'backwash_count', 'backwash_seconds')}
+
+    for start in range(0, candidates, per_chunk):
+        window = slice(start, min(start + per_chunk, candidates))
+        size = window.stop - window.start
+        lane_candidate = np.repeat(np.arange(window.start, window.stop), replicates)
+        lanes = lane_candidate.shape[0]
+
+        result = simulate_lockstep(
+            initial_pressure=np.full(lanes, initial_pressure),
+            trend=trend,
+            pressure_threshold=thresholds[lane_candidate],
+            intensity_scale=intensity_scale,
+            time_steps=time_steps,
+            rng=rng,
+            durations=model.BACKWASH_DURATIONS,
+            reference_threshold=model.PRESSURE_THRESHOLD,
+            drop_factor=model.PRESSURE_DROP_FACTOR,
+            lockout=lockouts[lane_candidate],
+            noise=np.tile(shared_noise, size),
+            duration=durations[lane_candidate]
+        )
+
+        backwash_count = result['backwash_mask'].sum(axis=1)
+        efficiency = efficiency_batch(result['pressure'], backwash_count).reshape(size, replicates)
+
+        metrics['efficiency'][window] = efficiency.mean(axis=1)
+        metrics['efficiency_se'][window] = efficiency.std(axis=1) / np.sqrt(replicates)
+        metrics['backwash_count'][window] = backwash_count.reshape(size, replicates).mean(axis=1)
+        metrics['backwash_seconds'][window] = (
+            result['backwash_duration'].sum(axis=1).reshape(size, replicates).mean(axis=1)
+        )
+
+    return metrics
+
+
+def pareto_front(efficiency: np.ndarray, backwash_count: np.ndarray) -> np.ndarray:
+    """Indices of candidates not dominated in (max efficiency, min backwash count)"""
+    order = np.lexsort((-efficiency, backwash_count))
+    front = []
+    best_efficiency = -np.inf
+    for index in order:
+        if efficiency[index] > best_efficiency:
+            front.append(index)
+            best_efficiency = efficiency[index]
+    return np.array(front, dtype=np.int64)
+
+
+def pareto_ranks(efficiency: np.ndarray, backwash_count: np.ndarray, max_rank: int) -> np.ndarray:
+    """Front number of each candidate (0 = Pareto front), max_rank for deeper ones"""
+    ranks = np.full(efficiency.shape[0], max_rank)
+    remaining = np.arange(efficiency.shape[0])
+    for rank in range(max_rank):
+        if remaining.size == 0:
+            break
+        front = remaining[pareto_front(efficiency[remaining], backwash_count[remaining])]
+        ranks[front] = rank
+        remaining = np.setdiff1d(remaining, front)
+    return ranks
+
+
+class BackwashOptimizer:
+    """Search backwash threshold, duration and lockout policies"""
+
+    def __init__(self, model: PredictionModel):
+        self.model = model
+        self.DEFAULT_THRESHOLDS = np.round(np.arange(5.0, 10.01, 0.25), 2).tolist()
+        self.DEFAULT_LOCKOUTS = list(range(1, 11))
+        self.COST_WEIGHTS = {'efficiency': 1.0, 'backwash_count': 0.0, 'backwash_seconds': 0.0}
+        self.MAX_CANDIDATES = 20000
+
+        # Fronts kept after the screening round
+        self.SCREENING_FRONTS = 3
+        self.SCREENING_TOP = 20
+
+    def optimize(self, parameters: Dict[str, float], fouling_status: str = 'clean',
+                 time_steps: int = 20, thresholds: Optional[Sequence[float]] = None,
+                 durations: Optional[Sequence[int]] = None,
+                 lockouts: Optional[Sequence[int]] = None, replicates: int = 32,
+                 cost_weights: Optional[Dict[str, float]] = None, prune: bool = True,
+                 workers: int = 1, seed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Find the backwash policies that trade off efficiency and backwash count
+
+        Candidates are the grid thresholds x durations x lockouts, where a
+        duration of 0 keeps today's random choice from BACKWASH_DURATIONS.
+        With ``prune`` a screening round on a quarter of the replicates
+        drops candidates outside the first SCREENING_FRONTS Pareto fronts
+        and the SCREENING_TOP scores before the full evaluation.
+
+        Args:
+            parameters: Water quality parameters
+            fouling_status: Current fouling status
+            time_steps: Number of time steps to simulate
+            thresholds: Candidate pressure thresholds
+            durations: Candidate backwash durations in seconds, 0 for random
+            lockouts: Candidate lockout windows in steps
+            replicates: Noise realizations per candidate
+            cost_weights: Score weights for efficiency, backwash_count and
+                backwash_seconds; the score is maximized
+            prune: Screen out dominated candidates before the full run
+            workers: Processes used to evaluate candidates
+            seed: Seed for the shared noise
+
+        Returns:
+            Dictionary with the best policy by score and the Pareto front
+
+        Raises:
+            ValueError: If the grid is empty or too large, a duration or lockout
+                is negative, or a cost weight is unknown
+        """
+        thresholds = self.DEFAULT_THRESHOLDS if thresholds is None else thresholds
+        durations = self.model.BACKWASH_DURATIONS + [0] if durations is None else durations
+        lockouts = self.DEFAULT_LOCKOUTS if lockouts is None else lockouts
+        weights = dict(self.COST_WEIGHTS, **(cost_weights or {}))
+
+        candidate_count = len(thresholds) * len(durations) * len(lockouts)
+        if candidate_count == 0 or candidate_count > self.MAX_CANDIDATES:
+            raise ValueError(f"Candidate grid must hold between 1 and {self.MAX_CANDIDATES} policies, "
+                             f"got {candidate_count}")
+        if min(durations) < 0 or min(lockouts) < 0:
+            raise ValueError("Durations and lockouts must not be negative")
+        unknown_weights = set(weights) - set(self.COST_WEIGHTS)
+        if unknown_weights:
+            raise ValueError(f"Unknown cost weights: {sorted(unknown_weights)}")
+
+        grid = np.array(np.meshgrid(thresholds, durations, lockouts, indexing='ij')).reshape(3, -1)
+        candidates = {
+            'threshold': grid[0].astype(float),
+            'duration': grid[1].astype(np.int64),
+            'lockout': grid[2].astype(np.int64)
+        }
+        evaluated = np.arange(grid.shape[1])
+        screened = evaluated.shape[0]
+
+        if prune and replicates >= 8 and evaluated.shape[0] > self.SCREENING_TOP:
+            screening = self._evaluate(parameters, fouling_status, time_steps, candidates,
+                                       evaluated, max(2, replicates // 4), workers, seed)
+            ranks = pareto_ranks(screening['efficiency'], screening['backwash_count'],
+                                 self.SCREENING_FRONTS)
+            score = self._score(screening, weights)
+            keep = ranks < self.SCREENING_FRONTS
+            keep[np.argsort(-score)[:self.SCREENING_TOP]] = True
+            evaluated = evaluated[keep]
+
+        metrics = self._evaluate(parameters, fouling_status, time_steps, candidates,
+                                 evaluated, replicates, workers, seed)
+        score = self._score(metrics, weights)
+
+        def policy(position):
+            index = evaluated[position]
+            duration = int(candidates['duration'][index])
+            return {
+                'pressure_threshold': float(candidates['threshold'][index]),
+                'backwash_duration': duration if duration > 0 else 'random',
+                'lockout_steps': int(candidates['lockout'][index]),
+                'efficiency': round(float(metrics['efficiency'][position]), 4),
+                'efficiency_se': round(float(metrics['efficiency_se'][position]), 4),
+                'backwash_count': round(float(metrics['backwash_count'][position]), 3),
+                'backwash_seconds': round(float(metrics['backwash_seconds'][position]), 1),
+                'score': round(float(score[position]), 4)
+            }
+
+        front = pareto_front(metrics['efficiency'], metrics['backwash_count'])
+        return {
+            'best_policy': policy(int(np.argmax(score))),
+            'pareto_front': [policy(position) for position in front],
+            'candidates_screened': int(screened),
+            'candidates_evaluated': int(evaluated.shape[0]),
+            'replicates': replicates,
+            'cost_weights': weights
+        }
+
+    def _evaluate(self, parameters: Dict[str, float], fouling_status: str, time_steps: int,
+                  candidates: Dict[str, np.ndarray], indices: np.ndarray, replicates: int,
+                  workers: int, seed: Optional[int]) -> Dict[str, np.ndarray]:
+        """Evaluate a subset of candidates, split across processes when workers > 1"""
+        if seed is None:
+            # Every process must share the noise, so fix one seed per run
+            seed = int(np.random.SeedSequence().generate_state(1)[0])
+
+        parts = np.array_split(indices, max(1, min(workers, indices.shape[0])))
+        arguments = [(self.model, parameters, fouling_status, time_steps, candidates['threshold'][part],
+                      candidates['duration'][part], candidates['lockout'][part], replicates, seed)
+                     for part in parts]
+
+        if len(parts) == 1:
+            results = [evaluate_policies(*arguments[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=len(parts)) as pool:
+                results = list(pool.map(evaluate_policies, *zip(*arguments)))
+
+        return {name: np.concatenate([result[name] for result in results])
+                for name in results[0]}
+
+    def _score(self, metrics: Dict[str, np.ndarray], weights: Dict[str, float]) -> np.ndarray:
+        """Weighted score to maximize"""
+        return (weights['efficiency'] * metrics['efficiency']
+                - weights['backwash_count'] * metrics['backwash_count']
+                - weights['backwash_seconds'] * metrics['backwash_seconds'])
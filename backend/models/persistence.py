@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.models.database import SessionLocal, save_prediction_records
+
+logger = logging.getLogger(__name__)
+
+# Queue marker that tells the flush task to drain and exit
+_STOP = object()
+
+
+class PredictionWriter:
+    """
+    Write-behind persistence of prediction records
+
+    Requests enqueue record values and return; a background task collects
+    them into bulk inserts of up to ``batch_size`` rows, flushing at least
+    every ``flush_interval_ms``. The queue is bounded: when the database
+    falls behind, ``enqueue`` waits for room, slowing producers down
+    instead of growing memory.
+    """
+
+    def __init__(self, session_factory: Callable = SessionLocal, batch_size: int = 500,
+                 flush_interval_ms: float = 200.0, max_queue: int = 10000, enabled: bool = True):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval_ms = flush_interval_ms
+        self.max_queue = max_queue
+        self.enabled = enabled
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    @classmethod
+    def from_env(cls) -> "PredictionWriter":
+        """Build a writer from PREDICTION_PERSIST, PREDICTION_WRITE_BATCH, PREDICTION_WRITE_INTERVAL_MS and PREDICTION_WRITE_QUEUE"""
+        return cls(
+            batch_size=int(os.getenv("PREDICTION_WRITE_BATCH", "500")),
+            flush_interval_ms=float(os.getenv("PREDICTION_WRITE_INTERVAL_MS", "200")),
+            max_queue=int(os.getenv("PREDICTION_WRITE_QUEUE", "10000")),
+            enabled=os.getenv("PREDICTION_PERSIST", "true").lower() == "true"
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the flush task on the running event loop"""
+        if not self.enabled or self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Flush everything still queued and stop the flush task"""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def enqueue(self, record: Dict[str, Any]):
+        """
+        Queue one record for the next bulk insert
+
+        Args:
+            record: Column values, see ``prediction_record_values``
+        """
+        if not self.enabled:
+            return
+        self.start()
+        await self._queue.put(record)
+        self.enqueued += 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+
+            rows = [first]
+            deadline = loop.time() + self.flush_interval_ms / 1000.0
+            while len(rows) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                rows.append(item)
+
+            await self._flush(rows)
+
+        # Records queued behind the stop marker
+        rows = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                rows.append(item)
+        for start in range(0, len(rows), self.batch_size):
+            await self._flush(rows[start:start + self.batch_size])
+
+    async def _flush(self, rows: List[Dict[str, Any]]):
+        """Insert one batch on a thread so the event loop keeps serving requests"""
+        started = time.perf_counter()
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._write, rows)
+            self.written += len(rows)
+        except Exception:
+            self.failed += len(rows)
+            logger.exception("Failed to persist %d prediction records", len(rows))
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            self.flushes += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self.total_flush_ms += elapsed_ms
+
+    def _write(self, rows: List[Dict[str, Any]]):
+        db = self.session_factory()
+        try:
+            save_prediction_records(db, rows)
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throughput and flush latency counters"""
+        return {
+            "enabled": self.enabled,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": self.flush_interval_ms,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "mean_flush_ms": round(self.total_flush_ms / self.flushes, 3) if self.flushes else 0.0
+        }
@@ -1,6 +1,14 @@
 import numpy as np
-from typing import Dict, List, Any, Optional
-import random
+from typing import Dict, List, Any, Optional, Iterator, Sequence, Tuple, Union
+
+from backend.models.simulation import (
+    simulate_lockstep, fouling_rate_batch, efficiency_batch, HistogramSketch,
+    simulate_stream, simulate_schedule, simulate_events, segment_chunks, RunningMetrics
+)
+from backend.utils.validators import PARAMETER_RANGES
+
+# Version the heuristic model is registered under
+MODEL_VERSION = "1.0.0"
 
 class PredictionModel:
     """Intelligent UF Backwash Prediction Model"""
@@ -10,8 +18,12 @@ class PredictionModel:
         self.PRESSURE_THRESHOLD = 7.0
         self.PRESSURE_DROP_FACTOR = 0.5
         self.BACKWASH_DURATIONS = [140, 220, 360, 460]
+        self.EXPECTED_BACKWASH_DURATION = round(sum(self.BACKWASH_DURATIONS) / len(self.BACKWASH_DURATIONS))
         self.TIME_STEPS = 5
         
+        # Realizations simulated together by predict_ensemble
+        self.ENSEMBLE_CHUNK_SIZE = 8192
+        
         # Fouling factors
         self.FOULING_FACTORS = {
             'clean': 1.0,
@@ -20,16 +32,14 @@ class PredictionModel:
             'severe': 1.8,
             'critical': 2.0
         }
+        self.FOULING_STATUSES = list(self.FOULING_FACTORS)
         
         # Parameter ranges
-        self.PARAM_RANGES = {
-            'turbidity': {'min': 0.0, 'max': 2.0, 'default': 0.5},
-            'ph': {'min': 4.0, 'max': 10.0, 'default': 7.0},
-            'temperature': {'min': 15.0, 'max': 35.0, 'default': 25.0}
-        }
+        self.PARAM_RANGES = PARAMETER_RANGES
     
     def predict(self, parameters: Dict[str, float], fouling_status: str = 'clean', 
-                time_steps: int = 20, pressure_threshold: float = 7.0) -> Dict[str, Any]:
+                time_steps: int = 20, pressure_threshold: float = 7.0,
+                seed: Optional[int] = None, noise: bool = True) -> Dict[str, Any]:
         """
         Predict pressure drop and backwash requirements
         
@@ -38,6 +48,9 @@ class PredictionModel:
             fouling_status: Current fouling status
             time_steps: Number of time steps to predict
             pressure_threshold: Pressure threshold for backwash
+            seed: Optional seed making the prediction reproducible
+            noise: Add random variation; without it every backwash lasts
+                EXPECTED_BACKWASH_DURATION and the result is deterministic
             
         Returns:
             Dictionary containing prediction results
@@ -75,6 +88,8 @@ class PredictionModel:
         trend *= flow_factor
         
         last_backwash_step = -1
+        rng = np.random.default_rng(seed) if noise else None
+        variation = rng.uniform(-0.1, 0.1, size=time_steps).tolist() if noise else [0.0] * time_steps
         
         for i in range(time_steps):
             pressure_data.append(current_pressure)
@@ -85,7 +100,7 @@ class PredictionModel:
                 
                 # Calculate backwash parameters
                 backwash_params = self._calculate_backwash_params(
-                    current_pressure, parameters, fouling_status
+                    current_pressure, parameters, fouling_status, rng
                 )
                 
                 backwash_points.append({
@@ -113,7 +128,7 @@ class PredictionModel:
                     current_pressure *= 0.95
             
             # Add random variation and trend
-            current_pressure += trend + (random.uniform(-0.1, 0.1))
+            current_pressure += trend + variation[i]
             
             # Ensure pressure doesn't go below minimum
             current_pressure = max(current_pressure, 2.0)
@@ -136,89 +151,586 @@ class PredictionModel:
             'confidence_score': 0.9
         }
     
-    def predict_with_curves(self, base_parameters: Dict[str, float], 
-                           curve_data: Dict[str, List[float]], 
-                           fouling_status: str = 'clean', 
-                           time_steps: int = 20) -> Dict[str, Any]:
+    def predict_expected(self, parameters: Dict[str, float], fouling_status: str = 'clean',
+                         time_steps: int = 20, pressure_threshold: float = 7.0) -> Dict[str, Any]:
         """
-        Advanced prediction with time-varying parameters
+        Expected-value prediction that jumps from one backwash event to the next
+        
+        Agrees with ``predict(..., noise=False)``, but solves for each
+        threshold crossing instead of stepping through the steps between
+        backwashes, and computes the metrics in closed form per linear
+        segment.
         
         Args:
-            base_parameters: Base water quality parameters
-            curve_data: Time-varying parameter curves
+            parameters: Water quality parameters
             fouling_status: Current fouling status
             time_steps: Number of time steps to predict
+            pressure_threshold: Pressure threshold for backwash
             
         Returns:
-            Dictionary containing prediction results
+            Dictionary with the same fields as ``predict``
         """
-        # Initialize with base parameters
-        current_params = base_parameters.copy()
-        pressure_data = []
-        backwash_points = []
+        segments, backwash_points = self._simulate_events(parameters, fouling_status,
+                                                          time_steps, pressure_threshold)
+        metrics = RunningMetrics()
+        for _, length, first, slope in segments:
+            metrics.update_linear(first, slope, length)
+        metrics.record_backwashes(backwash_points)
+        
+        pressure = next(segment_chunks(segments, backwash_points, time_steps, time_steps))['pressure']
+        recommendations = self._generate_recommendations(
+            parameters, fouling_status, backwash_points, metrics.efficiency
+        )
+        
+        return {
+            'pressure_data': np.round(pressure, 2).tolist(),
+            'backwash_points': backwash_points,
+            'fouling_rate': round(metrics.fouling_rate, 3),
+            'efficiency': round(metrics.efficiency, 3),
+            'recommendations': recommendations,
+            'confidence_score': 0.9
+        }
+    
+    def predict_summary(self, parameters: Dict[str, float], fouling_status: str = 'clean',
+                        time_steps: int = 20, pressure_threshold: float = 7.0) -> Dict[str, float]:
+        """
+        Summary metrics of the expected-value prediction
+
+        Returns:
+            Dictionary with fouling_rate, efficiency and
+            time_to_first_backwash (``time_steps`` when no backwash
+            happens within the horizon)
+        """
+        segments, backwash_points = self._simulate_events(parameters, fouling_status,
+                                                          time_steps, pressure_threshold)
+        metrics = RunningMetrics()
+        for _, length, first, slope in segments:
+            metrics.update_linear(first, slope, length)
+        metrics.record_backwashes(backwash_points)
+
+        return {
+            'fouling_rate': round(metrics.fouling_rate, 3),
+            'efficiency': round(metrics.efficiency, 3),
+            'time_to_first_backwash': float(backwash_points[0]['time_step'] if backwash_points else time_steps)
+        }
+
+    def step_reading(self, pressure: float, reading: Dict[str, float], fouling_status: str,
+                     backwash: bool) -> Dict[str, Any]:
+        """
+        One noise-free step of the ``predict`` rule for a live sensor reading
+        
+        Args:
+            pressure: Pressure at this step
+            reading: Water quality parameters of the reading
+            fouling_status: Current fouling status
+            backwash: Whether a backwash starts at this step
+            
+        Returns:
+            Dictionary with the backwash ``intensity`` and ``duration``
+            (None without a backwash), the ``pressure`` after it, the
+            reading's pressure ``trend`` and the ``trend_decay`` factor
+            the backwash applies to later trends (1.0 without one)
+        """
+        flow_factor = (reading.get('flow_rate', 20.0) / 20.0) * 0.2 + 0.8
+        trend = self._calculate_trend(reading, fouling_status) * flow_factor
+        if not backwash:
+            return {'backwash': None, 'pressure': pressure, 'trend': trend, 'trend_decay': 1.0}
+        
+        params = self._calculate_backwash_params(pressure, reading, fouling_status)
+        after = pressure * (1 - self.PRESSURE_DROP_FACTOR)
+        effectiveness_factor = (params['intensity'] / 10.0 + params['duration'] / 300.0) / 2.0
+        if effectiveness_factor > 1.2:
+            after *= 0.95
+        return {
+            'backwash': params,
+            'pressure': after,
+            'trend': trend,
+            'trend_decay': 0.9 - (effectiveness_factor * 0.2)
+        }
+    
+    def _simulate_events(self, parameters: Dict[str, float], fouling_status: str,
+                         time_steps: int, pressure_threshold: float):
+        """Run the event-driven engine with the model's constants"""
+        initial_pressure, trend, intensity_scale = self.simulation_inputs(parameters, fouling_status)
+        return simulate_events(
+            initial_pressure=initial_pressure,
+            trend=float(trend[0]),
+            pressure_threshold=pressure_threshold,
+            intensity_scale=float(intensity_scale[0]),
+            time_steps=time_steps,
+            duration=self.EXPECTED_BACKWASH_DURATION,
+            reference_threshold=self.PRESSURE_THRESHOLD,
+            drop_factor=self.PRESSURE_DROP_FACTOR
+        )
+    
+    def predict_batch(self, parameters: Dict[str, Any],
+                      fouling_status: Union[str, Sequence[str], np.ndarray] = 'clean',
+                      time_steps: int = 20,
+                      pressure_threshold: Union[float, np.ndarray] = 7.0,
+                      seed: Optional[Union[int, Sequence[int]]] = None,
+                      scenario_seeds: Optional[Sequence[Union[int, Sequence[int]]]] = None) -> Dict[str, np.ndarray]:
+        """
+        Predict pressure and backwash requirements for N scenarios at once
         
-        # Get curve data
-        turbidity_curve = curve_data.get('turbidity_curve', [base_parameters['turbidity']] * time_steps)
-        ph_curve = curve_data.get('ph_curve', [base_parameters['ph']] * time_steps)
-        temperature_curve = curve_data.get('temperature_curve', [base_parameters['temperature']] * time_steps)
+        All trajectories are advanced in lockstep with array operations, so
+        the cost is one Python iteration per time step rather than per
+        scenario and step.
         
-        # Ensure curves have enough data points
-        def pad_curve(curve, default_value, length):
-            if len(curve) < length:
-                return curve + [default_value] * (length - len(curve))
-            return curve[:length]
+        Args:
+            parameters: Water quality parameters as arrays of length N
+                (missing parameters use the same defaults as ``predict``)
+            fouling_status: Fouling status name, sequence of names or
+                array of codes indexing ``FOULING_STATUSES``
+            time_steps: Number of time steps to predict
+            pressure_threshold: Pressure threshold for backwash, scalar or per scenario
+            seed: Optional seed for the random generator
+            scenario_seeds: Optional seed per scenario; each scenario then
+                draws its noise and backwash durations from its own
+                generator in the same order as ``predict``, so it gives
+                the same result as ``predict(..., seed=seed)`` whatever
+                batch it is simulated in
+            
+        Returns:
+            Dictionary of arrays; use ``iter_batch_results`` to get
+            ``predict``-style dictionaries per scenario
+        """
+        columns = {
+            name: np.atleast_1d(np.asarray(parameters.get(name, default), dtype=float))
+            for name, default in (('turbidity', 0.5), ('ph', 7.0), ('temperature', 25.0),
+                                  ('flow_rate', 20.0), ('inlet_pressure', 40.0))
+        }
+        n = max(column.shape[0] for column in columns.values())
+        columns = {name: np.broadcast_to(column, (n,)) for name, column in columns.items()}
+        
+        fouling_codes = np.broadcast_to(self.fouling_codes(fouling_status), (n,))
+        threshold = np.broadcast_to(np.asarray(pressure_threshold, dtype=float), (n,))
+        turbidity = columns['turbidity']
+        trend, intensity_scale = self._array_factors(
+            turbidity, columns['ph'], columns['temperature'],
+            self._fouling_factor_array(fouling_codes), flow_rate=columns['flow_rate']
+        )
         
-        turbidity_curve = pad_curve(turbidity_curve, base_parameters['turbidity'], time_steps)
-        ph_curve = pad_curve(ph_curve, base_parameters['ph'], time_steps)
-        temperature_curve = pad_curve(temperature_curve, base_parameters['temperature'], time_steps)
+        noise = duration_draws = None
+        if scenario_seeds is not None:
+            # The noise, then one duration per possible backwash (one every
+            # 5 steps at most), drawn like predict does
+            durations = np.asarray(self.BACKWASH_DURATIONS, dtype=np.int64)
+            backwashes = (time_steps - 1) // 5 + 1
+            noise = np.empty((time_steps, n))
+            draws = np.empty((backwashes, n), dtype=np.int64)
+            for lane, scenario_seed in enumerate(scenario_seeds):
+                rng = np.random.default_rng(scenario_seed)
+                noise[:, lane] = rng.uniform(-0.1, 0.1, size=time_steps)
+                draws[:, lane] = rng.integers(durations.size, size=backwashes)
+            duration_draws = durations[draws]
+        
+        result = simulate_lockstep(
+            initial_pressure=4.0 + turbidity * 2.0,
+            trend=trend,
+            pressure_threshold=threshold,
+            intensity_scale=intensity_scale,
+            time_steps=time_steps,
+            rng=np.random.default_rng(seed),
+            durations=self.BACKWASH_DURATIONS,
+            reference_threshold=self.PRESSURE_THRESHOLD,
+            drop_factor=self.PRESSURE_DROP_FACTOR,
+            noise=noise,
+            duration_draws=duration_draws
+        )
         
-        # Initial pressure
-        current_pressure = 4.0 + (turbidity_curve[0] * 2.0)
-        last_backwash_step = -1
+        backwash_count = result['backwash_mask'].sum(axis=1)
+        result.update({
+            'parameters': columns,
+            'fouling_status': fouling_codes,
+            'backwash_count': backwash_count,
+            'fouling_rate': fouling_rate_batch(result['pressure']),
+            'efficiency': efficiency_batch(result['pressure'], backwash_count),
+            'confidence_score': 0.9
+        })
+        return result
+    
+    def iter_batch_results(self, batch: Dict[str, np.ndarray]) -> Iterator[Dict[str, Any]]:
+        """
+        Yield one ``predict``-style result dictionary per scenario of a batch
         
-        for i in range(time_steps):
-            # Update parameters for this time step
-            current_params['turbidity'] = turbidity_curve[i]
-            current_params['ph'] = ph_curve[i]
-            current_params['temperature'] = temperature_curve[i]
+        Args:
+            batch: Result of ``predict_batch``
             
-            pressure_data.append(current_pressure)
+        Returns:
+            Iterator over per-scenario prediction results
+        """
+        pressure = batch['pressure']
+        rounded_pressure = np.round(pressure, 2)
+        columns = batch['parameters']
+        
+        for row in range(pressure.shape[0]):
+            steps = np.flatnonzero(batch['backwash_mask'][row])
+            backwash_points = [{
+                'time_step': int(step),
+                'pressure': float(pressure[row, step]),
+                'intensity': float(batch['backwash_intensity'][row, step]),
+                'duration': int(batch['backwash_duration'][row, step]),
+                'reason': 'pressure_threshold_exceeded'
+            } for step in steps]
             
-            # Calculate trend for current parameters
-            trend = self._calculate_trend(current_params, fouling_status)
+            parameters = {name: float(column[row]) for name, column in columns.items()}
+            code = batch['fouling_status'][row]
+            fouling_status = self.FOULING_STATUSES[code] if code >= 0 else 'unknown'
+            efficiency = float(batch['efficiency'][row])
             
-            # Check for backwash
-            if (current_pressure >= self.PRESSURE_THRESHOLD and 
-                (i - last_backwash_step) > 4):
-                
-                backwash_params = self._calculate_backwash_params(
-                    current_pressure, current_params, fouling_status
-                )
-                
-                backwash_points.append({
-                    'time_step': i,
-                    'pressure': current_pressure,
-                    'intensity': backwash_params['intensity'],
-                    'duration': backwash_params['duration'],
-                    'reason': 'pressure_threshold_exceeded'
-                })
-                
-                last_backwash_step = i
-                current_pressure *= (1 - self.PRESSURE_DROP_FACTOR)
+            yield {
+                'pressure_data': rounded_pressure[row].tolist(),
+                'backwash_points': backwash_points,
+                'fouling_rate': round(float(batch['fouling_rate'][row]), 3),
+                'efficiency': round(efficiency, 3),
+                'recommendations': self._generate_recommendations(
+                    parameters, fouling_status, backwash_points, efficiency
+                ),
+                'confidence_score': batch['confidence_score']
+            }
+    
+    def predict_ensemble(self, parameters: Dict[str, float], fouling_status: str = 'clean',
+                         time_steps: int = 20, pressure_threshold: float = 7.0,
+                         realizations: int = 1000,
+                         curve_data: Optional[Dict[str, Any]] = None,
+                         seed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Monte Carlo ensemble of noisy predictions
+        
+        Runs ``realizations`` independent realizations of ``predict`` (or of
+        ``predict_with_curves`` when curve data is given) in chunks of
+        ENSEMBLE_CHUNK_SIZE. Trajectories are folded into histogram sketches
+        and counters chunk by chunk, so memory does not grow with the number
+        of realizations.
+        
+        Args:
+            parameters: Water quality parameters (base parameters with curves)
+            fouling_status: Current fouling status
+            time_steps: Number of time steps to predict
+            pressure_threshold: Pressure threshold for backwash (curve
+                predictions use PRESSURE_THRESHOLD like predict_with_curves)
+            realizations: Number of realizations
+            curve_data: Optional time-varying parameter curves
+            seed: Optional seed making the ensemble reproducible
             
-            # Update pressure
-            current_pressure += trend + random.uniform(-0.1, 0.1)
-            current_pressure = max(current_pressure, 2.0)
+        Returns:
+            Dictionary with pressure bands, threshold crossing probabilities
+            and backwash distributions
+        """
+        fouling_factor = np.array([self.FOULING_FACTORS.get(fouling_status, 1.0)])
+        
+        if curve_data is not None:
+            curves = self._curve_arrays(parameters, curve_data, time_steps)
+            trend, intensity_scale = self._array_factors(
+                curves['turbidity'], curves['ph'], curves['temperature'], fouling_factor
+            )
+            trend, intensity_scale = trend[:, None], intensity_scale[:, None]
+            initial_pressure = 4.0 + curves['turbidity'][0] * 2.0
+            pressure_threshold = self.PRESSURE_THRESHOLD
+            adaptive = False
+        else:
+            initial_pressure, trend, intensity_scale = self.simulation_inputs(parameters, fouling_status)
+            adaptive = True
+        
+        # Pressure never drops below 2.0 and cannot rise faster than trend + noise
+        pressure_high = max(initial_pressure, pressure_threshold) + time_steps * (np.abs(trend).max() + 0.1)
+        pressure_sketch = HistogramSketch(2.0, pressure_high, min(4096, int((pressure_high - 2.0) / 0.01) + 1),
+                                          columns=time_steps)
+        fouling_rate_sketch = HistogramSketch(0.0, np.abs(trend).max() + 0.2, 1000)
+        efficiency_sketch = HistogramSketch(0.4, 1.0, 600)
+        
+        pressure_sum = np.zeros(time_steps)
+        exceed_count = np.zeros(time_steps, dtype=np.int64)
+        backwash_step_count = np.zeros(time_steps, dtype=np.int64)
+        backwash_count_hist = np.zeros(time_steps + 1, dtype=np.int64)
+        first_backwash_hist = np.zeros(time_steps + 1, dtype=np.int64)
+        durations = np.sort(np.asarray(self.BACKWASH_DURATIONS))
+        duration_hist = np.zeros(len(durations), dtype=np.int64)
+        
+        rng = np.random.default_rng(seed)
+        for start in range(0, realizations, self.ENSEMBLE_CHUNK_SIZE):
+            size = min(self.ENSEMBLE_CHUNK_SIZE, realizations - start)
+            chunk = simulate_lockstep(
+                initial_pressure=np.full(size, initial_pressure),
+                trend=trend,
+                pressure_threshold=np.full(size, pressure_threshold),
+                intensity_scale=intensity_scale,
+                time_steps=time_steps,
+                rng=rng,
+                durations=self.BACKWASH_DURATIONS,
+                reference_threshold=self.PRESSURE_THRESHOLD,
+                drop_factor=self.PRESSURE_DROP_FACTOR,
+                adaptive=adaptive
+            )
+            pressure = chunk['pressure']
+            backwash_mask = chunk['backwash_mask']
+            backwash_count = backwash_mask.sum(axis=1)
+            
+            pressure_sketch.update(pressure)
+            pressure_sum += pressure.sum(axis=0)
+            exceed_count += (pressure >= pressure_threshold).sum(axis=0)
+            backwash_step_count += backwash_mask.sum(axis=0)
+            backwash_count_hist += np.bincount(backwash_count, minlength=time_steps + 1)
+            first_step = np.where(backwash_count > 0, backwash_mask.argmax(axis=1), time_steps)
+            first_backwash_hist += np.bincount(first_step, minlength=time_steps + 1)
+            duration_hist += np.bincount(np.searchsorted(durations, chunk['backwash_duration'][backwash_mask]),
+                                         minlength=len(durations))
+            fouling_rate_sketch.update(fouling_rate_batch(pressure))
+            efficiency_sketch.update(efficiency_batch(pressure, backwash_count))
+        
+        def distribution(counts, labels):
+            total = max(int(counts.sum()), 1)
+            return {str(label): round(int(count) / total, 4)
+                    for label, count in zip(labels, counts) if count}
+        
+        def summary(sketch):
+            return {
+                'mean': round(sketch.mean(), 3),
+                'p5': round(float(sketch.quantile(0.05)[0]), 3),
+                'p50': round(float(sketch.quantile(0.5)[0]), 3),
+                'p95': round(float(sketch.quantile(0.95)[0]), 3)
+            }
+        
+        return {
+            'realizations': realizations,
+            'pressure_bands': {
+                'p5': np.round(pressure_sketch.quantile(0.05), 2).tolist(),
+                'p50': np.round(pressure_sketch.quantile(0.5), 2).tolist(),
+                'p95': np.round(pressure_sketch.quantile(0.95), 2).tolist()
+            },
+            'pressure_mean': np.round(pressure_sum / realizations, 2).tolist(),
+            'threshold_crossing_probability': np.round(exceed_count / realizations, 4).tolist(),
+            'backwash_probability': np.round(backwash_step_count / realizations, 4).tolist(),
+            'backwash_count_distribution': distribution(backwash_count_hist, range(time_steps + 1)),
+            'first_backwash_distribution': distribution(
+                first_backwash_hist, list(range(time_steps)) + ['none']
+            ),
+            'duration_distribution': distribution(duration_hist, durations.tolist()),
+            'fouling_rate': summary(fouling_rate_sketch),
+            'efficiency': summary(efficiency_sketch)
+        }
+    
+    def simulate_long_horizon(self, parameters: Dict[str, float], fouling_status: str = 'clean',
+                              total_steps: int = 100000, pressure_threshold: float = 7.0,
+                              chunk_size: int = 4096,
+                              seed: Optional[int] = None, engine: str = 'stepwise',
+                              include_pressure: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Simulate months of operation with constant memory
+        
+        Pressure is produced in chunks of ``chunk_size`` steps while fouling
+        rate, variance and backwash statistics are accumulated online, so
+        neither the trajectory nor the metrics grow with ``total_steps``.
+        
+        The "event" engine is noise-free: it jumps between backwash events
+        and folds each linear segment into the metrics in closed form, so
+        without pressure output its cost grows with the number of backwashes.
+        
+        Args:
+            parameters: Water quality parameters
+            fouling_status: Current fouling status
+            total_steps: Number of time steps to simulate
+            pressure_threshold: Pressure threshold for backwash
+            chunk_size: Steps per chunk
+            seed: Optional seed making the simulation reproducible
+            engine: "stepwise" for the noisy simulation, "event" for the
+                expected-value one
+            include_pressure: Include pressure values in the chunks
+            
+        Returns:
+            Iterator of chunk dictionaries (``type`` "chunk", pressure as a
+            NumPy array if included) followed by one ``type`` "summary" dictionary
+        """
+        metrics = RunningMetrics()
+        
+        if engine == 'event':
+            segments, backwash_points = self._simulate_events(parameters, fouling_status,
+                                                              total_steps, pressure_threshold)
+            chunks = segment_chunks(segments, backwash_points, total_steps, chunk_size,
+                                    materialize=include_pressure)
+        else:
+            initial_pressure, trend, intensity_scale = self.simulation_inputs(parameters, fouling_status)
+            chunks = simulate_stream(
+                initial_pressure=initial_pressure,
+                trend=float(trend[0]),
+                pressure_threshold=pressure_threshold,
+                intensity_scale=float(intensity_scale[0]),
+                total_steps=total_steps,
+                chunk_size=chunk_size,
+                rng=np.random.default_rng(seed),
+                durations=self.BACKWASH_DURATIONS,
+                reference_threshold=self.PRESSURE_THRESHOLD,
+                drop_factor=self.PRESSURE_DROP_FACTOR
+            )
+        
+        for chunk in chunks:
+            if 'segments' in chunk:
+                for _, length, first, slope in chunk['segments']:
+                    metrics.update_linear(first, slope, length)
+                metrics.record_backwashes(chunk['backwash_points'])
+            else:
+                metrics.update(chunk['pressure'], chunk['backwash_points'])
+            
+            result = {
+                'type': 'chunk',
+                'start_step': chunk['start_step'],
+                'backwash_points': chunk['backwash_points']
+            }
+            if include_pressure:
+                result['pressure_data'] = chunk['pressure']
+            yield result
+        
+        mean_interval = None
+        if metrics.backwash_count > 1:
+            mean_interval = (metrics.last_backwash_step - metrics.first_backwash_step) / (metrics.backwash_count - 1)
+        
+        yield {
+            'type': 'summary',
+            'total_steps': total_steps,
+            'fouling_rate': round(metrics.fouling_rate, 3),
+            'efficiency': round(metrics.efficiency, 3),
+            'pressure_mean': round(metrics.mean, 3),
+            'pressure_variance': round(metrics.variance, 3),
+            'pressure_min': round(metrics.minimum, 2),
+            'pressure_max': round(metrics.maximum, 2),
+            'backwash_count': metrics.backwash_count,
+            'first_backwash_step': metrics.first_backwash_step,
+            'mean_backwash_interval': None if mean_interval is None else round(mean_interval, 2),
+            'confidence_score': 0.9
+        }
+    
+    def simulation_inputs(self, parameters: Dict[str, float],
+                          fouling_status: str = 'clean') -> Tuple[float, np.ndarray, np.ndarray]:
+        """
+        Initial pressure, trend and backwash intensity factor of one scenario
+        
+        Args:
+            parameters: Water quality parameters
+            fouling_status: Current fouling status
+            
+        Returns:
+            Tuple of (initial pressure, trend, intensity_scale), the last two
+            as one-element arrays ready for the array simulators
+        """
+        fouling_factor = np.array([self.FOULING_FACTORS.get(fouling_status, 1.0)])
+        trend, intensity_scale = self._array_factors(
+            np.array([parameters.get('turbidity', 0.5)]), np.array([parameters.get('ph', 7.0)]),
+            np.array([parameters.get('temperature', 25.0)]), fouling_factor,
+            flow_rate=np.array([parameters.get('flow_rate', 20.0)])
+        )
+        initial_pressure = 4.0 + parameters.get('turbidity', 0.5) * 2.0
+        return initial_pressure, trend, intensity_scale
+    
+    def _curve_arrays(self, base_parameters: Dict[str, float], curve_data: Dict[str, Any],
+                      time_steps: int) -> Dict[str, np.ndarray]:
+        """Curves as float arrays of time_steps points, padded (and NaN gaps filled) with the base parameters"""
+        arrays = {}
+        for name in ('turbidity', 'ph', 'temperature'):
+            values = np.full(time_steps, float(base_parameters[name]))
+            curve = curve_data.get(f'{name}_curve')
+            if curve is not None:
+                curve = np.asarray(curve, dtype=float)[:time_steps]
+                values[:curve.shape[0]] = np.where(np.isnan(curve), values[:curve.shape[0]], curve)
+            arrays[name] = values
+        return arrays
+    
+    def _fouling_factor_array(self, fouling_codes: np.ndarray) -> np.ndarray:
+        """Fouling factor per code, 1.0 for unknown statuses"""
+        factors = np.array([self.FOULING_FACTORS[s] for s in self.FOULING_STATUSES] + [1.0])
+        return factors[fouling_codes]
+    
+    def _array_factors(self, turbidity: np.ndarray, ph: np.ndarray, temperature: np.ndarray,
+                       fouling_factor: np.ndarray,
+                       flow_rate: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pressure trend and backwash intensity factor for arrays of parameters
+        
+        Follows the operation order of the scalar code so results match it
+        exactly. Without ``flow_rate`` the trend is that of ``_calculate_trend``.
+        
+        Returns:
+            Tuple of (trend, intensity_scale) arrays
+        """
+        ph_factor = np.abs(ph - 7.0) * 0.1 + 1.0
+        temp_factor = temperature / 25.0
+        
+        trend = (0.3 + turbidity * 0.2) * fouling_factor
+        trend = trend * temp_factor
+        trend = trend * ph_factor
+        if flow_rate is not None:
+            trend = trend * ((flow_rate / 20.0) * 0.2 + 0.8)
+        
+        # Backwash intensity per unit of pressure above PRESSURE_THRESHOLD
+        intensity_scale = 1.5 * fouling_factor * ph_factor * temp_factor * ((turbidity / 0.5) * 0.2 + 0.8)
+        
+        return trend, intensity_scale
+    
+    def fouling_codes(self, fouling_status: Union[str, Sequence[str], np.ndarray]) -> np.ndarray:
+        """Map fouling status names to codes indexing FOULING_STATUSES (-1 if unknown)"""
+        statuses = np.asarray(fouling_status)
+        if statuses.dtype.kind in 'iu':
+            return statuses.astype(np.int64)
+        
+        codes = np.full(statuses.shape, -1, dtype=np.int64)
+        for code, status in enumerate(self.FOULING_STATUSES):
+            codes[statuses == status] = code
+        return codes
+    
+    def predict_with_curves(self, base_parameters: Dict[str, float], 
+                           curve_data: Dict[str, Any], 
+                           fouling_status: str = 'clean', 
+                           time_steps: int = 20,
+                           seed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Advanced prediction with time-varying parameters
+        
+        The trend and backwash intensity for the whole horizon are computed
+        once from the curves; only the pressure/backwash recurrence runs
+        sequentially, so curves of 10^5+ points are cheap.
+        
+        Args:
+            base_parameters: Base water quality parameters
+            curve_data: Time-varying parameter curves (arrays or lists,
+                padded with the base parameters up to time_steps)
+            fouling_status: Current fouling status
+            time_steps: Number of time steps to predict
+            seed: Optional seed making the prediction reproducible
+            
+        Returns:
+            Dictionary containing prediction results
+        """
+        curves = self._curve_arrays(base_parameters, curve_data, time_steps)
+        fouling_factor = np.array([self.FOULING_FACTORS.get(fouling_status, 1.0)])
+        trend, intensity_scale = self._array_factors(
+            curves['turbidity'], curves['ph'], curves['temperature'], fouling_factor
+        )
+        
+        rng = np.random.default_rng(seed)
+        noise = rng.uniform(-0.1, 0.1, size=time_steps)
+        
+        pressure, backwash_points = simulate_schedule(
+            initial_pressure=4.0 + curves['turbidity'][0] * 2.0,
+            increments=trend + noise,
+            pressure_threshold=self.PRESSURE_THRESHOLD,
+            intensity_scale=intensity_scale,
+            rng=rng,
+            durations=self.BACKWASH_DURATIONS,
+            reference_threshold=self.PRESSURE_THRESHOLD,
+            drop_factor=self.PRESSURE_DROP_FACTOR
+        )
         
         # Calculate metrics
-        fouling_rate = self._calculate_fouling_rate(pressure_data, current_params)
-        efficiency = self._calculate_efficiency(pressure_data, backwash_points)
+        fouling_rate = float(fouling_rate_batch(pressure[None, :])[0])
+        efficiency = float(efficiency_batch(pressure[None, :], np.array([len(backwash_points)]))[0])
+        
+        # Recommendations use the parameters at the end of the horizon
+        final_params = dict(base_parameters, **{name: float(values[-1]) for name, values in curves.items()})
         recommendations = self._generate_recommendations(
-            current_params, fouling_status, backwash_points, efficiency
+            final_params, fouling_status, backwash_points, efficiency
         )
         
         return {
-            'pressure_data': [round(p, 2) for p in pressure_data],
+            'pressure_data': np.round(pressure, 2).tolist(),
             'backwash_points': backwash_points,
             'fouling_rate': round(fouling_rate, 3),
             'efficiency': round(efficiency, 3),
@@ -227,8 +739,9 @@ class PredictionModel:
         }
     
     def _calculate_backwash_params(self, pressure: float, parameters: Dict[str, float], 
-                                 fouling_status: str) -> Dict[str, float]:
-        """Calculate backwash intensity and duration"""
+                                 fouling_status: str,
+                                 rng: Optional[np.random.Generator] = None) -> Dict[str, float]:
+        """Calculate backwash intensity and duration (the expected duration without rng)"""
         fouling_factor = self.FOULING_FACTORS.get(fouling_status, 1.0)
         
         # Base intensity calculation
@@ -240,7 +753,10 @@ class PredictionModel:
         turb_factor = (parameters['turbidity'] / 0.5) * 0.2 + 0.8
         
         intensity = base_intensity * ph_factor * temp_factor * turb_factor
-        duration = random.choice(self.BACKWASH_DURATIONS)
+        if rng is None:
+            duration = self.EXPECTED_BACKWASH_DURATION
+        else:
+            duration = self.BACKWASH_DURATIONS[rng.integers(len(self.BACKWASH_DURATIONS))]
         
         return {
             'intensity': round(intensity, 1),
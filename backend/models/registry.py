@@ -0,0 +1,373 @@
+import importlib
+import json
+import logging
+import math
+import os
+import threading
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.models.prediction_model import MODEL_VERSION, PredictionModel
+from backend.models.surrogate import SURROGATE_TARGETS, load_surrogate, read_manifest
+
+logger = logging.getLogger(__name__)
+
+# PredictionModel constants a calibrated variant may override
+CALIBRATION_FIELDS = ('PRESSURE_THRESHOLD', 'PRESSURE_DROP_FACTOR', 'BACKWASH_DURATIONS', 'FOULING_FACTORS')
+
+# Accepted (low, high) of each calibration value; durations are per element, factors per status
+CALIBRATION_RANGES = {
+    'PRESSURE_THRESHOLD': (1.0, 15.0),
+    'PRESSURE_DROP_FACTOR': (0.01, 0.99),
+    'BACKWASH_DURATIONS': (1, 3600),
+    'FOULING_FACTORS': (0.1, 10.0)
+}
+
+WARM_UP_PARAMETERS = {'turbidity': 0.5, 'ph': 7.0, 'temperature': 25.0,
+                      'flow_rate': 20.0, 'inlet_pressure': 40.0}
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def validate_overrides(overrides: Dict[str, Any]):
+    """
+    Check calibration overrides against CALIBRATION_FIELDS and CALIBRATION_RANGES
+
+    Raises:
+        ValueError: If a field is unknown or a value has the wrong type or range
+    """
+    if not isinstance(overrides, dict):
+        raise ValueError("Calibration overrides must be an object")
+    unknown = set(overrides) - set(CALIBRATION_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown calibration fields: {', '.join(sorted(unknown))}")
+
+    for name, value in overrides.items():
+        low, high = CALIBRATION_RANGES[name]
+        if name == 'BACKWASH_DURATIONS':
+            if (not isinstance(value, list) or not value
+                    or not all(isinstance(v, int) and not isinstance(v, bool) and low <= v <= high for v in value)):
+                raise ValueError(f"{name} must be a non-empty list of integers in [{low}, {high}]")
+        elif name == 'FOULING_FACTORS':
+            if (not isinstance(value, dict) or not value
+                    or not all(isinstance(k, str) and _is_number(v) and low <= v <= high for k, v in value.items())):
+                raise ValueError(f"{name} must map fouling statuses to numbers in [{low}, {high}]")
+        elif not _is_number(value) or not low <= value <= high:
+            raise ValueError(f"{name} must be a number in [{low}, {high}]")
+
+
+class UnknownModelError(LookupError):
+    """Raised when a model version is not registered"""
+
+
+class CalibratedPredictionModel(PredictionModel):
+    """Heuristic model with recalibrated constants"""
+
+    def __init__(self, overrides: Dict[str, Any]):
+        super().__init__()
+        validate_overrides(overrides)
+
+        for name, value in overrides.items():
+            if name == 'FOULING_FACTORS':
+                value = dict(self.FOULING_FACTORS, **value)
+            setattr(self, name, value)
+        self.EXPECTED_BACKWASH_DURATION = round(sum(self.BACKWASH_DURATIONS) / len(self.BACKWASH_DURATIONS))
+        self.FOULING_STATUSES = list(self.FOULING_FACTORS)
+
+
+def load_factory(path: str, **kwargs) -> Any:
+    """Build a model with the callable at ``module:attribute``, e.g. a loader for a fitted estimator"""
+    module_name, _, attribute = path.partition(':')
+    if not attribute:
+        raise ValueError(f"Expected module:attribute, got '{path}'")
+    return getattr(importlib.import_module(module_name), attribute)(**kwargs)
+
+
+def warm_model(model: Any) -> Any:
+    """Run one small prediction so a new model's first request is not the slow one"""
+    model.predict(WARM_UP_PARAMETERS, time_steps=5)
+    return model
+
+
+class ModelRegistry:
+    """
+    Prediction models registered under versions
+
+    A version maps to a factory, a picklable callable building the model,
+    so every worker thread or process can load its own instance. Versions
+    are immutable once registered; publish a new version and make it the
+    default to update the model. Requests resolve the version once, when
+    they are admitted, so swapping the default never affects requests
+    already running.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._descriptions: Dict[str, str] = {}
+        self._default = MODEL_VERSION
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.artifact_dir: Optional[str] = None
+        self.surrogate_version: Optional[str] = None
+        # Model version each registered surrogate was trained on, and its holdout metrics
+        self.surrogate_sources: Dict[str, Optional[str]] = {}
+        self.surrogate_metrics: Dict[str, Dict[str, Dict[str, float]]] = {}
+        # Holdout quality a surrogate needs to answer in place of its source model
+        self.surrogate_min_r2 = 0.9
+        self.surrogate_max_mae: Dict[str, float] = {}
+        self.register(MODEL_VERSION, PredictionModel, "Heuristic pressure and backwash model")
+
+    @classmethod
+    def from_env(cls) -> "ModelRegistry":
+        """
+        Build a registry from MODEL_REGISTRY_PATH, MODEL_ARTIFACT_DIR,
+        MODEL_DEFAULT_VERSION, SURROGATE_MIN_R2 and SURROGATE_MAX_MAE (JSON
+        object of the largest holdout MAE per target)
+        """
+        registry = cls()
+        registry.surrogate_min_r2 = float(os.getenv("SURROGATE_MIN_R2", "0.9"))
+        registry.surrogate_max_mae = json.loads(os.getenv("SURROGATE_MAX_MAE") or "{}")
+        path = os.getenv("MODEL_REGISTRY_PATH")
+        if path:
+            registry.load_file(path)
+        registry.artifact_dir = os.getenv("MODEL_ARTIFACT_DIR", "./model_artifacts")
+        registry.sync_artifacts(preload=False)
+        default = os.getenv("MODEL_DEFAULT_VERSION")
+        if default:
+            registry.set_default(default)
+        return registry
+
+    def load_file(self, path: str):
+        """
+        Register the models listed in a JSON registry file
+
+        The file holds ``{"default": version, "models": [...]}``; each model
+        entry has a ``version``, an optional ``description`` and either
+        ``"type": "calibrated"`` with ``overrides`` of CALIBRATION_FIELDS, or
+        ``"type": "import"`` with a ``factory`` path and optional ``kwargs``.
+        """
+        with open(path) as file:
+            spec = json.load(file)
+
+        for entry in spec.get("models", []):
+            kind = entry.get("type", "calibrated")
+            if kind == "calibrated":
+                self.register_calibrated(entry["version"], entry.get("overrides", {}),
+                                         entry.get("description", ""))
+            elif kind == "import":
+                self.register(entry["version"], partial(load_factory, entry["factory"], **entry.get("kwargs", {})),
+                              entry.get("description", ""))
+            else:
+                raise ValueError(f"Unknown model type '{kind}' for version {entry.get('version')}")
+        if spec.get("default"):
+            self.set_default(spec["default"])
+
+    def sync_artifacts(self, preload: bool = True) -> List[str]:
+        """
+        Register surrogate versions newly published to ``artifact_dir``
+
+        The latest published version becomes ``surrogate_version``, and
+        versions pruned from the manifest (their artifacts are deleted) are
+        unregistered, so requests for them get an unknown-version error
+        instead of failing to load the file.
+
+        Args:
+            preload: Load the latest version into this process, so the
+                first request for it does not wait for the artifact
+
+        Returns:
+            The versions registered by this call
+        """
+        if not self.artifact_dir:
+            return []
+        manifest = read_manifest(self.artifact_dir)
+        published = {entry['version'] for entry in manifest['versions']}
+        for version in [version for version in self.surrogate_sources if version not in published]:
+            self.unregister(version)
+        added = []
+        for entry in manifest['versions']:
+            if entry['version'] in self._factories:
+                continue
+            path = os.path.join(os.path.abspath(self.artifact_dir), entry['artifact'])
+            source = entry.get('source_model_version')
+            self.register(entry['version'], partial(load_surrogate, path),
+                          f"Surrogate trained on {entry['records_trained']} records of {source}")
+            self.surrogate_sources[entry['version']] = source
+            self.surrogate_metrics[entry['version']] = entry.get('metrics') or {}
+            added.append(entry['version'])
+
+        latest = manifest['latest']
+        if latest in self._factories and latest != self.surrogate_version:
+            if preload:
+                self.model(latest)
+            self.surrogate_version = latest
+        return added
+
+    def register(self, version: str, factory: Callable[[], Any], description: str = "",
+                 default: bool = False):
+        """
+        Register a model under a new version
+
+        Args:
+            version: Version name
+            factory: Picklable callable returning a model with the
+                PredictionModel interface
+            description: Human readable description
+            default: Also make it the default version
+
+        Raises:
+            ValueError: If the version is already registered
+        """
+        with self._lock:
+            if version in self._factories:
+                raise ValueError(f"Model version {version} is already registered")
+            self._factories[version] = factory
+            self._descriptions[version] = description
+            if default:
+                self._default = version
+
+    def unregister(self, version: str):
+        """
+        Remove a version, e.g. a surrogate whose artifact was pruned
+
+        Instances workers already loaded are no longer reachable. If it was
+        the default, the heuristic MODEL_VERSION becomes the default.
+
+        Raises:
+            ValueError: For MODEL_VERSION, which is always registered
+        """
+        if version == MODEL_VERSION:
+            raise ValueError(f"Model version {MODEL_VERSION} cannot be unregistered")
+        with self._lock:
+            self._factories.pop(version, None)
+            self._descriptions.pop(version, None)
+            self._models.pop(version, None)
+            self.surrogate_sources.pop(version, None)
+            self.surrogate_metrics.pop(version, None)
+            if self._default == version:
+                logger.warning("Default model version %s was retired; using %s", version, MODEL_VERSION)
+                self._default = MODEL_VERSION
+            if self.surrogate_version == version:
+                self.surrogate_version = None
+
+    def register_calibrated(self, version: str, overrides: Dict[str, Any], description: str = "",
+                            default: bool = False):
+        """
+        Register the heuristic model with recalibrated constants, see CALIBRATION_FIELDS
+
+        The model is built and run once, so a version that cannot predict is
+        never registered; versions are immutable.
+
+        Raises:
+            ValueError: If the overrides are invalid, the model fails to run
+                or the version is already registered
+        """
+        validate_overrides(overrides)
+        factory = partial(CalibratedPredictionModel, dict(overrides))
+        # Fail at registration rather than in the workers
+        try:
+            warm_model(factory())
+        except Exception as e:
+            raise ValueError(f"Calibrated model {version} failed to run: {e}") from e
+        self.register(version, factory, description or f"Calibrated {MODEL_VERSION}", default)
+
+    def __contains__(self, version: str) -> bool:
+        return version in self._factories
+
+    @property
+    def default_version(self) -> str:
+        return self._default
+
+    def summary_surrogate(self, version: str) -> Optional[str]:
+        """
+        Surrogate version that may answer summaries in place of ``version``
+
+        Returns:
+            The current surrogate if it was trained on ``version`` and its
+            holdout metrics reach ``surrogate_min_r2`` and stay within
+            ``surrogate_max_mae`` for every target, otherwise None
+        """
+        surrogate = self.surrogate_version
+        if surrogate is None or self.surrogate_sources.get(surrogate) != version:
+            return None
+        metrics = self.surrogate_metrics.get(surrogate) or {}
+        for target in SURROGATE_TARGETS:
+            if target not in metrics or metrics[target]['r2'] < self.surrogate_min_r2:
+                return None
+            if metrics[target]['mae'] > self.surrogate_max_mae.get(target, math.inf):
+                return None
+        return surrogate
+
+    @property
+    def surrogate_source_version(self) -> Optional[str]:
+        """Model version the current surrogate was trained on, None if unknown"""
+        return self.surrogate_sources.get(self.surrogate_version)
+
+    def set_default(self, version: str) -> str:
+        """
+        Make ``version`` the default and return the previous default
+
+        A single reference swap: requests admitted before it keep the
+        version they resolved.
+        """
+        with self._lock:
+            if version not in self._factories:
+                raise UnknownModelError(f"Model version {version} is not registered")
+            previous, self._default = self._default, version
+            return previous
+
+    def resolve(self, version: Optional[str] = None) -> str:
+        """Requested version, or the current default when None"""
+        if version is None:
+            return self._default
+        if version not in self._factories:
+            raise UnknownModelError(f"Model version {version} is not registered")
+        return version
+
+    def factory(self, version: str) -> Callable[[], Any]:
+        """Factory of a registered version"""
+        try:
+            return self._factories[version]
+        except KeyError:
+            raise UnknownModelError(f"Model version {version} is not registered") from None
+
+    def specs(self) -> List[Tuple[str, Callable[[], Any]]]:
+        """(version, factory) pairs of every registered model"""
+        with self._lock:
+            return list(self._factories.items())
+
+    def model(self, version: Optional[str] = None) -> Any:
+        """
+        Warm model instance of this process, for work outside the worker pool
+
+        Args:
+            version: Version to load, the default when None
+        """
+        version = self.resolve(version)
+        model = self._models.get(version)
+        if model is None:
+            with self._lock:
+                model = self._models.get(version)
+                if model is None:
+                    model = warm_model(self._factories[version]())
+                    self._models[version] = model
+        return model
+
+    def loaded_model(self, version: str) -> Optional[Any]:
+        """Model instance of this process if already loaded, without loading it"""
+        return self._models.get(version)
+
+    def describe(self) -> Dict[str, Any]:
+        """Registered versions and the default"""
+        default = self._default
+        return {
+            "default": default,
+            "surrogate": self.surrogate_version,
+            "surrogate_source": self.surrogate_source_version,
+            "models": [
+                {"version": version, "description": self._descriptions[version], "default": version == default}
+                for version in self._factories
+            ]
+        }
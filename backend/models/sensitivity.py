@@ -0,0 +1,341 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Sequence
+
+from backend.models.prediction_model import PredictionModel
+from backend.models.simulation import simulate_lockstep, fouling_rate_batch, efficiency_batch
+from backend.utils.validators import PARAMETER_RANGES
+
+# Parameters varied by the analysis; inlet pressure does not enter the dynamics
+SENSITIVITY_PARAMETERS = ('turbidity', 'ph', 'temperature', 'flow_rate')
+SENSITIVITY_OUTPUTS = ('fouling_rate', 'efficiency', 'backwash_count')
+SENSITIVITY_METHODS = ('local', 'morris', 'sobol')
+
+# Upper bound on simulated lanes (scenarios x replicates) held in memory at once
+MAX_LANES_PER_CHUNK = 65536
+
+
+def evaluate_scenarios(model: PredictionModel, samples: np.ndarray, fouling_status: str,
+                       time_steps: int, pressure_threshold: float, replicates: int,
+                       seed: int) -> np.ndarray:
+    """
+    Simulate parameter samples with common random numbers
+
+    Every sample is run for the same ``replicates`` realizations of the
+    noise and of the backwash durations, so differences between samples
+    come from the parameters rather than from the randomness.
+
+    Args:
+        model: Model whose constants and factors are simulated
+        samples: Array of shape (n, len(SENSITIVITY_PARAMETERS))
+        fouling_status: Fouling status of every sample
+        time_steps: Number of time steps to simulate
+        pressure_threshold: Backwash threshold of every sample
+        replicates: Realizations per sample
+        seed: Seed of the shared realizations
+
+    Returns:
+        Array of shape (n, len(SENSITIVITY_OUTPUTS)) with the means over
+        the replicates
+    """
+    rng = np.random.default_rng(seed)
+    shared_noise = rng.uniform(-0.1, 0.1, size=(time_steps, replicates))
+    shared_durations = rng.choice(model.BACKWASH_DURATIONS, size=(time_steps, replicates))
+    fouling_factor = model._fouling_factor_array(model.fouling_codes(fouling_status))
+
+    count = samples.shape[0]
+    per_chunk = max(1, MAX_LANES_PER_CHUNK // replicates)
+    outputs = np.empty((count, len(SENSITIVITY_OUTPUTS)))
+
+    for start in range(0, count, per_chunk):
+        window = slice(start, min(start + per_chunk, count))
+        size = window.stop - window.start
+        turbidity, ph, temperature, flow_rate = np.repeat(samples[window], replicates, axis=0).T
+        lanes = turbidity.shape[0]
+
+        trend, intensity_scale = model._array_factors(turbidity, ph, temperature,
+                                                      np.full(lanes, fouling_factor), flow_rate=flow_rate)
+        result = simulate_lockstep(
+            initial_pressure=4.0 + turbidity * 2.0,
+            trend=trend,
+            pressure_threshold=np.full(lanes, float(pressure_threshold)),
+            intensity_scale=intensity_scale,
+            time_steps=time_steps,
+            rng=rng,
+            durations=model.BACKWASH_DURATIONS,
+            reference_threshold=model.PRESSURE_THRESHOLD,
+            drop_factor=model.PRESSURE_DROP_FACTOR,
+            noise=np.tile(shared_noise, size),
+            duration=np.tile(shared_durations, size)
+        )
+
+        backwash_count = result['backwash_mask'].sum(axis=1)
+        metrics = (fouling_rate_batch(result['pressure']),
+                   efficiency_batch(result['pressure'], backwash_count),
+                   backwash_count)
+        for column, values in enumerate(metrics):
+            outputs[window, column] = values.reshape(size, replicates).mean(axis=1)
+
+    return outputs
+
+
+def morris_trajectories(trajectories: int, dimensions: int, levels: int,
+                        rng: np.random.Generator) -> np.ndarray:
+    """
+    Random one-at-a-time trajectories on a levels grid of the unit cube
+
+    Each trajectory starts at a random grid point and moves every
+    coordinate once, in random order, by delta = levels / (2 (levels - 1)),
+    upwards when that stays inside the cube and downwards otherwise.
+
+    Returns:
+        Array of shape (trajectories, dimensions + 1, dimensions)
+    """
+    delta = levels / (2.0 * (levels - 1))
+    rows = np.arange(trajectories)
+    points = np.empty((trajectories, dimensions + 1, dimensions))
+    points[:, 0] = rng.integers(0, levels, size=(trajectories, dimensions)) / (levels - 1)
+    order = np.argsort(rng.random((trajectories, dimensions)), axis=1)
+
+    for step in range(dimensions):
+        current = points[:, step].copy()
+        moved = order[:, step]
+        value = current[rows, moved]
+        current[rows, moved] = np.where(value + delta <= 1.0 + 1e-9, value + delta, value - delta)
+        points[:, step + 1] = current
+    return points
+
+
+class SensitivityAnalyzer:
+    """Local and global sensitivity of the prediction summary to the water quality parameters"""
+
+    def __init__(self, model: PredictionModel):
+        self.model = model
+        # Central difference step as a fraction of the parameter range
+        self.FINITE_DIFFERENCE_STEP = 0.05
+        self.MORRIS_LEVELS = 4
+        self.BOOTSTRAP_RESAMPLES = 100
+        self.MAX_EVALUATIONS = 2000000
+
+    def analyze(self, parameters: Dict[str, float], fouling_status: str = 'clean',
+                time_steps: int = 20, pressure_threshold: float = 7.0,
+                methods: Sequence[str] = SENSITIVITY_METHODS,
+                ranges: Optional[Dict[str, Sequence[float]]] = None, samples: int = 4096,
+                trajectories: int = 64, replicates: int = 4, workers: int = 1,
+                seed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Sensitivity of fouling rate, efficiency and backwash count to
+        turbidity, pH, temperature and flow rate
+
+        ``local`` gives central finite differences at the operating point,
+        ``morris`` the elementary effects of random trajectories and
+        ``sobol`` first-order and total indices with the Saltelli design.
+        The samples of all methods are simulated together, split across
+        processes, with common random numbers.
+
+        Args:
+            parameters: Operating point
+            fouling_status: Current fouling status
+            time_steps: Number of time steps to simulate
+            pressure_threshold: Pressure threshold for backwash
+            methods: Methods to run, from SENSITIVITY_METHODS
+            ranges: Sampled [low, high] per parameter, within the validated
+                ranges, which are the default
+            samples: Base samples of the Sobol design; it simulates
+                samples x (parameters + 2) scenarios
+            trajectories: Morris trajectories
+            replicates: Noise realizations per scenario
+            workers: Processes used to simulate the scenarios
+            seed: Seed for the samples and the shared noise
+
+        Returns:
+            Dictionary with the indices per method and output, and the
+            parameters ranked by influence on each output
+
+        Raises:
+            ValueError: If a method or range is invalid or the run is too large
+        """
+        unknown = set(methods) - set(SENSITIVITY_METHODS)
+        if unknown or not methods:
+            raise ValueError(f"Methods must be chosen from {list(SENSITIVITY_METHODS)}")
+        low, high = self._ranges(ranges)
+        width = high - low
+        dimensions = len(SENSITIVITY_PARAMETERS)
+        if seed is None:
+            # Every process must share the noise, so fix one seed per run
+            seed = int(np.random.SeedSequence().generate_state(1)[0])
+        rng = np.random.default_rng([seed, 1])
+
+        # Designs of every method, simulated in one pass
+        point = np.array([float(parameters[name]) for name in SENSITIVITY_PARAMETERS])
+        designs = {'point': point[None, :]}
+        if 'local' in methods:
+            # Steps are relative to the validated ranges, whatever is sampled
+            valid_low = np.array([PARAMETER_RANGES[name]['min'] for name in SENSITIVITY_PARAMETERS])
+            valid_high = np.array([PARAMETER_RANGES[name]['max'] for name in SENSITIVITY_PARAMETERS])
+            step = self.FINITE_DIFFERENCE_STEP * (valid_high - valid_low)
+            shifted = np.repeat(point[None, :], 2 * dimensions, axis=0)
+            diagonal = np.arange(dimensions)
+            shifted[0::2][diagonal, diagonal] = np.minimum(point + step, valid_high)
+            shifted[1::2][diagonal, diagonal] = np.maximum(point - step, valid_low)
+            designs['local'] = shifted
+        if 'morris' in methods:
+            paths = morris_trajectories(trajectories, dimensions, self.MORRIS_LEVELS, rng)
+            designs['morris'] = low + paths.reshape(-1, dimensions) * width
+        if 'sobol' in methods:
+            a = rng.random((samples, dimensions))
+            b = rng.random((samples, dimensions))
+            mixed = np.repeat(a[None], dimensions, axis=0)
+            mixed[np.arange(dimensions), :, np.arange(dimensions)] = b.T
+            designs['sobol'] = low + np.concatenate([a, b, mixed.reshape(-1, dimensions)]) * width
+
+        scenarios = sum(design.shape[0] for design in designs.values())
+        if scenarios * replicates > self.MAX_EVALUATIONS:
+            raise ValueError(f"Analysis would simulate {scenarios * replicates} trajectories, "
+                             f"more than {self.MAX_EVALUATIONS}")
+
+        values = self._evaluate(np.concatenate(list(designs.values())), fouling_status, time_steps,
+                                pressure_threshold, replicates, workers, seed)
+        results, offset = {}, 0
+        for name, design in designs.items():
+            results[name] = values[offset:offset + design.shape[0]]
+            offset += design.shape[0]
+
+        baseline = results['point'][0]
+        analysis = {
+            'operating_point': dict(zip(SENSITIVITY_PARAMETERS, point.tolist())),
+            'baseline': {output: round(float(value), 4) for output, value in zip(SENSITIVITY_OUTPUTS, baseline)},
+            'ranges': {name: [float(low[i]), float(high[i])] for i, name in enumerate(SENSITIVITY_PARAMETERS)},
+            'scenarios': int(scenarios),
+            'evaluations': int(scenarios * replicates),
+            'replicates': replicates
+        }
+        if 'local' in methods:
+            analysis['local'] = self._local(results['local'], baseline, point, designs['local'])
+        if 'morris' in methods:
+            analysis['morris'] = self._morris(results['morris'], paths)
+        if 'sobol' in methods:
+            analysis['sobol'] = self._sobol(results['sobol'], samples, rng)
+        analysis['ranking'] = self._ranking(analysis)
+        return analysis
+
+    def _ranges(self, ranges: Optional[Dict[str, Sequence[float]]]):
+        """Sampled bounds per parameter as (low, high) arrays"""
+        ranges = ranges or {}
+        unknown = set(ranges) - set(SENSITIVITY_PARAMETERS)
+        if unknown:
+            raise ValueError(f"Unknown sensitivity parameters: {sorted(unknown)}")
+
+        low, high = [], []
+        for name in SENSITIVITY_PARAMETERS:
+            spec = PARAMETER_RANGES[name]
+            bounds = ranges.get(name, (spec['min'], spec['max']))
+            if len(bounds) != 2 or not spec['min'] <= bounds[0] < bounds[1] <= spec['max']:
+                raise ValueError(f"Range of {name} must be [low, high] within "
+                                 f"[{spec['min']}, {spec['max']}]")
+            low.append(float(bounds[0]))
+            high.append(float(bounds[1]))
+        return np.array(low), np.array(high)
+
+    def _evaluate(self, samples: np.ndarray, fouling_status: str, time_steps: int,
+                  pressure_threshold: float, replicates: int, workers: int,
+                  seed: int) -> np.ndarray:
+        """Simulate the samples, split across processes when workers > 1"""
+        parts = np.array_split(samples, max(1, min(workers, samples.shape[0])))
+        arguments = [(self.model, part, fouling_status, time_steps, pressure_threshold, replicates, seed)
+                     for part in parts]
+
+        if len(parts) == 1:
+            return evaluate_scenarios(*arguments[0])
+        with ProcessPoolExecutor(max_workers=len(parts)) as pool:
+            return np.concatenate(list(pool.map(evaluate_scenarios, *zip(*arguments))))
+
+    def _local(self, values: np.ndarray, baseline: np.ndarray, point: np.ndarray,
+               design: np.ndarray) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Central differences: derivative, elasticity and effect over the validated range"""
+        diagonal = np.arange(len(SENSITIVITY_PARAMETERS))
+        spacing = design[0::2][diagonal, diagonal] - design[1::2][diagonal, diagonal]
+        derivative = (values[0::2] - values[1::2]) / spacing[:, None]
+
+        local = {}
+        for column, output in enumerate(SENSITIVITY_OUTPUTS):
+            local[output] = {}
+            for i, name in enumerate(SENSITIVITY_PARAMETERS):
+                slope = float(derivative[i, column])
+                elasticity = slope * point[i] / baseline[column] if baseline[column] != 0 else None
+                local[output][name] = {
+                    'derivative': round(slope, 6),
+                    'elasticity': None if elasticity is None else round(float(elasticity), 4),
+                    'range_effect': round(slope * (PARAMETER_RANGES[name]['max'] - PARAMETER_RANGES[name]['min']), 4)
+                }
+        return local
+
+    def _morris(self, values: np.ndarray, paths: np.ndarray) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Mean, mean absolute and standard deviation of the elementary effects, per unit range"""
+        trajectories, steps, dimensions = paths.shape
+        values = values.reshape(trajectories, steps, -1)
+        moves = np.diff(paths, axis=1)
+        # Coordinate moved at each step and the signed move
+        moved = np.abs(moves).argmax(axis=2)
+        delta = np.take_along_axis(moves, moved[:, :, None], axis=2)[:, :, 0]
+        effects = np.empty((trajectories, dimensions, values.shape[2]))
+        effects[np.arange(trajectories)[:, None], moved] = np.diff(values, axis=1) / delta[:, :, None]
+
+        morris = {}
+        for column, output in enumerate(SENSITIVITY_OUTPUTS):
+            column_effects = effects[:, :, column]
+            morris[output] = {
+                name: {
+                    'mu': round(float(column_effects[:, i].mean()), 4),
+                    'mu_star': round(float(np.abs(column_effects[:, i]).mean()), 4),
+                    'sigma': round(float(column_effects[:, i].std(ddof=1)) if trajectories > 1 else 0.0, 4)
+                }
+                for i, name in enumerate(SENSITIVITY_PARAMETERS)
+            }
+        return morris
+
+    def _sobol(self, values: np.ndarray, samples: int,
+               rng: np.random.Generator) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """First-order (Saltelli 2010) and total (Jansen) indices with bootstrap 95% intervals"""
+        dimensions = len(SENSITIVITY_PARAMETERS)
+        f_a, f_b = values[:samples], values[samples:2 * samples]
+        f_mixed = values[2 * samples:].reshape(dimensions, samples, -1)
+
+        def indices(rows):
+            a, b, mixed = f_a[rows], f_b[rows], f_mixed[:, rows]
+            variance = np.concatenate([a, b]).var(axis=0)
+            safe = np.where(variance > 0, variance, 1.0)
+            first = (b * (mixed - a)).mean(axis=1) / safe
+            total = 0.5 * ((a - mixed) ** 2).mean(axis=1) / safe
+            return np.where(variance > 0, first, 0.0), np.where(variance > 0, total, 0.0)
+
+        first, total = indices(np.arange(samples))
+        resampled = [indices(rng.integers(0, samples, samples)) for _ in range(self.BOOTSTRAP_RESAMPLES)]
+        first_conf = 1.96 * np.std([r[0] for r in resampled], axis=0)
+        total_conf = 1.96 * np.std([r[1] for r in resampled], axis=0)
+
+        return {
+            output: {
+                name: {
+                    'S1': round(float(first[i, column]), 4),
+                    'S1_conf': round(float(first_conf[i, column]), 4),
+                    'ST': round(float(total[i, column]), 4),
+                    'ST_conf': round(float(total_conf[i, column]), 4)
+                }
+                for i, name in enumerate(SENSITIVITY_PARAMETERS)
+            }
+            for column, output in enumerate(SENSITIVITY_OUTPUTS)
+        }
+
+    def _ranking(self, analysis: Dict[str, Any]) -> Dict[str, List[str]]:
+        """Parameters by influence per output: Sobol total index, else Morris mu*, else local range effect"""
+        ranking = {}
+        for output in SENSITIVITY_OUTPUTS:
+            if 'sobol' in analysis:
+                score = {name: entry['ST'] for name, entry in analysis['sobol'][output].items()}
+            elif 'morris' in analysis:
+                score = {name: entry['mu_star'] for name, entry in analysis['morris'][output].items()}
+            else:
+                score = {name: abs(entry['range_effect']) for name, entry in analysis['local'][output].items()}
+            ranking[output] = sorted(score, key=score.get, reverse=True)
+        return ranking
@@ -0,0 +1,602 @@
+import copy
+import math
+import numpy as np
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+
+def simulate_lockstep(initial_pressure: np.ndarray, trend: np.ndarray,
+                      pressure_threshold: np.ndarray, intensity_scale: np.ndarray,
+                      time_steps: int, rng: np.random.Generator,
+                      durations: Sequence[int], reference_threshold: float = 7.0,
+                      drop_factor: float = 0.5, lockout: Union[int, np.ndarray] = 4,
+                      adaptive: bool = True, noise: Optional[np.ndarray] = None,
+                      duration: Optional[np.ndarray] = None,
+                      duration_draws: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Advance N pressure trajectories in lockstep
+
+    Mirrors the step loop of ``PredictionModel.predict`` with array operations:
+    every scenario is checked against its threshold at each step, and the
+    scenarios that backwash are updated through boolean masks.
+
+    Args:
+        initial_pressure: Starting pressure per scenario, shape (N,)
+        trend: Pressure increase per step, shape (N,) or per step (time_steps, N)
+        pressure_threshold: Backwash threshold per scenario, shape (N,)
+        intensity_scale: Factor turning (pressure - reference_threshold)
+            into backwash intensity, shape (N,) or per step (time_steps, N)
+        time_steps: Number of time steps to simulate
+        rng: Random generator for the noise and backwash durations
+        durations: Backwash durations to draw from
+        reference_threshold: Threshold used for the intensity calculation
+        drop_factor: Fraction of pressure removed by a backwash
+        lockout: Steps after a backwash during which no other one starts,
+            scalar or per scenario
+        adaptive: Decay the trend by backwash effectiveness as ``predict``
+            does; ``predict_with_curves`` leaves the trend untouched
+        noise: Optional (time_steps, N) noise to use instead of drawing it,
+            e.g. to share random numbers between scenarios
+        duration: Optional fixed backwash duration per scenario, or per step
+            (time_steps, N) e.g. to share duration draws like the noise;
+            scenarios with 0 draw a duration at random
+        duration_draws: Optional (backwashes, N) durations taken in turn by
+            each scenario's backwashes, the way ``predict`` draws one per
+            backwash; needs a row for every backwash that can happen
+
+    Returns:
+        Dictionary of (N, time_steps) arrays: pressure, backwash_mask,
+        backwash_intensity and backwash_duration
+    """
+    n = initial_pressure.shape[0]
+    durations = np.asarray(durations, dtype=np.int64)
+    duration_schedule = np.ndim(duration) == 2
+    if duration is None:
+        duration_policy = None
+    else:
+        duration_policy = np.asarray(duration) if duration_schedule else np.broadcast_to(duration, (n,))
+    trend_schedule = np.ndim(trend) == 2
+    intensity_schedule = np.ndim(intensity_scale) == 2
+
+    # Step-major buffers keep each per-step write contiguous
+    pressure = np.empty((time_steps, n))
+    backwash_mask = np.zeros((time_steps, n), dtype=bool)
+    backwash_intensity = np.zeros((time_steps, n))
+    backwash_duration = np.zeros((time_steps, n), dtype=np.int64)
+
+    current = np.array(initial_pressure, dtype=float)
+    # Constant trends decay in place; schedules decay through a scale factor
+    current_trend = np.ones(n) if trend_schedule else np.array(np.broadcast_to(trend, (n,)), dtype=float)
+    last_backwash_step = np.full(n, -1, dtype=np.int64)
+    backwash_count = np.zeros(n, dtype=np.int64)
+    if noise is None:
+        noise = rng.uniform(-0.1, 0.1, size=(time_steps, n))
+
+    for i in range(time_steps):
+        pressure[i] = current
+        step_scale = np.broadcast_to(intensity_scale[i] if intensity_schedule else intensity_scale, (n,))
+
+        # Check which scenarios need a backwash
+        idx = np.flatnonzero((current >= pressure_threshold) &
+                             ((i - last_backwash_step) > lockout))
+        if idx.size:
+            at_backwash = current[idx]
+            intensity = np.round((at_backwash - reference_threshold) * step_scale[idx], 1)
+            if duration_draws is not None:
+                duration = duration_draws[backwash_count[idx], idx]
+                backwash_count[idx] += 1
+            else:
+                duration = rng.choice(durations, size=idx.size)
+            if duration_policy is not None:
+                policy = duration_policy[i, idx] if duration_schedule else duration_policy[idx]
+                duration = np.where(policy > 0, policy, duration)
+
+            backwash_mask[i, idx] = True
+            backwash_intensity[i, idx] = intensity
+            backwash_duration[i, idx] = duration
+            last_backwash_step[idx] = i
+
+            # Apply backwash effect and adjust trend based on effectiveness
+            at_backwash = at_backwash * (1 - drop_factor)
+            if adaptive:
+                effectiveness = (intensity / 10.0 + duration / 300.0) / 2.0
+                current_trend[idx] *= 0.9 - effectiveness * 0.2
+                at_backwash = np.where(effectiveness > 1.2, at_backwash * 0.95, at_backwash)
+            current[idx] = at_backwash
+
+        current += (trend[i] * current_trend if trend_schedule else current_trend) + noise[i]
+        np.maximum(current, 2.0, out=current)
+
+    return {
+        'pressure': pressure.T,
+        'backwash_mask': backwash_mask.T,
+        'backwash_intensity': backwash_intensity.T,
+        'backwash_duration': backwash_duration.T
+    }
+
+
+def fouling_rate_batch(pressure: np.ndarray) -> np.ndarray:
+    """Mean positive pressure change per row, 0.0 where there is none"""
+    changes = np.diff(pressure, axis=1)
+    positive = changes > 0
+    counts = positive.sum(axis=1)
+    totals = np.where(positive, changes, 0.0).sum(axis=1)
+    return np.divide(totals, counts, out=np.zeros(pressure.shape[0]), where=counts > 0)
+
+
+def efficiency_batch(pressure: np.ndarray, backwash_count: np.ndarray) -> np.ndarray:
+    """Row-wise equivalent of ``PredictionModel._calculate_efficiency``"""
+    time_steps = pressure.shape[1]
+    if time_steps == 0:
+        return np.zeros(pressure.shape[0])
+
+    efficiency = np.maximum(0.5, 1.0 - pressure.var(axis=1) / 10.0)
+
+    # Adjust based on backwash frequency
+    interval = np.divide(float(time_steps), backwash_count,
+                         out=np.full(pressure.shape[0], np.nan), where=backwash_count > 0)
+    efficiency = np.where(interval < 5, efficiency * 0.9, efficiency)
+    efficiency = np.where(interval > 15, efficiency * 0.95, efficiency)
+
+    return np.minimum(1.0, efficiency)
+
+
+class HistogramSketch:
+    """
+    Fixed-bin streaming quantile sketch over one or more columns
+
+    Values are counted into ``bins`` equal-width bins over [low, high];
+    values outside the range go to the edge bins while the exact minimum
+    and maximum are tracked separately. Memory depends only on the number
+    of bins and columns, not on how many values were added.
+    """
+
+    def __init__(self, low: float, high: float, bins: int, columns: int = 1):
+        self.low = float(low)
+        self.bins = int(bins)
+        self.width = max(float(high) - self.low, 1e-9) / self.bins
+        self.columns = columns
+
+        self.counts = np.zeros((columns, self.bins), dtype=np.int64)
+        self.minimum = np.full(columns, np.inf)
+        self.maximum = np.full(columns, -np.inf)
+        self.total = 0.0
+        self.n = 0
+
+    def update(self, values: np.ndarray):
+        """Add a (rows, columns) block of values (or a 1-D block for one column)"""
+        values = np.asarray(values, dtype=float).reshape(-1, self.columns)
+        if values.shape[0] == 0:
+            return
+
+        bin_index = np.clip(((values - self.low) / self.width).astype(np.int64), 0, self.bins - 1)
+        flat_index = bin_index + np.arange(self.columns) * self.bins
+        self.counts += np.bincount(flat_index.ravel(),
+                                   minlength=self.columns * self.bins).reshape(self.columns, self.bins)
+
+        np.minimum(self.minimum, values.min(axis=0), out=self.minimum)
+        np.maximum(self.maximum, values.max(axis=0), out=self.maximum)
+        self.total += values.sum()
+        self.n += values.shape[0]
+
+    def quantile(self, q: float) -> np.ndarray:
+        """Approximate q-quantile per column, interpolated within the bin"""
+        cumulative = self.counts.cumsum(axis=1)
+        target = q * cumulative[:, -1]
+
+        bin_index = np.minimum((cumulative < target[:, None]).sum(axis=1), self.bins - 1)
+        rows = np.arange(self.columns)
+        below = np.where(bin_index > 0, cumulative[rows, bin_index - 1], 0)
+        in_bin = np.maximum(self.counts[rows, bin_index], 1)
+
+        value = self.low + (bin_index + (target - below) / in_bin) * self.width
+        return np.clip(value, self.minimum, self.maximum)
+
+    def mean(self) -> float:
+        """Mean over every value added, across all columns"""
+        return self.total / max(self.n * self.columns, 1)
+
+
+def simulate_stream(initial_pressure: float, trend: float, pressure_threshold: float,
+                    intensity_scale: float, total_steps: int, chunk_size: int,
+                    rng: np.random.Generator, durations: Sequence[int],
+                    reference_threshold: float = 7.0, drop_factor: float = 0.5,
+                    lockout: int = 4) -> Iterator[Dict[str, Any]]:
+    """
+    Simulate one long trajectory and yield it in fixed-size chunks
+
+    Follows the step rule of ``PredictionModel.predict``. Between backwash
+    events pressure is a random walk floored at 2.0, so each stretch is
+    computed at once with the Lindley recursion
+    ``W_m = S_m - min(-W_0, min_{j<=m} S_j)`` over cumulative increments;
+    the Python loop only runs once per backwash and per lookahead window.
+
+    The noise is drawn chunk by chunk and the backwash durations from a
+    copy of ``rng`` advanced past all ``total_steps`` noise draws, so the
+    trajectory does not depend on ``chunk_size`` and equals drawing the
+    whole noise first as ``PredictionModel.predict`` does.
+
+    Args:
+        initial_pressure: Starting pressure
+        trend: Pressure increase per step before any backwash
+        pressure_threshold: Backwash threshold
+        intensity_scale: Backwash intensity per unit of pressure above reference_threshold
+        total_steps: Number of time steps to simulate
+        chunk_size: Steps per yielded chunk
+        rng: Random generator for the noise and backwash durations; its
+            bit generator must support ``advance``, as the default PCG64 does
+        durations: Backwash durations to draw from
+        reference_threshold: Threshold used for the intensity calculation
+        drop_factor: Fraction of pressure removed by a backwash
+        lockout: Minimum number of steps between two backwashes
+
+    Returns:
+        Iterator of dictionaries with start_step, pressure (array) and
+        backwash_points for each chunk
+    """
+    current = float(initial_pressure)
+    last_backwash_step = -1
+    window = 16
+    # Each uniform draw takes one step of the bit generator
+    duration_rng = np.random.Generator(copy.deepcopy(rng.bit_generator).advance(total_steps))
+
+    for chunk_start in range(0, total_steps, chunk_size):
+        length = min(chunk_size, total_steps - chunk_start)
+        noise = rng.uniform(-0.1, 0.1, size=length)
+        pressure = np.empty(length)
+        backwash_points = []
+        pos = 0
+
+        while pos < length:
+            size = min(window, length - pos)
+
+            # Pressure for the next `size` steps assuming no backwash
+            increments = np.cumsum(trend + noise[pos:pos + size - 1])
+            floor_offset = np.minimum(2.0 - current, np.minimum.accumulate(increments)) if size > 1 else None
+            values = np.empty(size)
+            values[0] = current
+            if size > 1:
+                values[1:] = 2.0 + increments - floor_offset
+
+            steps = chunk_start + pos + np.arange(size)
+            due = np.flatnonzero((values >= pressure_threshold) & ((steps - last_backwash_step) > lockout))
+
+            if due.size == 0:
+                pressure[pos:pos + size] = values
+                current = max(values[-1] + trend + noise[pos + size - 1], 2.0)
+                pos += size
+                window = min(window * 2, chunk_size)
+                continue
+
+            k = int(due[0])
+            pressure[pos:pos + k + 1] = values[:k + 1]
+            at_backwash = float(values[k])
+            intensity = round((at_backwash - reference_threshold) * intensity_scale, 1)
+            duration = int(durations[duration_rng.integers(len(durations))])
+            backwash_points.append({
+                'time_step': int(steps[k]),
+                'pressure': at_backwash,
+                'intensity': intensity,
+                'duration': duration,
+                'reason': 'pressure_threshold_exceeded'
+            })
+            last_backwash_step = int(steps[k])
+
+            # Apply backwash effect and adjust trend based on effectiveness
+            after_backwash = at_backwash * (1 - drop_factor)
+            effectiveness = (intensity / 10.0 + duration / 300.0) / 2.0
+            trend *= 0.9 - effectiveness * 0.2
+            if effectiveness > 1.2:
+                after_backwash *= 0.95
+
+            current = max(after_backwash + trend + noise[pos + k], 2.0)
+            pos += k + 1
+            window = max(16, 2 * (k + 1))
+
+        yield {
+            'start_step': chunk_start,
+            'pressure': pressure,
+            'backwash_points': backwash_points
+        }
+
+
+def simulate_schedule(initial_pressure: float, increments: np.ndarray, pressure_threshold: float,
+                      intensity_scale: np.ndarray, rng: np.random.Generator,
+                      durations: Sequence[int], reference_threshold: float = 7.0,
+                      drop_factor: float = 0.5,
+                      lockout: int = 4) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+    """
+    Simulate one trajectory whose per-step increments are known up front
+
+    Follows the step rule of ``PredictionModel.predict_with_curves``: after
+    step i pressure moves by ``increments[i]`` (trend plus noise), floored
+    at 2.0, and a backwash only halves the pressure without changing later
+    increments. Everything that does not depend on the pressure is computed
+    by the caller, so the loop is reduced to the backwash recurrence over
+    plain floats.
+
+    Args:
+        initial_pressure: Starting pressure
+        increments: Pressure change applied after each step
+        pressure_threshold: Backwash threshold
+        intensity_scale: Backwash intensity per unit of pressure above
+            reference_threshold, per step
+        rng: Random generator for the backwash durations
+        durations: Backwash durations to draw from
+        reference_threshold: Threshold used for the intensity calculation
+        drop_factor: Fraction of pressure removed by a backwash
+        lockout: Minimum number of steps between two backwashes
+
+    Returns:
+        Tuple of (pressure array, backwash_points)
+    """
+    pressure = []
+    backwash_points = []
+    current = float(initial_pressure)
+    last_backwash_step = -1
+    keep = 1 - drop_factor
+    scale = intensity_scale.tolist()
+    choices = [int(duration) for duration in durations]
+
+    # Duration indices are drawn in blocks, which gives the same sequence
+    # as drawing them one at a time
+    draws = []
+    drawn = 0
+
+    for i, increment in enumerate(increments.tolist()):
+        pressure.append(current)
+
+        if current >= pressure_threshold and i - last_backwash_step > lockout:
+            if drawn == len(draws):
+                draws = rng.integers(len(choices), size=256).tolist()
+                drawn = 0
+            backwash_points.append({
+                'time_step': i,
+                'pressure': current,
+                'intensity': round((current - reference_threshold) * scale[i], 1),
+                'duration': choices[draws[drawn]],
+                'reason': 'pressure_threshold_exceeded'
+            })
+            drawn += 1
+            last_backwash_step = i
+            current *= keep
+
+        current += increment
+        if current < 2.0:
+            current = 2.0
+
+    return np.array(pressure), backwash_points
+
+
+def simulate_events(initial_pressure: float, trend: float, pressure_threshold: float,
+                    intensity_scale: float, time_steps: int, duration: int,
+                    reference_threshold: float = 7.0, drop_factor: float = 0.5,
+                    lockout: int = 4) -> Tuple[List[Tuple[int, int, float, float]], List[Dict[str, Any]]]:
+    """
+    Noise-free simulation that jumps from one backwash event to the next
+
+    Without noise pressure moves linearly between backwashes (floored at
+    2.0), so the next threshold crossing allowed by the lockout is solved
+    for directly. Cost grows with the number of backwashes, not of steps.
+
+    Args:
+        initial_pressure: Starting pressure
+        trend: Pressure increase per step before any backwash
+        pressure_threshold: Backwash threshold
+        intensity_scale: Backwash intensity per unit of pressure above reference_threshold
+        time_steps: Number of time steps to simulate
+        duration: Duration of every backwash
+        reference_threshold: Threshold used for the intensity calculation
+        drop_factor: Fraction of pressure removed by a backwash
+        lockout: Minimum number of steps between two backwashes
+
+    Returns:
+        Tuple of (segments, backwash_points) where each segment is
+        (start_step, length, first_value, slope) and segments cover every
+        step in order
+    """
+    segments = []
+    backwash_points = []
+    current = float(initial_pressure)
+    step = 0
+    last_backwash_step = -1
+
+    def value_after(offset):
+        return current + offset * trend if trend > 0 else max(current + offset * trend, 2.0)
+
+    while step < time_steps:
+        earliest = max(step, last_backwash_step + lockout + 1)
+        if trend > 0:
+            # Smallest offset reaching the threshold, corrected for rounding
+            offset = max(0, math.ceil((pressure_threshold - current) / trend))
+            if offset > 0 and value_after(offset - 1) >= pressure_threshold:
+                offset -= 1
+            while value_after(offset) < pressure_threshold:
+                offset += 1
+            backwash_step = max(earliest, step + offset)
+        else:
+            # Pressure only falls until the next backwash
+            backwash_step = earliest if value_after(earliest - step) >= pressure_threshold else time_steps
+
+        end = min(backwash_step + 1, time_steps)
+        _append_segments(segments, step, end - step, current, trend)
+        if backwash_step >= time_steps:
+            break
+
+        at_backwash = value_after(backwash_step - step)
+        intensity = round((at_backwash - reference_threshold) * intensity_scale, 1)
+        backwash_points.append({
+            'time_step': backwash_step,
+            'pressure': at_backwash,
+            'intensity': intensity,
+            'duration': duration,
+            'reason': 'pressure_threshold_exceeded'
+        })
+
+        # Apply backwash effect and adjust trend based on effectiveness
+        after_backwash = at_backwash * (1 - drop_factor)
+        effectiveness = (intensity / 10.0 + duration / 300.0) / 2.0
+        trend *= 0.9 - effectiveness * 0.2
+        if effectiveness > 1.2:
+            after_backwash *= 0.95
+
+        current = max(after_backwash + trend, 2.0)
+        step = backwash_step + 1
+        last_backwash_step = backwash_step
+
+    return segments, backwash_points
+
+
+def _append_segments(segments: List[Tuple[int, int, float, float]], start: int, length: int,
+                     first: float, slope: float):
+    """Append a linear stretch, splitting it where a falling pressure hits the 2.0 floor"""
+    if length <= 0:
+        return
+    if slope < 0:
+        linear = min(length, int((first - 2.0) / -slope) + 1)
+        if first + slope * (linear - 1) < 2.0:
+            linear -= 1
+        if linear > 0:
+            segments.append((start, linear, first, slope))
+        if linear < length:
+            segments.append((start + linear, length - linear, 2.0, 0.0))
+    else:
+        segments.append((start, length, first, slope))
+
+
+def segment_chunks(segments: List[Tuple[int, int, float, float]],
+                   backwash_points: List[Dict[str, Any]], total_steps: int,
+                   chunk_size: int, materialize: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Cut an event-driven trajectory into chunks
+
+    Yields the same chunk dictionaries as ``simulate_stream``, plus the
+    segments overlapping each chunk so metrics can be folded in closed form.
+    Without ``materialize`` the chunk pressure is None.
+    """
+    segment_index = 0
+    backwash_index = 0
+    for start in range(0, total_steps, chunk_size):
+        stop = min(start + chunk_size, total_steps)
+        while segments[segment_index][0] + segments[segment_index][1] <= start:
+            segment_index += 1
+
+        pressure = np.empty(stop - start) if materialize else None
+        chunk_segments = []
+        index = segment_index
+        while index < len(segments) and segments[index][0] < stop:
+            seg_start, length, first, slope = segments[index]
+            lo, hi = max(seg_start, start), min(seg_start + length, stop)
+            if materialize:
+                pressure[lo - start:hi - start] = first + slope * np.arange(lo - seg_start, hi - seg_start)
+            chunk_segments.append((lo, hi - lo, first + slope * (lo - seg_start), slope))
+            index += 1
+
+        points = []
+        while backwash_index < len(backwash_points) and backwash_points[backwash_index]['time_step'] < stop:
+            points.append(backwash_points[backwash_index])
+            backwash_index += 1
+
+        yield {'start_step': start, 'pressure': pressure, 'backwash_points': points,
+               'segments': chunk_segments}
+
+
+class RunningMetrics:
+    """
+    Constant-memory fouling rate, variance and backwash statistics
+
+    Chunks are merged with Chan's parallel form of Welford's algorithm, so
+    the variance matches ``np.var`` over the whole trajectory without
+    keeping it.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.positive_change_sum = 0.0
+        self.positive_change_count = 0
+        self.last_value = None
+        self.backwash_count = 0
+        self.first_backwash_step = None
+        self.last_backwash_step = None
+
+    def update(self, values: np.ndarray, backwash_points: List[Dict[str, Any]]):
+        """Fold one chunk of consecutive pressure values into the metrics"""
+        if values.shape[0] == 0:
+            return
+
+        # Pressure changes, including the one across the chunk boundary
+        changes = np.diff(values) if self.last_value is None else np.diff(values, prepend=self.last_value)
+        positive = changes[changes > 0]
+        self.positive_change_sum += float(positive.sum())
+        self.positive_change_count += int(positive.shape[0])
+        self.last_value = float(values[-1])
+
+        chunk_mean = float(values.mean())
+        self._merge(values.shape[0], chunk_mean, float(((values - chunk_mean) ** 2).sum()))
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        self.record_backwashes(backwash_points)
+
+    def update_linear(self, first: float, slope: float, length: int):
+        """Fold ``length`` values first, first + slope, ... in closed form"""
+        if length <= 0:
+            return
+
+        last = first + slope * (length - 1)
+        if self.last_value is not None and first > self.last_value:
+            self.positive_change_sum += first - self.last_value
+            self.positive_change_count += 1
+        if slope > 0 and length > 1:
+            self.positive_change_sum += slope * (length - 1)
+            self.positive_change_count += length - 1
+        self.last_value = last
+
+        # An arithmetic sequence has variance slope^2 (n^2 - 1) / 12
+        self._merge(length, (first + last) / 2.0, slope * slope * length * (length * length - 1) / 12.0)
+        self.minimum = min(self.minimum, first, last)
+        self.maximum = max(self.maximum, first, last)
+
+    def record_backwashes(self, backwash_points: List[Dict[str, Any]]):
+        """Count backwash events, given in time order"""
+        if backwash_points:
+            if self.first_backwash_step is None:
+                self.first_backwash_step = backwash_points[0]['time_step']
+            self.last_backwash_step = backwash_points[-1]['time_step']
+            self.backwash_count += len(backwash_points)
+
+    def _merge(self, count: int, mean: float, m2: float):
+        """Chan et al. update of the running mean and sum of squared deviations"""
+        total = self.n + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.n * count / total
+        self.n = total
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.n if self.n else 0.0
+
+    @property
+    def fouling_rate(self) -> float:
+        """Mean positive pressure change, as ``_calculate_fouling_rate``"""
+        if not self.positive_change_count:
+            return 0.0
+        return self.positive_change_sum / self.positive_change_count
+
+    @property
+    def efficiency(self) -> float:
+        """System efficiency, as ``_calculate_efficiency``"""
+        if not self.n:
+            return 0.0
+
+        efficiency = max(0.5, 1.0 - (self.variance / 10.0))
+        if self.backwash_count > 0:
+            avg_backwash_interval = self.n / self.backwash_count
+            if avg_backwash_interval < 5:
+                efficiency *= 0.9
+            elif avg_backwash_interval > 15:
+                efficiency *= 0.95
+        return min(1.0, efficiency)
@@ -0,0 +1,219 @@
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from backend.models.prediction_model import PredictionModel
+
+SURROGATE_PARAMETERS = ('turbidity', 'ph', 'temperature', 'flow_rate', 'inlet_pressure')
+SURROGATE_FOULING_STATUSES = ('clean', 'mild', 'moderate', 'severe', 'critical')
+SURROGATE_TARGETS = ('fouling_rate', 'efficiency', 'time_to_first_backwash')
+
+# Inputs of the network: parameters, horizon, threshold and one-hot fouling status
+SURROGATE_FEATURES = SURROGATE_PARAMETERS + ('time_steps', 'pressure_threshold') + tuple(
+    f'fouling_{status}' for status in SURROGATE_FOULING_STATUSES
+)
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def summary_features(parameters: Dict[str, Any],
+                     fouling_status: Union[str, Sequence[str], np.ndarray],
+                     time_steps: Union[int, np.ndarray],
+                     pressure_threshold: Union[float, np.ndarray]) -> np.ndarray:
+    """
+    Feature matrix of the surrogate, one row per scenario
+
+    Args:
+        parameters: Water quality parameters as scalars or equal-length arrays
+        fouling_status: Fouling status, shared or per scenario
+        time_steps: Horizon, shared or per scenario
+        pressure_threshold: Backwash threshold, shared or per scenario
+
+    Returns:
+        Array of shape (n, len(SURROGATE_FEATURES))
+    """
+    columns = [np.atleast_1d(np.asarray(parameters[name], dtype=float)) for name in SURROGATE_PARAMETERS]
+    n = max(column.shape[0] for column in columns)
+    statuses = np.broadcast_to(np.asarray(fouling_status), (n,))
+    unknown = set(np.unique(statuses).tolist()) - set(SURROGATE_FOULING_STATUSES)
+    if unknown:
+        raise ValueError(f"Unknown fouling status: {', '.join(sorted(unknown))}")
+
+    features = np.empty((n, len(SURROGATE_FEATURES)))
+    for index, column in enumerate(columns):
+        features[:, index] = column
+    features[:, 5] = time_steps
+    features[:, 6] = pressure_threshold
+    for offset, status in enumerate(SURROGATE_FOULING_STATUSES):
+        features[:, 7 + offset] = statuses == status
+    return features
+
+
+class SurrogateModel(PredictionModel):
+    """
+    Learned surrogate for prediction summaries
+
+    ``predict_summary`` evaluates a small fitted network with numpy instead
+    of running the step loop; full predictions are the heuristic model's.
+    """
+
+    def __init__(self, artifact: Dict[str, Any]):
+        super().__init__()
+        if tuple(artifact['feature_names']) != SURROGATE_FEATURES:
+            raise ValueError("Surrogate artifact was trained on different features")
+
+        self.version = artifact['version']
+        # Model version whose records the surrogate was trained on
+        self.source_model_version = artifact.get('source_model_version')
+        self.metadata = {key: artifact[key] for key in ('created_at', 'records_trained', 'metrics')}
+        self._x_mean = np.asarray(artifact['x_mean'], dtype=float)
+        self._x_scale = np.asarray(artifact['x_scale'], dtype=float)
+        self._y_mean = np.asarray(artifact['y_mean'], dtype=float)
+        self._y_scale = np.asarray(artifact['y_scale'], dtype=float)
+        # Fold the input scaling into the first layer
+        weights = [np.asarray(coef, dtype=float) for coef in artifact['coefs']]
+        biases = [np.asarray(intercept, dtype=float) for intercept in artifact['intercepts']]
+        biases[0] = biases[0] - (self._x_mean / self._x_scale) @ weights[0]
+        weights[0] = weights[0] / self._x_scale[:, None]
+        self._layers = list(zip(weights, biases))
+
+    def _forward(self, features: np.ndarray) -> np.ndarray:
+        hidden = features
+        for weights, bias in self._layers[:-1]:
+            hidden = np.maximum(hidden @ weights + bias, 0.0)
+        weights, bias = self._layers[-1]
+        return (hidden @ weights + bias) * self._y_scale + self._y_mean
+
+    def predict_summary_batch(self, parameters: Dict[str, Any],
+                              fouling_status: Union[str, Sequence[str], np.ndarray] = 'clean',
+                              time_steps: Union[int, np.ndarray] = 20,
+                              pressure_threshold: Union[float, np.ndarray] = 7.0) -> Dict[str, np.ndarray]:
+        """
+        Summary metrics of many scenarios in one pass
+
+        Args:
+            parameters: Water quality parameters as equal-length arrays
+            fouling_status: Fouling status, shared or per scenario
+            time_steps: Horizon, shared or per scenario
+            pressure_threshold: Backwash threshold, shared or per scenario
+
+        Returns:
+            Dictionary of arrays keyed by SURROGATE_TARGETS
+        """
+        features = summary_features(parameters, fouling_status, time_steps, pressure_threshold)
+        outputs = self._forward(features)
+        return {
+            'fouling_rate': np.maximum(outputs[:, 0], 0.0),
+            'efficiency': np.clip(outputs[:, 1], 0.0, 1.0),
+            'time_to_first_backwash': np.clip(outputs[:, 2], 0.0, features[:, 5])
+        }
+
+    def predict_summary(self, parameters: Dict[str, float], fouling_status: str = 'clean',
+                        time_steps: int = 20, pressure_threshold: float = 7.0) -> Dict[str, float]:
+        """Summary metrics of one scenario, see ``PredictionModel.predict_summary``"""
+        if fouling_status not in SURROGATE_FOULING_STATUSES:
+            raise ValueError(f"Unknown fouling status: {fouling_status}")
+        features = [float(parameters[name]) for name in SURROGATE_PARAMETERS]
+        features += [float(time_steps), float(pressure_threshold)]
+        features += [float(status == fouling_status) for status in SURROGATE_FOULING_STATUSES]
+        fouling_rate, efficiency, first_backwash = self._forward(np.array(features)).tolist()
+        return {
+            'fouling_rate': round(max(fouling_rate, 0.0), 3),
+            'efficiency': round(min(max(efficiency, 0.0), 1.0), 3),
+            'time_to_first_backwash': round(min(max(first_backwash, 0.0), float(time_steps)), 2)
+        }
+
+
+def load_surrogate(path: str) -> SurrogateModel:
+    """Load a published surrogate artifact"""
+    import joblib
+    return SurrogateModel(joblib.load(path))
+
+
+def read_manifest(directory: str) -> Dict[str, Any]:
+    """Published surrogate versions of an artifact directory, oldest first"""
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {'latest': None, 'versions': []}
+    with open(path) as file:
+        return json.load(file)
+
+
+def latest_artifact(directory: str) -> Optional[Dict[str, Any]]:
+    """Full artifact of the latest published version, or None"""
+    import joblib
+    manifest = read_manifest(directory)
+    for entry in reversed(manifest['versions']):
+        if entry['version'] == manifest['latest']:
+            return joblib.load(os.path.join(directory, entry['artifact']))
+    return None
+
+
+def publish_artifact(directory: str, artifact: Dict[str, Any], keep: int = 5) -> Dict[str, Any]:
+    """
+    Write an artifact and add it to the manifest as the latest version
+
+    Both files are written to a temporary name and renamed into place, so
+    a reader never sees a partial artifact or manifest.
+
+    Args:
+        directory: Artifact directory
+        artifact: Artifact from ``train_surrogate``
+        keep: Versions kept; older artifacts are removed
+
+    Returns:
+        The manifest entry
+
+    Raises:
+        ValueError: If the version was already published to ``directory``
+    """
+    import joblib
+    os.makedirs(directory, exist_ok=True)
+    name = f"{artifact['version']}.joblib"
+    manifest = read_manifest(directory)
+    if (os.path.exists(os.path.join(directory, name))
+            or any(entry['version'] == artifact['version'] for entry in manifest['versions'])):
+        raise ValueError(f"Surrogate version {artifact['version']} is already published")
+    _replace_atomically(directory, name, lambda file: joblib.dump(artifact, file))
+
+    entry = {
+        'version': artifact['version'],
+        'artifact': name,
+        'created_at': artifact['created_at'],
+        'source_model_version': artifact['source_model_version'],
+        'records_trained': artifact['records_trained'],
+        'last_record_id': artifact['last_record_id'],
+        'metrics': artifact['metrics']
+    }
+    manifest['versions'].append(entry)
+    manifest['latest'] = entry['version']
+    removed, manifest['versions'] = manifest['versions'][:-keep], manifest['versions'][-keep:]
+    _replace_atomically(directory, MANIFEST_NAME,
+                        lambda file: file.write(json.dumps(manifest, indent=2).encode()))
+    for old in removed:
+        path = os.path.join(directory, old['artifact'])
+        if os.path.exists(path):
+            os.unlink(path)
+    return entry
+
+
+def _replace_atomically(directory: str, name: str, write):
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=f".{name}.")
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            write(file)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, os.path.join(directory, name))
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def new_version() -> str:
+    """Version name of a surrogate trained now, to the microsecond"""
+    return datetime.utcnow().strftime('surrogate-%Y%m%dT%H%M%S%f')
+
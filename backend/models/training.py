@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Training of the learned surrogate from stored prediction records
+
+Usage:
+    python -m backend.models.training [--artifact-dir DIR] [--model-version VERSION]
+        [--interval SECONDS] [--batch-size N] [--epochs N] [--full]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Text, select, type_coerce
+
+from backend.models.database import SessionLocal, PredictionRecord, init_db
+from backend.models.prediction_model import MODEL_VERSION
+from backend.models.surrogate import (
+    SURROGATE_FEATURES, SURROGATE_FOULING_STATUSES, SURROGATE_PARAMETERS, SURROGATE_TARGETS,
+    SurrogateModel, latest_artifact, new_version, publish_artifact, summary_features
+)
+from backend.utils.series_codec import decode_backwash_points
+
+logger = logging.getLogger(__name__)
+
+# Every HOLDOUT_MODULUS-th record (by id) is kept out of training to measure the fit
+HOLDOUT_MODULUS = 10
+
+_SELECTED = [PredictionRecord.id] + [getattr(PredictionRecord, name) for name in SURROGATE_PARAMETERS] + [
+    PredictionRecord.fouling_status, PredictionRecord.time_steps, PredictionRecord.pressure_threshold,
+    PredictionRecord.fouling_rate, PredictionRecord.efficiency, PredictionRecord.backwash_blob,
+    type_coerce(PredictionRecord.backwash_points_json, Text).label("backwash_points_text")
+]
+
+
+def _first_backwash(row) -> float:
+    if row.backwash_blob is not None:
+        points = decode_backwash_points(row.backwash_blob)
+    else:
+        points = json.loads(row.backwash_points_text or "[]")
+    return float(points[0]['time_step'] if points else row.time_steps)
+
+
+def iter_training_chunks(db, model_version: str, after_id: int = 0,
+                         batch_size: int = 5000) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Read records of one model version after ``after_id`` in id order, ``batch_size`` at a time
+
+    Args:
+        db: Database session
+        model_version: Only records predicted by this model version
+        after_id: Only records with a larger id
+        batch_size: Rows per chunk
+
+    Yields:
+        Tuples of (ids, features, targets), features per
+        SURROGATE_FEATURES and targets per SURROGATE_TARGETS
+    """
+    last_id = after_id
+    while True:
+        rows = db.execute(
+            select(*_SELECTED)
+            .where(PredictionRecord.model_version == model_version, PredictionRecord.id > last_id)
+            .order_by(PredictionRecord.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+
+        # Records of fouling statuses the surrogate does not know are skipped
+        columns = list(zip(*rows))
+        statuses = np.asarray(columns[6])
+        known = np.isin(statuses, SURROGATE_FOULING_STATUSES)
+        ids = np.asarray(columns[0], dtype=np.int64)[known]
+        features = summary_features(
+            {name: np.asarray(columns[1 + index], dtype=float)[known]
+             for index, name in enumerate(SURROGATE_PARAMETERS)},
+            statuses[known],
+            np.asarray(columns[7], dtype=float)[known],
+            np.asarray(columns[8], dtype=float)[known]
+        )
+        targets = np.column_stack([
+            np.asarray(columns[9], dtype=float),
+            np.asarray(columns[10], dtype=float),
+            [_first_backwash(row) for row in rows]
+        ])[known]
+        yield ids, features, targets
+
+
+def train_surrogate(db, model_version: str = MODEL_VERSION, previous: Optional[Dict[str, Any]] = None,
+                    batch_size: int = 5000,
+                    epochs: int = 3, hidden_layers: Tuple[int, ...] = (32, 32),
+                    seed: int = 0) -> Optional[Dict[str, Any]]:
+    """
+    Fit the surrogate network on stored records with ``partial_fit``
+
+    Records are streamed from the database in chunks for every epoch, so
+    memory use depends on ``batch_size``, not on the table size. Given a
+    previous artifact, training continues from its network on the records
+    added since, keeping its scaling. Holdout records are never trained on
+    and give the reported metrics. Only records of ``model_version`` are
+    read, so the surrogate imitates that one model.
+
+    Args:
+        db: Database session
+        model_version: Model version whose records are trained on
+        previous: Artifact to continue from, or None to start over; it
+            must have been trained on the same model version
+        batch_size: Records read per chunk
+        epochs: Passes over the new records
+        hidden_layers: Hidden layer sizes of a new network
+        seed: Random seed for initialization and shuffling
+
+    Returns:
+        The new artifact, or None if there are no new records
+    """
+    from sklearn.neural_network import MLPRegressor
+    from sklearn.preprocessing import StandardScaler
+
+    if previous and previous.get('source_model_version') != model_version:
+        raise ValueError(f"Artifact {previous['version']} was trained on records of "
+                         f"{previous.get('source_model_version')}, not {model_version}")
+    after_id = previous['last_record_id'] if previous else 0
+    rng = np.random.default_rng(seed)
+
+    if previous:
+        estimator = previous['estimator']
+        x_scaler, y_scaler = previous['x_scaler'], previous['y_scaler']
+    else:
+        # One pass for the scaling, so later runs see the same inputs
+        x_scaler, y_scaler = StandardScaler(), StandardScaler()
+        for ids, features, targets in iter_training_chunks(db, model_version, after_id, batch_size):
+            train = ids % HOLDOUT_MODULUS != 0
+            if train.any():
+                x_scaler.partial_fit(features[train])
+                y_scaler.partial_fit(targets[train])
+        if not hasattr(x_scaler, 'mean_'):
+            return None
+        estimator = MLPRegressor(hidden_layer_sizes=hidden_layers, learning_rate_init=1e-3,
+                                 random_state=seed)
+
+    trained = 0
+    last_id = after_id
+    for epoch in range(epochs):
+        for ids, features, targets in iter_training_chunks(db, model_version, after_id, batch_size):
+            last_id = max(last_id, int(ids[-1])) if ids.size else last_id
+            train = ids % HOLDOUT_MODULUS != 0
+            if not train.any():
+                continue
+            order = rng.permutation(np.count_nonzero(train))
+            estimator.partial_fit(x_scaler.transform(features[train][order]),
+                                  y_scaler.transform(targets[train][order]))
+            if epoch == 0:
+                trained += int(train.sum())
+    if trained == 0:
+        return None
+
+    artifact = {
+        'version': new_version(),
+        'created_at': datetime.utcnow().isoformat(),
+        'feature_names': list(SURROGATE_FEATURES),
+        'target_names': list(SURROGATE_TARGETS),
+        'x_mean': x_scaler.mean_, 'x_scale': x_scaler.scale_,
+        'y_mean': y_scaler.mean_, 'y_scale': y_scaler.scale_,
+        'coefs': estimator.coefs_, 'intercepts': estimator.intercepts_,
+        'source_model_version': model_version,
+        'records_trained': trained + (previous['records_trained'] if previous else 0),
+        'last_record_id': last_id,
+        'metrics': None,
+        # Kept to continue training; inference only needs the arrays above
+        'estimator': estimator, 'x_scaler': x_scaler, 'y_scaler': y_scaler
+    }
+    artifact['metrics'] = holdout_metrics(db, artifact, after_id, batch_size)
+    return artifact
+
+
+def holdout_metrics(db, artifact: Dict[str, Any], after_id: int = 0,
+                    batch_size: int = 5000) -> Dict[str, Dict[str, float]]:
+    """
+    Mean absolute error and R² per target on the holdout records after ``after_id``
+
+    Only records of the model version the artifact was trained on count.
+    """
+    model = SurrogateModel(artifact)
+    count = 0
+    absolute = np.zeros(len(SURROGATE_TARGETS))
+    squared = np.zeros(len(SURROGATE_TARGETS))
+    total = np.zeros(len(SURROGATE_TARGETS))
+    total_squared = np.zeros(len(SURROGATE_TARGETS))
+    for ids, features, targets in iter_training_chunks(db, artifact['source_model_version'], after_id,
+                                                       batch_size):
+        holdout = ids % HOLDOUT_MODULUS == 0
+        if not holdout.any():
+            continue
+        errors = model._forward(features[holdout]) - targets[holdout]
+        count += int(holdout.sum())
+        absolute += np.abs(errors).sum(axis=0)
+        squared += (errors ** 2).sum(axis=0)
+        total += targets[holdout].sum(axis=0)
+        total_squared += (targets[holdout] ** 2).sum(axis=0)
+
+    if count == 0:
+        return {}
+    variance = total_squared / count - (total / count) ** 2
+    r2 = np.where(variance > 0, 1.0 - (squared / count) / np.where(variance > 0, variance, 1.0), 0.0)
+    return {
+        target: {'mae': round(float(absolute[index] / count), 4), 'r2': round(float(r2[index]), 4),
+                 'records': count}
+        for index, target in enumerate(SURROGATE_TARGETS)
+    }
+
+
+def run_training(artifact_dir: str, model_version: str = MODEL_VERSION, batch_size: int = 5000,
+                 epochs: int = 3, full: bool = False, keep: int = 5) -> Optional[Dict[str, Any]]:
+    """
+    Train on the records added since the latest artifact and publish the result
+
+    The latest artifact is only continued if it was trained on the same
+    model version; otherwise training starts over.
+
+    Args:
+        artifact_dir: Directory holding the artifacts and their manifest
+        model_version: Model version whose records are trained on
+        batch_size: Records read per chunk
+        epochs: Passes over the records
+        full: Start over from all records instead of continuing
+        keep: Published versions kept
+
+    Returns:
+        Manifest entry of the published version, or None if there was
+        nothing new to train on
+    """
+    previous = None if full else latest_artifact(artifact_dir)
+    if previous and previous.get('source_model_version') != model_version:
+        previous = None
+    db = SessionLocal()
+    try:
+        artifact = train_surrogate(db, model_version, previous, batch_size=batch_size, epochs=epochs)
+    finally:
+        db.close()
+    if artifact is None:
+        return None
+    return publish_artifact(artifact_dir, artifact, keep=keep)
+
+
+class TrainingScheduler:
+    """
+    Scheduled surrogate training in a separate process
+
+    The API starts this module's command line as a child process that
+    retrains every ``interval`` seconds, and polls the artifact directory
+    every ``poll_seconds`` to register newly published versions. With
+    several API processes, run the trainer once as its own service and
+    leave ``interval`` at 0, so only the polling runs.
+    """
+
+    def __init__(self, registry, interval: float = 0, poll_seconds: float = 30.0, epochs: int = 3,
+                 model_version: str = MODEL_VERSION):
+        self.registry = registry
+        self.interval = interval
+        self.poll_seconds = poll_seconds
+        self.epochs = epochs
+        self.model_version = model_version
+
+        self._process: Optional[subprocess.Popen] = None
+        self._task: Optional[asyncio.Task] = None
+        self.synced = 0
+
+    @classmethod
+    def from_env(cls, registry) -> "TrainingScheduler":
+        """
+        Build a scheduler from SURROGATE_TRAIN_INTERVAL, SURROGATE_POLL_SECONDS,
+        SURROGATE_EPOCHS and SURROGATE_MODEL_VERSION
+        """
+        return cls(
+            registry,
+            interval=float(os.getenv("SURROGATE_TRAIN_INTERVAL", "0")),
+            poll_seconds=float(os.getenv("SURROGATE_POLL_SECONDS", "30")),
+            epochs=int(os.getenv("SURROGATE_EPOCHS", "3")),
+            model_version=os.getenv("SURROGATE_MODEL_VERSION", MODEL_VERSION)
+        )
+
+    def start(self):
+        """Start the training process and the polling task on the running event loop"""
+        if self.interval > 0 and self._process is None:
+            self._process = subprocess.Popen([
+                sys.executable, "-m", "backend.models.training",
+                "--artifact-dir", self.registry.artifact_dir, "--model-version", self.model_version,
+                "--interval", str(self.interval), "--epochs", str(self.epochs)
+            ])
+        if self.poll_seconds > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._poll())
+
+    async def stop(self):
+        """Stop polling and terminate the training process"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._process is not None:
+            self._process.terminate()
+            await asyncio.get_running_loop().run_in_executor(None, self._process.wait)
+            self._process = None
+
+    async def _poll(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                # Loading the new artifact happens off the event loop
+                added = await loop.run_in_executor(None, self.registry.sync_artifacts)
+            except Exception:
+                logger.exception("Failed to sync surrogate artifacts")
+                continue
+            if added:
+                self.synced += len(added)
+                logger.info("Registered surrogate versions %s", ", ".join(added))
+
+    def stats(self) -> Dict[str, Any]:
+        """Scheduler configuration and the current surrogate version"""
+        return {
+            "training_process": self._process is not None and self._process.poll() is None,
+            "interval": self.interval,
+            "poll_seconds": self.poll_seconds,
+            "synced": self.synced,
+            "model_version": self.model_version,
+            "surrogate_version": self.registry.surrogate_version,
+            "surrogate_source_version": self.registry.surrogate_source_version
+        }
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Train the UF Backwash surrogate model")
+    parser.add_argument("--artifact-dir", default=os.getenv("MODEL_ARTIFACT_DIR", "./model_artifacts"),
+                        help="Directory the artifacts are published to")
+    parser.add_argument("--model-version", default=os.getenv("SURROGATE_MODEL_VERSION", MODEL_VERSION),
+                        help="Model version whose prediction records are trained on")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="Seconds between training runs; 0 trains once")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Records read at a time")
+    parser.add_argument("--epochs", type=int, default=3, help="Passes over the new records")
+    parser.add_argument("--full", action="store_true", help="Retrain from all records")
+    parser.add_argument("--keep", type=int, default=5, help="Published versions kept")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    init_db()
+    full = args.full
+    while True:
+        started = time.monotonic()
+        try:
+            entry = run_training(args.artifact_dir, args.model_version, batch_size=args.batch_size,
+                                 epochs=args.epochs, full=full, keep=args.keep)
+            full = False
+            if entry is None:
+                logger.info("No new prediction records to train on")
+            else:
+                logger.info("Published %s, trained on %d records of %s: %s", entry['version'],
+                            entry['records_trained'], entry['source_model_version'], entry['metrics'])
+        except Exception:
+            if not args.interval:
+                raise
+            logger.exception("Surrogate training failed")
+        if not args.interval:
+            break
+        time.sleep(max(args.interval - (time.monotonic() - started), 0))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,29 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, ConfigDict, Field, confloat, conint, model_validator
+from pydantic_core import PydanticCustomError
+from typing import List, Dict, Any, Literal, Optional, Union
 from datetime import datetime
 
+from backend.utils.validators import PARAMETER_RANGES, validate_curves, validate_parameter_batch
+
+# Longest curve, and horizon, of an advanced prediction
+MAX_CURVE_STEPS = 100000
+
+# Most candidate values per policy axis of an optimization
+MAX_POLICY_VALUES = 100
+
+def parameter_field(name: str, required: bool = True):
+    """Field of a water quality parameter with its range from PARAMETER_RANGES"""
+    spec = PARAMETER_RANGES[name]
+    return Field(... if required else spec['default'], ge=spec['min'], le=spec['max'],
+                 description=spec['description'])
+
 class Parameters(BaseModel):
     """Water quality and operational parameters"""
-    turbidity: float = Field(..., ge=0.0, le=2.0, description="Turbidity in NTU")
-    ph: float = Field(..., ge=4.0, le=10.0, description="pH value")
-    temperature: float = Field(..., ge=15.0, le=35.0, description="Temperature in °C")
-    flow_rate: float = Field(..., ge=10.0, le=50.0, description="Flow rate in GPM")
-    inlet_pressure: float = Field(..., ge=20.0, le=80.0, description="Inlet pressure in PSIG")
+    turbidity: float = parameter_field('turbidity')
+    ph: float = parameter_field('ph')
+    temperature: float = parameter_field('temperature')
+    flow_rate: float = parameter_field('flow_rate')
+    inlet_pressure: float = parameter_field('inlet_pressure')
 
 class BackwashPoint(BaseModel):
     """Backwash point information"""
@@ -29,10 +44,58 @@ class PredictionData(BaseModel):
 
 class PredictionRequest(BaseModel):
     """Prediction request model"""
+    model_config = ConfigDict(protected_namespaces=())
+
     parameters: Parameters = Field(..., description="Water quality parameters")
     fouling_status: str = Field(..., description="Fouling status")
     time_steps: int = Field(default=20, ge=1, le=50, description="Number of time steps")
     pressure_threshold: float = Field(default=7.0, description="Pressure threshold for backwash")
+    seed: Optional[int] = Field(None, ge=0, description="Random seed; seeded predictions are reproducible and cached")
+    engine: Literal["stepwise", "event"] = Field(default="stepwise", description="Simulation engine; 'event' is the noise-free expected-value engine")
+    model_version: Optional[str] = Field(None, description="Registered model version; the default when not given")
+
+class ColumnarParameters(BaseModel):
+    """
+    Water quality and operational parameters, one list entry per scenario
+    
+    Ranges are checked for all columns at once with
+    ``validate_parameter_batch``, not per element.
+    """
+    turbidity: List[float] = Field(..., description=PARAMETER_RANGES['turbidity']['description'])
+    ph: List[float] = Field(..., description=PARAMETER_RANGES['ph']['description'])
+    temperature: List[float] = Field(..., description=PARAMETER_RANGES['temperature']['description'])
+    flow_rate: List[float] = Field(..., description=PARAMETER_RANGES['flow_rate']['description'])
+    inlet_pressure: List[float] = Field(..., description=PARAMETER_RANGES['inlet_pressure']['description'])
+
+    @model_validator(mode="after")
+    def check_ranges(self):
+        result = validate_parameter_batch({name: getattr(self, name) for name in PARAMETER_RANGES})
+        if not result['valid']:
+            raise PydanticCustomError(
+                'parameter_range', '{error}',
+                {'error': result['error'], 'violations': result['violations'],
+                 'ranges': result.get('ranges', {})}
+            )
+        return self
+
+class ColumnarPredictionRequest(BaseModel):
+    """Batch prediction request in columnar form"""
+    parameters: ColumnarParameters = Field(..., description="Water quality parameters per scenario")
+    fouling_status: Union[str, List[str]] = Field(..., description="Fouling status, shared or per scenario")
+    time_steps: int = Field(default=20, ge=1, le=50, description="Number of time steps")
+    pressure_threshold: Union[float, List[float]] = Field(default=7.0, description="Pressure threshold, shared or per scenario")
+    seed: Optional[int] = Field(None, ge=0, description="Random seed for the whole batch; rows do not match single predictions with this seed")
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        lengths = {len(getattr(self.parameters, name)) for name in ColumnarParameters.model_fields}
+        if isinstance(self.fouling_status, list):
+            lengths.add(len(self.fouling_status))
+        if isinstance(self.pressure_threshold, list):
+            lengths.add(len(self.pressure_threshold))
+        if len(lengths) != 1:
+            raise ValueError("All per-scenario columns must have the same length")
+        return self
 
 class PredictionResponse(BaseModel):
     """Prediction response model"""
@@ -42,16 +105,151 @@ class PredictionResponse(BaseModel):
 
 class CurveData(BaseModel):
     """Curve data for advanced predictions"""
-    turbidity_curve: Optional[List[float]] = Field(None, description="Turbidity curve over time")
-    ph_curve: Optional[List[float]] = Field(None, description="pH curve over time")
-    temperature_curve: Optional[List[float]] = Field(None, description="Temperature curve over time")
+    turbidity_curve: Optional[List[float]] = Field(None, max_length=MAX_CURVE_STEPS, description="Turbidity curve over time")
+    ph_curve: Optional[List[float]] = Field(None, max_length=MAX_CURVE_STEPS, description="pH curve over time")
+    temperature_curve: Optional[List[float]] = Field(None, max_length=MAX_CURVE_STEPS, description="Temperature curve over time")
+
+    @model_validator(mode="after")
+    def check_ranges(self):
+        result = validate_curves(self.model_dump(exclude_none=True))
+        if not result['valid']:
+            raise PydanticCustomError(
+                'parameter_range', '{error}',
+                {'error': result['error'], 'violations': result['violations'], 'ranges': result['ranges']}
+            )
+        return self
 
 class AdvancedPredictionRequest(BaseModel):
     """Advanced prediction request with curve data"""
+    model_config = ConfigDict(protected_namespaces=())
+
     parameters: Parameters = Field(..., description="Base water quality parameters")
     curve_data: Optional[CurveData] = Field(None, description="Curve data for time-varying parameters")
+    series_id: Optional[int] = Field(None, description="Stored sensor series supplying the curves not given in curve_data")
+    series_start: Optional[datetime] = Field(None, description="Time of the first step within the stored series")
+    fouling_status: str = Field(default="clean", description="Fouling status")
+    time_steps: int = Field(default=20, ge=1, le=MAX_CURVE_STEPS, description="Number of time steps")
+    seed: Optional[int] = Field(None, ge=0, description="Random seed; seeded predictions are reproducible and cached")
+    model_version: Optional[str] = Field(None, description="Registered model version; the default when not given")
+
+class EnsemblePredictionRequest(BaseModel):
+    """Monte Carlo ensemble prediction request"""
+    model_config = ConfigDict(protected_namespaces=())
+
+    parameters: Parameters = Field(..., description="Water quality parameters")
     fouling_status: str = Field(default="clean", description="Fouling status")
     time_steps: int = Field(default=20, ge=1, le=50, description="Number of time steps")
+    pressure_threshold: float = Field(default=7.0, description="Pressure threshold for backwash (ignored with curve data)")
+    realizations: int = Field(default=1000, ge=1, le=100000, description="Number of noisy realizations")
+    curve_data: Optional[CurveData] = Field(None, description="Curve data for time-varying parameters")
+    series_id: Optional[int] = Field(None, description="Stored sensor series supplying the curves not given in curve_data")
+    series_start: Optional[datetime] = Field(None, description="Time of the first step within the stored series")
+    seed: Optional[int] = Field(None, ge=0, description="Random seed; seeded ensembles are reproducible and cached")
+    model_version: Optional[str] = Field(None, description="Registered model version; the default when not given")
+
+class LongHorizonRequest(BaseModel):
+    """Long-horizon streaming simulation request"""
+    model_config = ConfigDict(protected_namespaces=())
+
+    parameters: Parameters = Field(..., description="Water quality parameters")
+    fouling_status: str = Field(default="clean", description="Fouling status")
+    total_steps: int = Field(default=100000, ge=1, le=100000000, description="Number of time steps")
+    chunk_size: int = Field(default=4096, ge=16, le=65536, description="Time steps per streamed chunk")
+    pressure_threshold: float = Field(default=7.0, description="Pressure threshold for backwash")
+    include_pressure: bool = Field(default=True, description="Stream pressure values, not only backwash points")
+    seed: Optional[int] = Field(None, ge=0, description="Random seed")
+    engine: Literal["stepwise", "event"] = Field(default="stepwise", description="Simulation engine; 'event' is the noise-free expected-value engine")
+    model_version: Optional[str] = Field(None, description="Registered model version; the default when not given")
+
+class SensorReading(BaseModel):
+    """One live sensor reading of a UF train"""
+    turbidity: float = parameter_field('turbidity')
+    ph: float = parameter_field('ph')
+    temperature: float = parameter_field('temperature')
+    flow_rate: float = parameter_field('flow_rate', required=False)
+    inlet_pressure: float = parameter_field('inlet_pressure', required=False)
+    pressure: Optional[float] = Field(None, ge=0.0, description="Measured membrane pressure; replaces the simulated value")
+    fouling_status: Optional[str] = Field(None, description="Fouling status from this reading on")
+
+class OptimizationRequest(BaseModel):
+    """Backwash policy optimization request"""
+    model_config = ConfigDict(protected_namespaces=())
+
+    parameters: Parameters = Field(..., description="Water quality parameters")
+    fouling_status: str = Field(default="clean", description="Fouling status")
+    time_steps: int = Field(default=20, ge=1, le=50, description="Number of time steps")
+    thresholds: Optional[List[confloat(ge=1.0, le=15.0)]] = Field(None, min_length=1, max_length=MAX_POLICY_VALUES, description="Candidate pressure thresholds")
+    durations: Optional[List[conint(ge=0, le=3600)]] = Field(None, min_length=1, max_length=MAX_POLICY_VALUES, description="Candidate backwash durations in seconds, 0 for random")
+    lockouts: Optional[List[conint(ge=0)]] = Field(None, min_length=1, max_length=MAX_POLICY_VALUES, description="Candidate lockout windows in steps, at most time_steps")
+    replicates: int = Field(default=32, ge=1, le=1000, description="Noise realizations per candidate")
+    cost_weights: Optional[Dict[str, float]] = Field(None, description="Weights for efficiency, backwash_count and backwash_seconds")
+    prune: bool = Field(default=True, description="Screen out dominated candidates before the full evaluation")
+    workers: int = Field(default=1, ge=1, le=32, description="Processes used to evaluate candidates, at most the prediction pool's workers")
+    seed: Optional[int] = Field(None, ge=0, description="Random seed for the shared noise")
+    model_version: Optional[str] = Field(None, description="Registered model version; the default when not given")
+
+    @model_validator(mode="after")
+    def check_lockouts(self):
+        if self.lockouts and max(self.lockouts) > self.time_steps:
+            raise ValueError(f"Lockout windows must not exceed time_steps ({self.time_steps})")
+        return self
+
+class SensitivityRequest(BaseModel):
+    """Sensitivity analysis request"""
+    model_config = ConfigDict(protected_namespaces=())
+
+    parameters: Parameters = Field(..., description="Operating point of the local analysis")
+    fouling_status: str = Field(default="clean", description="Fouling status")
+    time_steps: int = Field(default=20, ge=1, le=50, description="Number of time steps")
+    pressure_threshold: float = Field(default=7.0, description="Pressure threshold for backwash")
+    methods: List[Literal["local", "morris", "sobol"]] = Field(default=["local", "morris", "sobol"], min_length=1, description="Analyses to run")
+    ranges: Optional[Dict[str, List[float]]] = Field(None, description="Sampled [low, high] per parameter; the validated ranges by default")
+    samples: int = Field(default=4096, ge=16, le=65536, description="Base samples of the Sobol design")
+    trajectories: int = Field(default=64, ge=2, le=4096, description="Morris trajectories")
+    replicates: int = Field(default=4, ge=1, le=256, description="Noise realizations per scenario")
+    workers: int = Field(default=1, ge=1, le=32, description="Processes used to simulate the scenarios, at most the prediction pool's workers")
+    seed: Optional[int] = Field(None, ge=0, description="Random seed for the samples and the shared noise")
+    model_version: Optional[str] = Field(None, description="Registered model version; the default when not given")
+
+class FleetTrain(BaseModel):
+    """One UF train of a fleet simulation"""
+    parameters: Parameters = Field(..., description="Water quality parameters")
+    fouling_status: str = Field(default="clean", description="Fouling status")
+    pressure_threshold: float = Field(default=7.0, description="Pressure threshold for backwash")
+
+class FleetSimulationRequest(BaseModel):
+    """Fleet simulation request"""
+    model_config = ConfigDict(protected_namespaces=())
+
+    trains: List[FleetTrain] = Field(..., min_length=1, max_length=5000, description="Trains of the plant")
+    time_steps: int = Field(default=10000, ge=1, le=100000, description="Number of time steps")
+    backwash_capacity: int = Field(default=1, ge=1, description="Trains that can backwash at the same time")
+    step_seconds: float = Field(default=60.0, gt=0, description="Length of a time step; backwashes hold a slot for their duration")
+    policy: Literal["fifo", "pressure"] = Field(default="fifo", description="Queue order when capacity is exhausted")
+    include_series: bool = Field(default=True, description="Include plant-level series per step")
+    seed: Optional[int] = Field(None, ge=0, description="Random seed")
+    model_version: Optional[str] = Field(None, description="Registered model version; the default when not given")
+
+class SummaryRequest(BaseModel):
+    """Summary prediction request"""
+    model_config = ConfigDict(protected_namespaces=())
+
+    parameters: Parameters = Field(..., description="Water quality parameters")
+    fouling_status: Literal["clean", "mild", "moderate", "severe", "critical"] = Field(default="clean", description="Fouling status")
+    time_steps: int = Field(default=20, ge=1, le=50, description="Number of time steps")
+    pressure_threshold: float = Field(default=7.0, description="Pressure threshold for backwash")
+    model_version: Optional[str] = Field(None, description="Registered model version; the latest surrogate when not given")
+
+class ModelRegistration(BaseModel):
+    """Calibrated variant of the heuristic model to register"""
+    version: str = Field(..., min_length=1, max_length=64, description="New model version")
+    overrides: Dict[str, Any] = Field(..., description="PRESSURE_THRESHOLD, PRESSURE_DROP_FACTOR, BACKWASH_DURATIONS or FOULING_FACTORS")
+    description: str = Field(default="", description="Description of the variant")
+    make_default: bool = Field(default=False, description="Also make it the default version")
+
+class DefaultModelUpdate(BaseModel):
+    """New default model version"""
+    version: str = Field(..., description="Registered model version")
 
 class HistoryRecord(BaseModel):
     """Historical prediction record"""
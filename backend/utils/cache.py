@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def _canonical_default(value: Any) -> str:
+    """JSON fallback for cache keys; arrays are keyed by dtype and content"""
+    if hasattr(value, 'tobytes') and hasattr(value, 'dtype'):
+        return f"{value.dtype.str}:{hashlib.sha256(value.tobytes()).hexdigest()}"
+    return str(value)
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache with expiry for seeded prediction results
+
+    Entries are sized by their JSON encoding; the least recently used ones
+    are evicted once ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 300.0):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> "PredictionCache":
+        """Build a cache from PREDICTION_CACHE_MAX_BYTES and PREDICTION_CACHE_TTL"""
+        return cls(
+            max_bytes=int(os.getenv("PREDICTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            ttl_seconds=float(os.getenv("PREDICTION_CACHE_TTL", "300"))
+        )
+
+    @staticmethod
+    def make_key(kind: str, request: Dict[str, Any]) -> str:
+        """
+        Canonicalize a request into a cache key
+
+        Args:
+            kind: Prediction kind, e.g. the endpoint name
+            request: Request fields, including the seed
+
+        Returns:
+            Hex digest of the canonical JSON encoding
+        """
+        canonical = json.dumps(request, sort_keys=True, separators=(',', ':'), default=_canonical_default)
+        return hashlib.sha256(f"{kind}:{canonical}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for ``key`` or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Any):
+        """Store ``value`` under ``key``, evicting old entries to stay within max_bytes"""
+        size = len(json.dumps(value, separators=(',', ':'), default=str))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, size, time.monotonic() + self.ttl_seconds)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache size and hit/miss/eviction counters"""
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
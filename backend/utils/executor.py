@@ -0,0 +1,179 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.models.prediction_model import PredictionModel
+from backend.models.registry import ModelRegistry, warm_model
+
+# Each worker thread or process keeps its own model instance per version
+_worker_state = threading.local()
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when the prediction pool cannot accept more work"""
+
+
+def _init_worker(specs: List[Tuple[str, Callable[[], Any]]]):
+    """Load and warm up the worker's model of every registered version"""
+    _worker_state.models = {version: warm_model(factory()) for version, factory in specs}
+
+
+def _worker_ready() -> bool:
+    """No-op task used to start workers ahead of the first request"""
+    return True
+
+
+def _call_with_model(fn: Callable, args: tuple, kwargs: Dict[str, Any],
+                     version: str, factory: Callable[[], Any]) -> Any:
+    """Run ``fn`` with the worker's model of ``version`` as first argument"""
+    models = getattr(_worker_state, 'models', None)
+    if models is None:
+        models = _worker_state.models = {}
+    model = models.get(version)
+    if model is None:
+        # Registered after the worker started
+        model = models[version] = warm_model(factory())
+    return fn(model, *args, **kwargs)
+
+
+def call_model_method(model: PredictionModel, method: str, **kwargs) -> Any:
+    """Call a PredictionModel method by name inside a worker"""
+    return getattr(model, method)(**kwargs)
+
+
+class PredictionExecutor:
+    """
+    Bounded pool that runs CPU-bound simulations off the event loop
+
+    Work is admitted while fewer than ``max_workers + max_queue`` tasks are
+    in flight; beyond that, ``run`` raises ExecutorSaturatedError so the API
+    can refuse the request instead of queueing it indefinitely.
+    """
+
+    BACKENDS = ('thread', 'process')
+
+    def __init__(self, backend: str = 'thread', max_workers: Optional[int] = None,
+                 max_queue: Optional[int] = None, registry: Optional[ModelRegistry] = None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown executor backend: {backend}")
+
+        self.backend = backend
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = self.max_workers * 4 if max_queue is None else max_queue
+        self.registry = registry or ModelRegistry()
+
+        self._pool: Optional[Executor] = None
+        self._in_flight = 0
+        self._slot_freed: Optional[asyncio.Condition] = None
+        self.completed = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls, registry: Optional[ModelRegistry] = None) -> "PredictionExecutor":
+        """Build an executor from PREDICTION_EXECUTOR, PREDICTION_WORKERS and PREDICTION_MAX_QUEUE"""
+        max_workers = os.getenv("PREDICTION_WORKERS")
+        max_queue = os.getenv("PREDICTION_MAX_QUEUE")
+        return cls(
+            backend=os.getenv("PREDICTION_EXECUTOR", "thread").lower(),
+            max_workers=int(max_workers) if max_workers else None,
+            max_queue=int(max_queue) if max_queue else None,
+            registry=registry
+        )
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def saturated(self) -> bool:
+        return self._in_flight >= self.capacity
+
+    def fan_out(self, workers: int) -> int:
+        """Processes one task may split its work across: ``workers``, at most ``max_workers``"""
+        return max(1, min(workers, self.max_workers))
+
+    def start(self):
+        """Create the pool and start every worker with warm models of the registered versions"""
+        if self._pool is not None:
+            return
+
+        pool_class = ProcessPoolExecutor if self.backend == 'process' else ThreadPoolExecutor
+        self._pool = pool_class(max_workers=self.max_workers, initializer=_init_worker,
+                                initargs=(self.registry.specs(),))
+
+        # Submitting one task per worker makes the pool start all of them now
+        warm_up = [self._pool.submit(_worker_ready) for _ in range(self.max_workers)]
+        for future in warm_up:
+            future.result()
+
+    def shutdown(self):
+        """Stop the pool, waiting for running simulations"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def check_capacity(self, slots: int = 1):
+        """Raise ExecutorSaturatedError if ``slots`` more tasks cannot be admitted"""
+        if self._in_flight + slots > self.capacity:
+            self.rejected += 1
+            raise ExecutorSaturatedError(
+                f"Prediction pool is saturated ({self._in_flight} tasks in flight)"
+            )
+
+    async def run(self, fn: Callable, *args, wait: bool = False,
+                  model_version: Optional[str] = None, slots: int = 1, **kwargs) -> Any:
+        """
+        Run ``fn(model, *args, **kwargs)`` on a pool worker
+
+        Args:
+            fn: Module-level function taking the worker's model first
+            wait: Wait for a free slot instead of raising when saturated
+            model_version: Registered model version, the default when None
+            slots: In-flight tasks the call counts as, e.g. the processes
+                it fans out to
+
+        Returns:
+            The function's return value
+
+        Raises:
+            UnknownModelError: If the version is not registered
+        """
+        version = self.registry.resolve(model_version)
+        factory = self.registry.factory(version)
+
+        if self._slot_freed is None:
+            self._slot_freed = asyncio.Condition()
+
+        if wait:
+            async with self._slot_freed:
+                await self._slot_freed.wait_for(lambda: self._in_flight + slots <= self.capacity)
+        else:
+            self.check_capacity(slots)
+
+        self.start()
+        self._in_flight += slots
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._pool, _call_with_model, fn, args, kwargs,
+                                                version, factory)
+            self.completed += 1
+            return result
+        finally:
+            self._in_flight -= slots
+            async with self._slot_freed:
+                self._slot_freed.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool configuration and load counters"""
+        return {
+            "backend": self.backend,
+            "workers": self.max_workers,
+            "in_flight": self._in_flight,
+            "queue_depth": max(0, self._in_flight - self.max_workers),
+            "max_queue": self.max_queue,
+            "saturated": self.saturated,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
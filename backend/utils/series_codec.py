@@ -0,0 +1,133 @@
+import json
+import struct
+import zlib
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+# Series blob: codec, flags and value count, then the (optionally zlib
+# compressed) payload
+_SERIES_HEADER = struct.Struct('<BBI')
+SERIES_DELTA_CENTI = 1   # int32 deltas of value * 100, exact for 2-decimal values
+SERIES_FLOAT32 = 2       # raw float32 for anything else
+SERIES_DELTA_CENTI16 = 3 # int16 deltas of value * 100, when every delta fits
+FLAG_ZLIB = 1
+# Shorter series are stored uncompressed: zlib saves a few dozen bytes on
+# them but costs more to decode than parsing the same values as JSON
+COMPRESS_MIN_VALUES = 256
+_DELTA_DTYPES = {SERIES_DELTA_CENTI: np.dtype('<i4'), SERIES_DELTA_CENTI16: np.dtype('<i2')}
+
+# Backwash point blob: codec byte, then one packed record per point
+_POINTS_HEADER = struct.Struct('<B')
+POINTS_PACKED = 1
+POINTS_JSON = 2          # zlib-compressed JSON for points the struct cannot hold
+BACKWASH_POINT_DTYPE = np.dtype([
+    ('time_step', '<u4'),
+    ('pressure', '<f8'),
+    ('intensity', '<i4'),   # tenths, intensities are rounded to 1 decimal
+    ('duration', '<u2'),
+    ('reason', 'u1')
+])
+BACKWASH_REASONS = ['pressure_threshold_exceeded']
+
+
+def encode_series(values: Sequence[float], compress: bool = True) -> bytes:
+    """
+    Encode a pressure series as a compact blob
+
+    Values with at most two decimals (all predicted pressures) are stored
+    exactly as deltas in hundredths, as int16 when every delta fits;
+    others fall back to float32.
+
+    Args:
+        values: Series values
+        compress: zlib-compress the payload of series with at least
+            COMPRESS_MIN_VALUES values when that makes it smaller
+
+    Returns:
+        Blob bytes
+    """
+    array = np.asarray(values, dtype=float).ravel()
+    centi = np.rint(array * 100.0)
+
+    if (array.size and np.all(np.abs(centi) < 2 ** 31)
+            and np.array_equal(centi / 100.0, array)):
+        deltas = np.diff(centi.astype(np.int64), prepend=0)
+        codec = SERIES_DELTA_CENTI16 if np.all(np.abs(deltas) < 2 ** 15) else SERIES_DELTA_CENTI
+        payload = deltas.astype(_DELTA_DTYPES[codec]).tobytes()
+    else:
+        codec = SERIES_FLOAT32
+        payload = array.astype('<f4').tobytes()
+
+    flags = 0
+    if compress and array.size >= COMPRESS_MIN_VALUES:
+        compressed = zlib.compress(payload, 6)
+        if len(compressed) < len(payload):
+            payload, flags = compressed, FLAG_ZLIB
+
+    return _SERIES_HEADER.pack(codec, flags, array.size) + payload
+
+
+def decode_series(blob: bytes) -> List[float]:
+    """Decode a blob from ``encode_series`` into a list of floats"""
+    return decode_series_array(blob).tolist()
+
+
+def decode_series_array(blob: bytes) -> np.ndarray:
+    """Decode a blob from ``encode_series`` into a float64 array"""
+    codec, flags, count = _SERIES_HEADER.unpack_from(blob)
+    payload, offset = blob, _SERIES_HEADER.size
+    if flags & FLAG_ZLIB:
+        payload, offset = zlib.decompress(blob[offset:]), 0
+
+    if codec in _DELTA_DTYPES:
+        deltas = np.frombuffer(payload, dtype=_DELTA_DTYPES[codec], count=count, offset=offset)
+        return deltas.cumsum(dtype=np.int64) / 100.0
+    if codec == SERIES_FLOAT32:
+        return np.frombuffer(payload, dtype='<f4', count=count, offset=offset).astype(float)
+    raise ValueError(f"Unknown series codec: {codec}")
+
+
+def encode_backwash_points(points: List[Dict[str, Any]]) -> bytes:
+    """
+    Encode backwash points as a packed struct array
+
+    Points that do not survive the packed layout unchanged (extra keys,
+    unknown reasons, out-of-range values) are kept as compressed JSON.
+    """
+    try:
+        records = np.array([
+            (point['time_step'], point['pressure'], round(point['intensity'] * 10),
+             point['duration'], BACKWASH_REASONS.index(point['reason']))
+            for point in points
+        ], dtype=BACKWASH_POINT_DTYPE)
+        packed = _unpack_points(records) == points
+    except (KeyError, ValueError, TypeError, OverflowError):
+        packed = False
+
+    if not packed:
+        return _POINTS_HEADER.pack(POINTS_JSON) + zlib.compress(json.dumps(points).encode())
+    return _POINTS_HEADER.pack(POINTS_PACKED) + records.tobytes()
+
+
+def decode_backwash_points(blob: bytes) -> List[Dict[str, Any]]:
+    """Decode a blob from ``encode_backwash_points``"""
+    (codec,) = _POINTS_HEADER.unpack_from(blob)
+    payload = blob[_POINTS_HEADER.size:]
+
+    if codec == POINTS_JSON:
+        return json.loads(zlib.decompress(payload))
+    if codec != POINTS_PACKED:
+        raise ValueError(f"Unknown backwash point codec: {codec}")
+    return _unpack_points(np.frombuffer(payload, dtype=BACKWASH_POINT_DTYPE))
+
+
+def _unpack_points(records: np.ndarray) -> List[Dict[str, Any]]:
+    # One tolist() turns the records into tuples of Python scalars
+    return [{
+        'time_step': time_step,
+        'pressure': pressure,
+        'intensity': intensity / 10.0,
+        'duration': duration,
+        'reason': BACKWASH_REASONS[reason]
+    } for time_step, pressure, intensity, duration, reason in records.tolist()]
@@ -1,79 +1,162 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence, Union
 import re
 
-def validate_parameters(parameters: Dict[str, float]) -> Dict[str, Any]:
+import numpy as np
+
+# Valid range, unit and default of every water quality parameter; the
+# request schemas, the model and the API's model info are built from it
+PARAMETER_RANGES = {
+    'turbidity': {'min': 0.0, 'max': 2.0, 'unit': 'NTU', 'default': 0.5, 'description': 'Turbidity in NTU'},
+    'ph': {'min': 4.0, 'max': 10.0, 'unit': '', 'default': 7.0, 'description': 'pH value'},
+    'temperature': {'min': 15.0, 'max': 35.0, 'unit': '°C', 'default': 25.0, 'description': 'Temperature in °C'},
+    'flow_rate': {'min': 10.0, 'max': 50.0, 'unit': 'GPM', 'default': 20.0, 'description': 'Flow rate in GPM'},
+    'inlet_pressure': {'min': 20.0, 'max': 80.0, 'unit': 'PSIG', 'default': 40.0, 'description': 'Inlet pressure in PSIG'}
+}
+
+def validate_parameter_batch(parameters: Dict[str, Union[Sequence[float], np.ndarray]]) -> Dict[str, Any]:
     """
-    Validate input parameters for prediction
+    Validate many scenarios' parameters in one pass
+    
+    Every column is checked against PARAMETER_RANGES with a single
+    vectorized comparison, so the cost per scenario is a few nanoseconds.
+    NaN is out of range.
     
     Args:
-        parameters: Dictionary of water quality parameters
+        parameters: Equal-length arrays of water quality parameters
         
     Returns:
-        Dictionary with validation result
+        Dictionary with validation result; ``violations`` lists every
+        out-of-range value as ``{'row', 'parameter', 'value'}`` ordered by
+        row, and problems with whole columns with ``row`` None
     """
-    # Parameter ranges
-    param_ranges = {
-        'turbidity': {'min': 0.0, 'max': 2.0, 'unit': 'NTU'},
-        'ph': {'min': 4.0, 'max': 10.0, 'unit': ''},
-        'temperature': {'min': 15.0, 'max': 35.0, 'unit': '°C'},
-        'flow_rate': {'min': 10.0, 'max': 50.0, 'unit': 'GPM'},
-        'inlet_pressure': {'min': 20.0, 'max': 80.0, 'unit': 'PSIG'}
-    }
-    
-    # Required parameters
-    required_params = ['turbidity', 'ph', 'temperature', 'flow_rate', 'inlet_pressure']
+    problems = []
+    for param in PARAMETER_RANGES:
+        if param not in parameters:
+            problems.append({'row': None, 'parameter': param, 'error': f'Missing required parameter: {param}'})
+    for param in parameters:
+        if param not in PARAMETER_RANGES:
+            problems.append({'row': None, 'parameter': param, 'error': f'Unknown parameter: {param}'})
     
-    # Check for required parameters
-    for param in required_params:
+    names, columns = [], []
+    for param in PARAMETER_RANGES:
         if param not in parameters:
-            return {
-                'valid': False,
-                'error': f'Missing required parameter: {param}',
-                'details': {
-                    'parameter': param,
-                    'required': True
-                }
-            }
+            continue
+        column = np.atleast_1d(np.asarray(parameters[param]))
+        if column.dtype.kind not in 'biuf':
+            # Locate the offending rows only on this error path
+            problems.extend(
+                {'row': row, 'parameter': param, 'error': f'Parameter {param} must be numeric'}
+                for row, value in enumerate(column.tolist())
+                if isinstance(value, bool) or not isinstance(value, (int, float))
+            )
+            continue
+        names.append(param)
+        columns.append(column.astype(float, copy=False))
     
-    # Validate each parameter
-    for param, value in parameters.items():
-        if param not in param_ranges:
-            return {
-                'valid': False,
-                'error': f'Unknown parameter: {param}',
-                'details': {
-                    'parameter': param,
-                    'valid_parameters': list(param_ranges.keys())
-                }
-            }
+    lengths = {column.shape[0] for column in columns}
+    if len(lengths) > 1:
+        problems.append({'row': None, 'parameter': None, 'error': 'All parameter columns must have the same length'})
+    if problems:
+        return {'valid': False, 'error': problems[0]['error'], 'violations': problems}
+    
+    values = np.stack(columns)
+    low = np.array([PARAMETER_RANGES[param]['min'] for param in names])[:, None]
+    high = np.array([PARAMETER_RANGES[param]['max'] for param in names])[:, None]
+    outside = ~((values >= low) & (values <= high))
+    if not outside.any():
+        return {'valid': True, 'count': values.shape[1], 'violations': []}
+    
+    rows, params = np.nonzero(outside.T)
+    violations = [
+        {'row': row, 'parameter': names[param], 'value': value}
+        for row, param, value in zip(rows.tolist(), params.tolist(), values[params, rows].tolist())
+    ]
+    first = violations[0]
+    return {
+        'valid': False,
+        'error': f"Parameter {first['parameter']} value {first['value']} is out of range at row {first['row']}",
+        'count': values.shape[1],
+        'violations': violations,
+        'ranges': {param: [PARAMETER_RANGES[param]['min'], PARAMETER_RANGES[param]['max']]
+                   for param in dict.fromkeys(violation['parameter'] for violation in violations)}
+    }
+
+def validate_curves(curves: Dict[str, Union[Sequence[float], np.ndarray]]) -> Dict[str, Any]:
+    """
+    Validate time-varying parameter curves against PARAMETER_RANGES
+    
+    Args:
+        curves: Curves keyed ``<parameter>_curve``, each of any length
         
-        # Check if value is numeric
-        if not isinstance(value, (int, float)):
-            return {
-                'valid': False,
-                'error': f'Parameter {param} must be numeric',
-                'details': {
-                    'parameter': param,
-                    'value': value,
-                    'type': type(value).__name__
-                }
-            }
+    Returns:
+        Dictionary with validation result; ``violations`` lists every
+        out-of-range point as ``{'row', 'parameter', 'value'}`` with the
+        step as ``row``, and problems with whole curves with ``row`` None
+    """
+    violations = []
+    for name, curve in curves.items():
+        param = name[:-len('_curve')] if name.endswith('_curve') else None
+        if param not in PARAMETER_RANGES:
+            violations.append({'row': None, 'parameter': name, 'error': f'Unknown curve: {name}'})
+            continue
+        column = np.atleast_1d(np.asarray(curve))
+        if column.dtype.kind not in 'biuf':
+            violations.append({'row': None, 'parameter': param, 'error': f'Curve {name} must be numeric'})
+            continue
+        low, high = PARAMETER_RANGES[param]['min'], PARAMETER_RANGES[param]['max']
+        rows = np.flatnonzero(~((column >= low) & (column <= high)))
+        violations.extend({'row': row, 'parameter': param, 'value': value}
+                          for row, value in zip(rows.tolist(), column[rows].astype(float).tolist()))
+    if not violations:
+        return {'valid': True, 'violations': []}
+    
+    first = violations[0]
+    return {
+        'valid': False,
+        'error': first.get('error') or f"Curve {first['parameter']}_curve value {first['value']} is out of range at step {first['row']}",
+        'violations': violations,
+        'ranges': {param: [PARAMETER_RANGES[param]['min'], PARAMETER_RANGES[param]['max']]
+                   for param in dict.fromkeys(v['parameter'] for v in violations if 'value' in v)}
+    }
+
+def validate_parameters(parameters: Dict[str, float]) -> Dict[str, Any]:
+    """
+    Validate input parameters for prediction
+    
+    Args:
+        parameters: Dictionary of water quality parameters
         
-        # Check range
-        param_range = param_ranges[param]
-        if value < param_range['min'] or value > param_range['max']:
-            return {
-                'valid': False,
-                'error': f'Parameter {param} value {value} is out of range',
-                'details': {
-                    'parameter': param,
-                    'value': value,
-                    'valid_range': [param_range['min'], param_range['max']],
-                    'unit': param_range['unit']
-                }
-            }
+    Returns:
+        Dictionary with validation result
+    """
+    result = validate_parameter_batch({param: [value] for param, value in parameters.items()})
+    if result['valid']:
+        return {'valid': True}
     
-    return {'valid': True}
+    problem = result['violations'][0]
+    param = problem['parameter']
+    if 'error' in problem:
+        details = {'parameter': param}
+        if problem['error'].startswith('Missing'):
+            details['required'] = True
+        elif problem['error'].startswith('Unknown'):
+            details['valid_parameters'] = list(PARAMETER_RANGES)
+        else:
+            details['value'] = parameters[param]
+            details['type'] = type(parameters[param]).__name__
+        return {'valid': False, 'error': problem['error'], 'details': details}
+    
+    param_range = PARAMETER_RANGES[param]
+    return {
+        'valid': False,
+        'error': f'Parameter {param} value {problem["value"]} is out of range',
+        'details': {
+            'parameter': param,
+            'value': parameters[param],
+            'valid_range': [param_range['min'], param_range['max']],
+            'unit': param_range['unit']
+        }
+    }
 
 def validate_fouling_status(fouling_status: str) -> Dict[str, Any]:
     """
@@ -0,0 +1,110 @@
+import json
+import struct
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# Binary frame: magic, u32 header length, JSON header, then 8-byte aligned
+# little-endian array payloads described by the header
+FRAME_MEDIA_TYPE = "application/x-uf-frame"
+FRAME_MAGIC = b"UFB1"
+FRAME_DTYPES = ('<f4', '<f8')
+_PREFIX = struct.Struct('<4sI')
+_ALIGNMENT = 8
+
+
+class FrameError(ValueError):
+    """Raised for malformed binary frames"""
+
+
+def _padding(size: int) -> int:
+    return -size % _ALIGNMENT
+
+
+def accepts_frame(accept: Optional[str]) -> bool:
+    """Whether an Accept header asks for binary frames"""
+    if not accept:
+        return False
+    return any(part.split(';')[0].strip() == FRAME_MEDIA_TYPE for part in accept.split(','))
+
+
+def encode_frame(meta: Dict[str, Any], arrays: Dict[str, Any], dtype: str = '<f4') -> bytes:
+    """
+    Encode JSON metadata and numeric arrays as one binary frame
+
+    Args:
+        meta: JSON-serializable fields sent alongside the arrays
+        arrays: 1-D arrays (or lists) by name
+        dtype: Payload dtype, little-endian float32 or float64
+
+    Returns:
+        Frame bytes
+    """
+    if dtype not in FRAME_DTYPES:
+        raise FrameError(f"Unsupported frame dtype: {dtype}")
+
+    payloads = []
+    descriptors = []
+    offset = 0
+    for name, values in arrays.items():
+        data = np.ascontiguousarray(values, dtype=dtype).ravel().tobytes()
+        descriptors.append({'name': name, 'dtype': dtype, 'length': len(data) // np.dtype(dtype).itemsize,
+                            'offset': offset})
+        payloads.append(data + b'\0' * _padding(len(data)))
+        offset += len(data) + _padding(len(data))
+
+    header = json.dumps({'meta': meta, 'arrays': descriptors}, separators=(',', ':')).encode()
+    header += b' ' * _padding(_PREFIX.size + len(header))
+    return b''.join([_PREFIX.pack(FRAME_MAGIC, len(header)), header] + payloads)
+
+
+def decode_frame(body: bytes) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    Decode a binary frame without copying the array payloads
+
+    Args:
+        body: Frame bytes
+
+    Returns:
+        Tuple of (metadata, read-only arrays by name)
+
+    Raises:
+        FrameError: If the frame is truncated or its header is invalid
+    """
+    if len(body) < _PREFIX.size:
+        raise FrameError("Frame is too short")
+    magic, header_length = _PREFIX.unpack_from(body)
+    if magic != FRAME_MAGIC:
+        raise FrameError("Not a UF binary frame")
+
+    payload_start = _PREFIX.size + header_length
+    if payload_start > len(body):
+        raise FrameError("Frame header is truncated")
+    try:
+        header = json.loads(body[_PREFIX.size:payload_start])
+        descriptors = header.get('arrays', [])
+        meta = header.get('meta', {})
+    except (ValueError, AttributeError) as e:
+        raise FrameError(f"Invalid frame header: {e}")
+    if not isinstance(descriptors, list):
+        raise FrameError("Invalid frame header: arrays must be a list")
+
+    buffer = memoryview(body)
+    arrays = {}
+    for descriptor in descriptors:
+        try:
+            dtype = descriptor['dtype']
+            if dtype not in FRAME_DTYPES:
+                raise FrameError(f"Unsupported frame dtype: {dtype}")
+            start = payload_start + int(descriptor['offset'])
+            length = int(descriptor['length'])
+            end = start + length * np.dtype(dtype).itemsize
+            if start < payload_start or length < 0 or end > len(body):
+                raise FrameError(f"Array '{descriptor['name']}' lies outside the frame")
+            arrays[descriptor['name']] = np.frombuffer(buffer[start:end], dtype=dtype)
+        except FrameError:
+            raise
+        except (KeyError, TypeError, ValueError) as e:
+            raise FrameError(f"Invalid array descriptor: {e}")
+
+    return meta, arrays
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Concurrent read/write throughput of each database engine profile
+
+Writer threads commit prediction records while reader threads page
+through the history, for a fixed duration per profile. SQLite runs on a
+fresh scratch file per profile; pass --url to measure a server database.
+
+Usage:
+    python benchmarks/engine_benchmark.py [--url URL] [--duration S]
+        [--writers N] [--readers N] [--batch ROWS]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from backend.models import database
+from backend.models.prediction_model import PredictionModel
+
+
+def run_profile(url: str, profile: str, args, record: dict) -> dict:
+    """Run writers and readers against one engine profile"""
+    engine = database.build_engine(url, profile)
+    database.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    # Some history for the readers before the clock starts
+    db = Session()
+    database.save_prediction_records(db, [dict(record) for _ in range(2000)])
+    db.close()
+
+    counts = {"writes": 0, "reads": 0, "errors": 0}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def count(name, amount=1):
+        with lock:
+            counts[name] += amount
+
+    def writer():
+        db = Session()
+        while not stop.is_set():
+            try:
+                database.save_prediction_records(db, [dict(record) for _ in range(args.batch)])
+                count("writes", args.batch)
+            except OperationalError:
+                db.rollback()
+                count("errors")
+        db.close()
+
+    def reader():
+        db = Session()
+        while not stop.is_set():
+            try:
+                for row in database.get_prediction_history(db, limit=50):
+                    row.to_dict()
+                db.rollback()
+                count("reads")
+            except OperationalError:
+                db.rollback()
+                count("errors")
+        db.close()
+
+    threads = ([threading.Thread(target=writer) for _ in range(args.writers)] +
+               [threading.Thread(target=reader) for _ in range(args.readers)])
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    engine.dispose()
+    return {
+        "profile": profile,
+        "rows_written_per_s": counts["writes"] / elapsed,
+        "pages_read_per_s": counts["reads"] / elapsed,
+        "errors": counts["errors"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default=None, help="Database URL (default: scratch SQLite files)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per profile")
+    parser.add_argument("--writers", type=int, default=2, help="Writer threads")
+    parser.add_argument("--readers", type=int, default=4, help="Reader threads")
+    parser.add_argument("--batch", type=int, default=1, help="Rows per write transaction")
+    args = parser.parse_args()
+
+    model = PredictionModel()
+    parameters = {'turbidity': 0.5, 'ph': 7.0, 'temperature': 25.0, 'flow_rate': 20.0, 'inlet_pressure': 40.0}
+    record = database.prediction_record_values(model.predict(parameters, seed=0), parameters, 'clean')
+
+    scratch = tempfile.mkdtemp(prefix="uf_engine_") if args.url is None else None
+    results = []
+    try:
+        for profile in database.DATABASE_PROFILES:
+            url = args.url or f"sqlite:///{os.path.join(scratch, profile + '.db')}"
+            results.append(run_profile(url, profile, args, record))
+    finally:
+        if scratch is not None:
+            shutil.rmtree(scratch)
+
+    print(f"{args.writers} writers ({args.batch} rows/commit), {args.readers} readers, {args.duration:.0f} s each")
+    print(f"{'profile':<12}{'rows written/s':>16}{'pages read/s':>14}{'errors':>8}")
+    for result in results:
+        print(f"{result['profile']:<12}{result['rows_written_per_s']:>16.0f}"
+              f"{result['pages_read_per_s']:>14.0f}{result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
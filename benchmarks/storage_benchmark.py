@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Database size and history read throughput, JSON columns vs compact blobs
+
+Fills a scratch SQLite database with legacy JSON rows, measures it, runs
+the compact-storage migration and measures again.
+
+Usage:
+    python benchmarks/storage_benchmark.py [--rows N] [--time-steps T] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def read_history(database, page_size: int = 100, repeat: int = 3) -> float:
+    """Best rows per second of ``repeat`` passes paging through the whole history with to_dict"""
+    return max(_read_history_once(database, page_size) for _ in range(repeat))
+
+
+def _read_history_once(database, page_size: int) -> float:
+    db = database.SessionLocal()
+    try:
+        started = time.perf_counter()
+        rows = 0
+        cursor = None
+        while True:
+            page = database.get_prediction_history(db, limit=page_size, cursor=cursor)
+            if not page:
+                break
+            for record in page:
+                record.to_dict()
+            rows += len(page)
+            cursor = database.encode_history_cursor(page[-1])
+            db.expunge_all()
+        return rows / (time.perf_counter() - started)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000, help="Prediction records to store")
+    parser.add_argument("--time-steps", type=int, default=50, help="Pressure points per record")
+    parser.add_argument("--repeat", type=int, default=3, help="Read passes per format; the best counts")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="uf_storage_")
+    path = os.path.join(scratch, "benchmark.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    import numpy as np
+    from backend.models import database
+    from backend.models.migrations import migrate_compact_storage
+    from backend.models.prediction_model import PredictionModel
+
+    database.init_db()
+    model = PredictionModel()
+    rng = np.random.default_rng(0)
+    started_at = datetime(2024, 1, 1)
+
+    # Legacy rows, as written before the compact format
+    for start in range(0, args.rows, 1000):
+        size = min(1000, args.rows - start)
+        parameters = {
+            'turbidity': rng.uniform(0.0, 2.0, size), 'ph': rng.uniform(6.0, 8.0, size),
+            'temperature': rng.uniform(15.0, 35.0, size), 'flow_rate': rng.uniform(10.0, 50.0, size),
+            'inlet_pressure': np.full(size, 40.0)
+        }
+        batch = model.predict_batch(parameters, rng.integers(0, 5, size), args.time_steps, seed=start)
+        rows = []
+        for offset, result in enumerate(model.iter_batch_results(batch)):
+            values = database.prediction_record_values(
+                result, {name: float(column[offset]) for name, column in parameters.items()},
+                model.FOULING_STATUSES[batch['fouling_status'][offset]], args.time_steps,
+                timestamp=started_at + timedelta(seconds=start + offset)
+            )
+            values.update(pressure_data_json=result['pressure_data'],
+                          backwash_points_json=result['backwash_points'],
+                          pressure_blob=None, backwash_blob=None)
+            rows.append(values)
+        db = database.SessionLocal()
+        database.save_prediction_records(db, rows)
+        db.close()
+
+    json_size = os.path.getsize(path)
+    json_rate = read_history(database, repeat=args.repeat)
+
+    started = time.perf_counter()
+    migrated = migrate_compact_storage(vacuum=True)
+    migration_seconds = time.perf_counter() - started
+
+    compact_size = os.path.getsize(path)
+    compact_rate = read_history(database, repeat=args.repeat)
+
+    print(f"Rows: {args.rows}, time steps: {args.time_steps}")
+    print(f"{'format':<10}{'db size (MiB)':>16}{'bytes/row':>12}{'history rows/s':>18}")
+    for label, size, rate in (("json", json_size, json_rate), ("compact", compact_size, compact_rate)):
+        print(f"{label:<10}{size / 2 ** 20:>16.2f}{size / args.rows:>12.0f}{rate:>18.0f}")
+    print(f"Migrated {migrated} rows in {migration_seconds:.2f} s "
+          f"({json_size / compact_size:.2f}x smaller, {compact_rate / json_rate:.2f}x read throughput)")
+
+    database.engine.dispose()
+    os.remove(path)
+    os.rmdir(scratch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Performance baseline of the model, API and database hot paths
+
+`run` measures model latency across time steps, batch throughput,
+end-to-end /api/predict latency through an in-process ASGI client and
+SQLite record throughput, and writes the results with machine metadata
+as JSON. `compare` flags metrics that regressed beyond a tolerance and
+exits with status 1 if any did.
+
+Usage:
+    python benchmarks/suite.py run [--output PATH] [--quick] [--only GROUP ...]
+    python benchmarks/suite.py compare BASELINE CURRENT [--tolerance 0.1]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+GROUPS = ("model", "batch", "api", "database")
+PARAMETERS = {'turbidity': 0.5, 'ph': 7.0, 'temperature': 25.0, 'flow_rate': 20.0, 'inlet_pressure': 40.0}
+
+
+def metric(value: float, unit: str, better: str, **details) -> dict:
+    """One result; ``better`` is 'lower' or 'higher'"""
+    return dict({"value": round(value, 3), "unit": unit, "better": better}, **details)
+
+
+def latency_us(function, repeat: int, number: int) -> dict:
+    """Median, minimum and maximum microseconds per call over ``repeat`` rounds"""
+    function()
+    rounds = sorted(t / number * 1e6 for t in timeit.repeat(function, repeat=repeat, number=number))
+    return metric(rounds[len(rounds) // 2], "us", "lower", min=round(rounds[0], 3), max=round(rounds[-1], 3))
+
+
+def bench_model(settings: dict) -> dict:
+    """Latency of predict and predict_with_curves per horizon"""
+    import numpy as np
+    from backend.models.prediction_model import PredictionModel
+
+    model = PredictionModel()
+    rng = np.random.default_rng(0)
+    results = {}
+    for time_steps in settings["time_steps"]:
+        results[f"model.predict.t{time_steps}"] = latency_us(
+            lambda: model.predict(PARAMETERS, 'mild', time_steps, seed=1),
+            settings["repeat"], settings["number"])
+        curves = {
+            'turbidity_curve': rng.uniform(0.2, 1.5, time_steps).tolist(),
+            'ph_curve': rng.uniform(6.5, 7.5, time_steps).tolist(),
+            'temperature_curve': rng.uniform(20.0, 30.0, time_steps).tolist()
+        }
+        results[f"model.predict_with_curves.t{time_steps}"] = latency_us(
+            lambda: model.predict_with_curves(PARAMETERS, curves, 'mild', time_steps),
+            settings["repeat"], settings["number"])
+    return results
+
+
+def bench_batch(settings: dict) -> dict:
+    """Scenarios per second of predict_batch, with and without rendering the results"""
+    import numpy as np
+    from backend.models.prediction_model import PredictionModel
+
+    model = PredictionModel()
+    size = settings["batch_size"]
+    rng = np.random.default_rng(0)
+    parameters = {
+        'turbidity': rng.uniform(0.0, 2.0, size), 'ph': rng.uniform(4.0, 10.0, size),
+        'temperature': rng.uniform(15.0, 35.0, size), 'flow_rate': rng.uniform(10.0, 50.0, size),
+        'inlet_pressure': np.full(size, 40.0)
+    }
+    statuses = rng.integers(0, 5, size)
+
+    def simulate():
+        return model.predict_batch(parameters, statuses, 20, seed=1)
+
+    def render():
+        return sum(1 for _ in model.iter_batch_results(simulate()))
+
+    results = {}
+    for name, function in (("predict_batch", simulate), ("predict_batch_results", render)):
+        seconds = latency_us(function, settings["repeat"], 1)["value"] / 1e6
+        results[f"batch.{name}"] = metric(size / seconds, "scenarios/s", "higher", batch_size=size)
+    return results
+
+
+def bench_api(settings: dict) -> dict:
+    """End-to-end /api/predict latency through an in-process ASGI client"""
+    import httpx
+    from backend.main import app
+
+    body = {"parameters": PARAMETERS, "fouling_status": "mild", "time_steps": 20}
+
+    async def run():
+        latencies = {}
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+                for name, payload in (("predict", body), ("predict_seeded_cached", dict(body, seed=1))):
+                    for _ in range(20):
+                        (await client.post("/api/predict", json=payload)).raise_for_status()
+                    rounds = []
+                    for _ in range(settings["repeat"]):
+                        started = time.perf_counter()
+                        for _ in range(settings["requests"]):
+                            response = await client.post("/api/predict", json=payload)
+                        rounds.append((time.perf_counter() - started) / settings["requests"] * 1e6)
+                        response.raise_for_status()
+                    rounds.sort()
+                    latencies[f"api.{name}"] = metric(rounds[len(rounds) // 2], "us", "lower",
+                                                      min=round(rounds[0], 3), max=round(rounds[-1], 3))
+        return latencies
+
+    return asyncio.run(run())
+
+
+def bench_database(settings: dict) -> dict:
+    """save_prediction_record and get_prediction_history throughput on SQLite"""
+    from backend.models import database
+    from backend.models.prediction_model import PredictionModel
+
+    database.init_db()
+    prediction = PredictionModel().predict(PARAMETERS, 'mild', 20, seed=1)
+    db = database.SessionLocal()
+    try:
+        count = settings["records"]
+        started = time.perf_counter()
+        for _ in range(count):
+            database.save_prediction_record(db, prediction, PARAMETERS, 'mild', 20)
+        save_rate = count / (time.perf_counter() - started)
+
+        records = [database.prediction_record_values(prediction, PARAMETERS, 'mild', 20)
+                   for _ in range(settings["history_rows"])]
+        database.save_prediction_records(db, records)
+        db.expunge_all()
+
+        pages = rows = 0
+        cursor = None
+        started = time.perf_counter()
+        while True:
+            page = database.get_prediction_history(db, limit=100, cursor=cursor)
+            if not page:
+                break
+            for record in page:
+                record.to_dict()
+            pages += 1
+            rows += len(page)
+            cursor = database.encode_history_cursor(page[-1])
+            db.expunge_all()
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+        database.engine.dispose()
+
+    return {
+        "database.save_prediction_record": metric(save_rate, "records/s", "higher"),
+        "database.get_prediction_history": metric(rows / elapsed, "rows/s", "higher",
+                                                  pages=pages, page_size=100)
+    }
+
+
+def machine_metadata() -> dict:
+    """Hardware, interpreter, library versions and the commit measured"""
+    import numpy
+    import sqlalchemy
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "hostname": platform.node(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or None,
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "sqlalchemy": sqlalchemy.__version__,
+        "commit": commit
+    }
+
+
+def run(args) -> dict:
+    """Run the selected groups against scratch storage and write the results"""
+    settings = {
+        "time_steps": [10, 20, 50],
+        "repeat": 3 if args.quick else 7,
+        "number": 50 if args.quick else 300,
+        "batch_size": 2000 if args.quick else 20000,
+        "requests": 50 if args.quick else 300,
+        "records": 200 if args.quick else 1000,
+        "history_rows": 2000 if args.quick else 20000
+    }
+
+    # Scratch database and artifacts, set before the backend reads its environment
+    scratch = tempfile.mkdtemp(prefix="uf_suite_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(scratch, 'benchmark.db')}"
+    os.environ["MODEL_ARTIFACT_DIR"] = os.path.join(scratch, "artifacts")
+    os.environ.pop("LOOKUP_TABLE_PATH", None)
+    os.environ.pop("MODEL_REGISTRY_PATH", None)
+
+    benchmarks = {"model": bench_model, "batch": bench_batch, "api": bench_api, "database": bench_database}
+    results = {}
+    try:
+        for group in args.only or GROUPS:
+            started = time.perf_counter()
+            results.update(benchmarks[group](settings))
+            print(f"{group:<10} {time.perf_counter() - started:6.1f} s", file=sys.stderr)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "machine": machine_metadata(),
+        "settings": dict(settings, quick=args.quick, groups=list(args.only or GROUPS)),
+        "results": results
+    }
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results", datetime.utcnow().strftime("benchmark-%Y%m%dT%H%M%S.json"))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    print(f"{'benchmark':<42}{'value':>14}  unit")
+    for name, result in results.items():
+        print(f"{name:<42}{result['value']:>14.1f}  {result['unit']}")
+    print(f"Results written to {output}")
+    return report
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list:
+    """
+    Metrics of ``current`` worse than ``baseline`` by more than ``tolerance``
+
+    Args:
+        baseline: Report of the reference run
+        current: Report of the run under test
+        tolerance: Allowed relative change in the worse direction, e.g. 0.1
+
+    Returns:
+        List of (name, baseline value, current value, relative change,
+        regressed) for every metric present in both runs
+    """
+    rows = []
+    for name, reference in baseline["results"].items():
+        if name not in current["results"]:
+            continue
+        before, after = reference["value"], current["results"][name]["value"]
+        change = (after - before) / before if before else 0.0
+        worse = change if reference["better"] == "lower" else -change
+        rows.append((name, before, after, change, worse > tolerance))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks and write a JSON report")
+    run_parser.add_argument("--output", default=None,
+                            help="Report path (default: benchmarks/results/benchmark-<timestamp>.json)")
+    run_parser.add_argument("--quick", action="store_true", help="Fewer repetitions, for a smoke run")
+    run_parser.add_argument("--only", nargs="+", choices=GROUPS, help="Benchmark groups to run")
+
+    compare_parser = commands.add_parser("compare", help="Compare two reports")
+    compare_parser.add_argument("baseline", help="Report of the reference run")
+    compare_parser.add_argument("current", help="Report of the run under test")
+    compare_parser.add_argument("--tolerance", type=float, default=0.1,
+                                help="Allowed relative slowdown before a metric is flagged (default: 0.1)")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run(args)
+        return
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+
+    keys = ("platform", "processor", "cpu_count", "python", "numpy")
+    differing = [key for key in keys if baseline["machine"].get(key) != current["machine"].get(key)]
+    if differing:
+        print(f"Warning: runs differ in {', '.join(differing)}; differences may not be regressions")
+
+    rows = compare(baseline, current, args.tolerance)
+    print(f"{'benchmark':<42}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, before, after, change, regressed in rows:
+        print(f"{name:<42}{before:>14.1f}{after:>14.1f}{change:>+10.1%}{'  REGRESSION' if regressed else ''}")
+    missing = sorted(set(baseline["results"]) ^ set(current["results"]))
+    if missing:
+        print(f"Only in one run: {', '.join(missing)}")
+
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+        sys.exit(1)
+    print(f"No regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os
+import sys
+import tempfile
+
+# Scratch storage, set before the backend reads its environment
+_SCRATCH = tempfile.mkdtemp(prefix="uf_tests_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_SCRATCH, 'test.db')}")
+os.environ.setdefault("MODEL_ARTIFACT_DIR", os.path.join(_SCRATCH, "artifacts"))
+os.environ.setdefault("PREDICTION_EXECUTOR", "thread")
+os.environ.pop("LOOKUP_TABLE_PATH", None)
+os.environ.pop("MODEL_REGISTRY_PATH", None)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+PARAMETERS = {'turbidity': 1.0, 'ph': 7.0, 'temperature': 25.0, 'flow_rate': 20.0, 'inlet_pressure': 40.0}
+
+
+@pytest.fixture
+def parameters():
+    return dict(PARAMETERS)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from backend.main import app
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db():
+    """Session on an empty in-memory database"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from backend.models.database import Base
+
+    # Shared across threads so API tests can use it through get_db
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
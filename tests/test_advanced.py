@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from backend.schemas.prediction import MAX_CURVE_STEPS
+from backend.utils.wire import FRAME_MEDIA_TYPE, decode_frame, encode_frame
+
+
+def advanced(client, body):
+    return client.post("/api/predict/advanced", json=body)
+
+
+def frame(client, meta, arrays):
+    return client.post("/api/predict/advanced", content=encode_frame(meta, arrays),
+                       headers={"Content-Type": FRAME_MEDIA_TYPE})
+
+
+def test_valid_request_with_curves(client, parameters):
+    body = {"parameters": parameters, "fouling_status": "mild", "time_steps": 30, "seed": 4,
+            "curve_data": {"turbidity_curve": [0.5, 1.0, 1.5], "ph_curve": [7.0, 7.2]}}
+    response = advanced(client, body)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["prediction_data"]["pressure_data"]) == 30
+    assert data["metadata"]["uses_curve_data"]
+    # A frame carrying the same curves as arrays gives the same seeded prediction
+    meta = dict(body, curve_data={"ph_curve": [7.0, 7.2]})
+    framed = frame(client, meta, {"turbidity_curve": np.array([0.5, 1.0, 1.5])})
+    assert framed.status_code == 200
+    assert framed.json()["prediction_data"] == data["prediction_data"]
+
+
+@pytest.mark.parametrize("changes", [
+    {"seed": -1},
+    {"time_steps": "abc"},
+    {"time_steps": 0},
+    {"time_steps": MAX_CURVE_STEPS + 1},
+    {"parameters": {"turbidity": 99.0, "ph": 7.0, "temperature": 25.0, "flow_rate": 20.0, "inlet_pressure": 40.0}},
+    {"parameters": {"turbidity": 1.0}},
+    {"curve_data": {"ph_curve": [7.0, 15.0]}},
+    {"curve_data": {"turbidity_curve": [0.5] * (MAX_CURVE_STEPS + 1)}},
+])
+def test_invalid_requests_are_rejected(client, parameters, changes):
+    response = advanced(client, dict({"parameters": parameters, "fouling_status": "mild"}, **changes))
+    assert response.status_code == 422
+
+
+def test_out_of_range_curve_reports_every_violation(client, parameters):
+    response = advanced(client, {"parameters": parameters, "curve_data": {"ph_curve": [7.0, 15.0, 1.0]}})
+    violations = response.json()["detail"][0]["ctx"]["violations"]
+    assert [(v["row"], v["value"]) for v in violations] == [(1, 15.0), (2, 1.0)]
+
+
+@pytest.mark.parametrize("meta_changes, arrays", [
+    ({"seed": -1}, {}),
+    ({}, {"turbidity_curve": np.array([0.5, 99.0])}),
+    ({}, {"flow_rate_curve": np.array([20.0])}),
+    ({}, {"temperature_curve": np.full(MAX_CURVE_STEPS + 1, 25.0)}),
+])
+def test_invalid_frames_are_rejected(client, parameters, meta_changes, arrays):
+    response = frame(client, dict({"parameters": parameters}, **meta_changes), arrays)
+    assert response.status_code == 422
+
+
+def test_malformed_bodies(client, parameters):
+    response = client.post("/api/predict/advanced", content=b"\x00not a frame",
+                           headers={"Content-Type": FRAME_MEDIA_TYPE})
+    assert response.status_code == 400
+    assert client.post("/api/predict/advanced", content=b"{",
+                       headers={"Content-Type": "application/json"}).status_code == 422
+
+
+def test_frame_response(client, parameters):
+    response = client.post("/api/predict/advanced", json={"parameters": parameters, "time_steps": 12},
+                           headers={"Accept": FRAME_MEDIA_TYPE})
+    meta, arrays = decode_frame(response.content)
+    assert meta["success"] and arrays["pressure_data"].shape == (12,)
@@ -0,0 +1,54 @@
+import json
+
+from backend import main
+
+
+def batch(client, requests, ndjson=False):
+    if ndjson:
+        response = client.post("/api/predict/batch", content="\n".join(json.dumps(r) for r in requests),
+                               headers={"Content-Type": "application/x-ndjson"})
+    else:
+        response = client.post("/api/predict/batch", json=requests)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def seeded_requests(parameters, count=12):
+    return [{"parameters": dict(parameters, turbidity=0.2 + 0.1 * i), "fouling_status": "mild",
+             "time_steps": 20 if i % 3 else 30, "seed": 7 if i % 4 else None} for i in range(count)]
+
+
+def seeded_lines(lines, requests):
+    return [line for line, request in zip(lines, requests) if request["seed"] is not None]
+
+
+def test_seeded_batch_is_reproducible(client, parameters):
+    requests = seeded_requests(parameters)
+    first = batch(client, requests)
+    assert all(line["success"] for line in first)
+    assert seeded_lines(first, requests) == seeded_lines(batch(client, requests), requests)
+
+
+def test_seeded_batch_matches_across_forms_and_chunks(client, parameters, monkeypatch):
+    requests = seeded_requests(parameters)
+    whole = seeded_lines(batch(client, requests), requests)
+    assert whole == seeded_lines(batch(client, requests, ndjson=True), requests)
+
+    monkeypatch.setattr(main, "BATCH_CHUNK_SIZE", 5)
+    assert whole == seeded_lines(batch(client, requests), requests)
+    assert whole == seeded_lines(batch(client, requests, ndjson=True), requests)
+
+
+def test_seeds_change_the_result(client, parameters):
+    request = {"parameters": parameters, "fouling_status": "severe", "time_steps": 50}
+    lines = batch(client, [dict(request, seed=1), dict(request, seed=2)])
+    assert lines[0]["prediction_data"]["pressure_data"] != lines[1]["prediction_data"]["pressure_data"]
+
+
+def test_seeded_batch_rows_match_single_predictions(client, parameters):
+    requests = [dict(request, seed=11 + i) for i, request in enumerate(seeded_requests(parameters, 6))]
+    requests.append({"parameters": parameters, "fouling_status": "severe", "time_steps": 50, "seed": 3})
+    for line, request in zip(batch(client, requests), requests):
+        single = client.post("/api/predict", json=request).json()["prediction_data"]
+        assert line["prediction_data"]["backwash_points"] == single["backwash_points"]
+        assert line["prediction_data"] == single
@@ -0,0 +1,81 @@
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend import main
+from backend.models.database import (
+    PredictionRecord, decode_history_cursor, encode_history_cursor, get_db, get_prediction_history,
+    prediction_record_values, save_prediction_records
+)
+from backend.models.prediction_model import PredictionModel
+
+START = datetime(2026, 3, 1, 12, 0, 0, 250000)
+
+
+@pytest.fixture
+def records(db, parameters):
+    """25 records over 4 timestamps, so most pages end inside a tie"""
+    prediction = PredictionModel().predict(parameters, 'mild', 10, seed=1)
+    save_prediction_records(db, [
+        prediction_record_values(prediction, parameters, 'mild', 10, timestamp=START + timedelta(seconds=i % 4))
+        for i in range(25)
+    ])
+    return db.query(PredictionRecord).order_by(PredictionRecord.timestamp.desc(), PredictionRecord.id.desc()).all()
+
+
+@pytest.fixture
+def api(client, db):
+    main.app.dependency_overrides[get_db] = lambda: db
+    yield client
+    main.app.dependency_overrides.pop(get_db)
+
+
+def test_cursor_round_trip(records):
+    for record in records[:3]:
+        assert decode_history_cursor(encode_history_cursor(record)) == (record.timestamp, record.id)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    base64.urlsafe_b64encode(b"2026-03-01T12:00:00|seven").decode(),
+    base64.urlsafe_b64encode(b"yesterday|7").decode(),
+    base64.urlsafe_b64encode(b"2026-03-01T12:00:00").decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe|7").decode(),
+])
+def test_malformed_cursors_are_rejected(api, cursor):
+    with pytest.raises(ValueError):
+        decode_history_cursor(cursor)
+    assert api.get("/api/history", params={"cursor": cursor}).status_code == 400
+
+
+@pytest.mark.parametrize("limit", [1, 3, 4, 6, 25, 30])
+def test_cursor_pages_cover_ties_exactly_once(db, records, limit):
+    pages, cursor = [], None
+    while True:
+        page = get_prediction_history(db, limit=limit, cursor=cursor)
+        if not page:
+            break
+        pages.append(page)
+        cursor = encode_history_cursor(page[-1])
+
+    assert [record.id for page in pages for record in page] == [record.id for record in records]
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+def test_history_endpoint_pages_to_a_null_cursor(api, records):
+    seen, cursor = [], None
+    for _ in range(len(records)):
+        params = {"limit": 7, "include_total": True}
+        if cursor:
+            params["cursor"] = cursor
+        response = api.get("/api/history", params=params).json()
+        assert response["total_count"] == len(records)
+        seen += [entry["id"] for entry in response["history"]]
+        cursor = response["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [record.id for record in records]
+
+    # A page ending exactly on the last record has no next page
+    assert api.get("/api/history", params={"limit": len(records)}).json()["next_cursor"] is None
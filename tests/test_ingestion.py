@@ -0,0 +1,135 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from backend.models.ingestion import ingest_sensor_file, resample_chunks
+
+START = 1_700_000_000.0
+
+
+@pytest.fixture
+def log():
+    """Irregular sensor samples with gaps and missing values"""
+    rng = np.random.default_rng(0)
+    seconds = START + np.cumsum(rng.uniform(5.0, 50.0, 2000))
+    values = {
+        'turbidity': rng.uniform(0.2, 1.5, seconds.size),
+        'ph': rng.uniform(6.5, 7.5, seconds.size),
+        'temperature': rng.uniform(20.0, 30.0, seconds.size)
+    }
+    values['ph'][rng.random(seconds.size) < 0.1] = np.nan
+    values['temperature'][:30] = np.nan
+    return seconds, values
+
+
+def chunked(seconds, values, size):
+    for start in range(0, seconds.size, size):
+        yield seconds[start:start + size], {name: column[start:start + size] for name, column in values.items()}
+
+
+def resample(chunks, step_seconds=60.0):
+    parts = list(resample_chunks(chunks, step_seconds))
+    grid = np.concatenate([grid for grid, _ in parts])
+    return grid, {name: np.concatenate([values[name] for _, values in parts]) for name in parts[0][1]}
+
+
+def test_chunked_resampling_matches_whole_log(log):
+    seconds, values = log
+    grid, whole = resample(chunked(seconds, values, seconds.size))
+    valid = {name: ~np.isnan(column) for name, column in values.items()}
+    for name, column in values.items():
+        np.testing.assert_allclose(whole[name], np.interp(grid, seconds[valid[name]], column[valid[name]]))
+    assert np.all(np.diff(grid) == 60.0) and grid[0] % 60.0 == 0
+
+    for size in (1, 7, 100, 999):
+        chunk_grid, resampled = resample(chunked(seconds, values, size))
+        np.testing.assert_array_equal(chunk_grid, grid)
+        for name in values:
+            np.testing.assert_allclose(resampled[name], whole[name], rtol=0, atol=1e-12)
+
+
+def test_unordered_timestamps_are_rejected(log):
+    seconds, values = log
+    with pytest.raises(ValueError):
+        resample(chunked(seconds[::-1], values, 100))
+
+
+def test_ingestion_does_not_depend_on_chunk_rows(db, log, tmp_path):
+    seconds, values = log
+    path = str(tmp_path / "log.parquet")
+    pq.write_table(pa.table(dict({'timestamp': seconds}, **values)), path)
+
+    whole = ingest_sensor_file(db, path, "train-1", chunk_rows=10 ** 6)
+    chunked_series = ingest_sensor_file(db, path, "train-1", chunk_rows=37)
+    assert chunked_series.point_count == whole.point_count
+    assert chunked_series.start_time == whole.start_time
+    for name, curve in whole.curves().items():
+        np.testing.assert_array_equal(chunked_series.curves()[name], curve)
+
+
+def whole_log_interp(grid, seconds, column, max_gap_seconds):
+    """Reference resampling of one sensor with NaN inside gaps longer than max_gap_seconds"""
+    valid = ~np.isnan(column)
+    times, samples = seconds[valid], column[valid]
+    expected = np.interp(grid, times, samples)
+    after = np.searchsorted(times, grid, side="left")
+    before = np.searchsorted(times, grid, side="right") - 1
+    expected[times[after] - times[before] > max_gap_seconds] = np.nan
+    return expected
+
+
+def test_all_nan_sensor_is_dropped_without_holding_the_log(log):
+    seconds, values = log
+    values = dict(values, temperature=np.full(seconds.size, np.nan))
+
+    read = []
+
+    def tracked(chunks):
+        for chunk in chunks:
+            read.append(chunk[0].size)
+            yield chunk
+
+    parts = resample_chunks(tracked(chunked(seconds, values, 10)), 60.0, max_empty_rows=100)
+    grid, resampled = next(parts)
+    # The grid starts once the empty sensor is dropped, not at the end of the log
+    assert sum(read) <= 110
+    assert set(resampled) == {'turbidity', 'ph'}
+
+    for size in (1, 10, seconds.size):
+        grid, resampled = resample(chunked(seconds, values, size))
+        assert set(resampled) == {'turbidity', 'ph'}
+        for name in resampled:
+            np.testing.assert_allclose(resampled[name], whole_log_interp(grid, seconds, values[name], 3600.0),
+                                       rtol=0, atol=1e-12)
+
+    # Short logs drop sensors that never had data at the end
+    grid, resampled = resample(chunked(seconds, values, 100))
+    assert set(resampled) == {'turbidity', 'ph'}
+
+
+def test_long_sensor_gap_advances_the_grid_with_nan(log):
+    seconds, values = log
+    values = dict(values)
+    values['ph'] = values['ph'].copy()
+    values['ph'][500:1500] = np.nan
+    outage = (seconds[499], seconds[1500])
+    assert outage[1] - outage[0] > 3600.0
+
+    for size in (7, 100, seconds.size):
+        grid, resampled = resample(chunked(seconds, values, size))
+        for name in values:
+            np.testing.assert_allclose(resampled[name], whole_log_interp(grid, seconds, values[name], 3600.0),
+                                       rtol=0, atol=1e-12)
+        in_gap = (grid > outage[0]) & (grid < outage[1])
+        assert in_gap.any() and np.all(np.isnan(resampled['ph'][in_gap]))
+        assert not np.isnan(resampled['turbidity']).any()
+
+    # The grid keeps up with the newest row during the outage
+    emitted = []
+    read = []
+    for grid, _ in resample_chunks((read.append(chunk[0][-1]) or chunk
+                                    for chunk in chunked(seconds, values, 10)), 60.0):
+        emitted.append((read[-1], grid[-1]))
+    assert any(outage[0] + 3600.0 < newest < outage[1] for newest, _ in emitted)
+    assert all(newest - last <= 3600.0 + 60.0 + 50.0 for newest, last in emitted)
@@ -0,0 +1,44 @@
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from backend import main
+from backend.models.live import TrainState
+from backend.models.prediction_model import PredictionModel
+from backend.models.registry import CalibratedPredictionModel
+
+
+class WholeRunModel:
+    """Model predicting whole runs only, without a per-reading step rule"""
+
+    def predict(self, parameters, fouling_status='clean', time_steps=20, pressure_threshold=7.0, **kwargs):
+        return {'pressure_data': [4.0] * time_steps, 'backwash_points': []}
+
+    def predict_summary(self, parameters, fouling_status='clean', time_steps=20, pressure_threshold=7.0):
+        return {'fouling_rate': 0.0, 'efficiency': 1.0, 'time_to_first_backwash': float(time_steps)}
+
+
+@pytest.mark.parametrize("model", [PredictionModel(), CalibratedPredictionModel({'PRESSURE_DROP_FACTOR': 0.3})])
+def test_constant_readings_follow_the_noise_free_prediction(parameters, model):
+    expected = model.predict(parameters, 'mild', time_steps=40, noise=False)
+    state = TrainState("train-1", 'mild')
+    forecasts = [state.update(model, parameters) for _ in range(40)]
+
+    assert [forecast['pressure'] for forecast in forecasts] == expected['pressure_data']
+    backwashes = [forecast['backwash'] for forecast in forecasts if forecast['backwash']]
+    assert backwashes == expected['backwash_points']
+
+
+def test_live_stream_refuses_models_without_step_reading(client, parameters):
+    main.model_registry.register("test-whole-run", WholeRunModel)
+    try:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            with client.websocket_connect("/ws/trains/train-2?model_version=test-whole-run") as websocket:
+                websocket.receive_json()
+        assert closed.value.code == 1008
+        assert "does not support live readings" in closed.value.reason
+
+        with client.websocket_connect("/ws/trains/train-2") as websocket:
+            websocket.send_json(parameters)
+            assert websocket.receive_json()['type'] == 'forecast'
+    finally:
+        main.model_registry.unregister("test-whole-run")
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+
+import pytest
+
+from backend.models.optimizer import BackwashOptimizer
+from backend.models.prediction_model import PredictionModel
+from backend.models.registry import CalibratedPredictionModel
+from backend.models.sensitivity import SensitivityAnalyzer
+from backend.utils.executor import ExecutorSaturatedError, PredictionExecutor
+
+CALIBRATION = {'PRESSURE_DROP_FACTOR': 0.3, 'BACKWASH_DURATIONS': [400, 460]}
+
+
+def optimize(model, parameters, workers=1, durations=(0,)):
+    return BackwashOptimizer(model).optimize(parameters, 'mild', time_steps=30, thresholds=[6.0, 7.0],
+                                             durations=list(durations), lockouts=[2, 4], replicates=8,
+                                             prune=False, workers=workers, seed=5)
+
+
+def test_optimizer_uses_the_given_model(parameters):
+    default = optimize(PredictionModel(), parameters)
+    calibrated = optimize(CalibratedPredictionModel(CALIBRATION), parameters)
+    assert default['pareto_front'] != calibrated['pareto_front']
+
+
+def test_optimizer_workers_run_the_given_model(parameters):
+    # Fixed durations, so the split across processes does not change the draws
+    model = CalibratedPredictionModel(CALIBRATION)
+    single = optimize(model, parameters, durations=[400])
+    assert single == optimize(model, parameters, workers=2, durations=[400])
+    assert single != optimize(PredictionModel(), parameters, durations=[400])
+
+
+def test_sensitivity_uses_the_given_model(parameters):
+    def analyze(model):
+        return SensitivityAnalyzer(model).analyze(parameters, 'mild', methods=['local'], seed=3)
+    assert analyze(PredictionModel())['baseline'] != analyze(CalibratedPredictionModel(CALIBRATION))['baseline']
+
+
+def test_optimize_endpoint_honors_model_version(client, parameters):
+    client.post("/api/models", json={"version": "test-optimizer", "overrides": CALIBRATION})
+    body = {"parameters": parameters, "fouling_status": "mild", "time_steps": 30, "thresholds": [6.0, 7.0],
+            "durations": [0], "lockouts": [2, 4], "replicates": 8, "prune": False, "seed": 5}
+    default = client.post("/api/optimize/backwash", json=body).json()
+    calibrated = client.post("/api/optimize/backwash", json=dict(body, model_version="test-optimizer")).json()
+    assert calibrated["metadata"]["model_version"] == "test-optimizer"
+    assert default["optimization_data"]["pareto_front"] != calibrated["optimization_data"]["pareto_front"]
+
+
+def test_sensitivity_endpoint_honors_model_version(client, parameters):
+    client.post("/api/models", json={"version": "test-sensitivity", "overrides": CALIBRATION})
+    body = {"parameters": parameters, "fouling_status": "mild", "methods": ["local"], "seed": 3}
+    default = client.post("/api/analyze/sensitivity", json=body).json()
+    calibrated = client.post("/api/analyze/sensitivity", json=dict(body, model_version="test-sensitivity")).json()
+    assert calibrated["metadata"]["model_version"] == "test-sensitivity"
+    assert default["sensitivity_data"]["baseline"] != calibrated["sensitivity_data"]["baseline"]
+
+
+@pytest.mark.parametrize("candidates", [
+    {"durations": [-5]},
+    {"durations": [10 ** 12]},
+    {"lockouts": [-1]},
+    {"lockouts": [31]},
+    {"thresholds": [7.0] * 101},
+    {"durations": []},
+])
+def test_optimize_endpoint_rejects_invalid_candidates(client, parameters, candidates):
+    body = dict({"parameters": parameters, "time_steps": 30}, **candidates)
+    assert client.post("/api/optimize/backwash", json=body).status_code == 422
+
+
+def test_fanned_out_requests_count_against_the_pool_capacity():
+    executor = PredictionExecutor(backend='thread', max_workers=2, max_queue=1)
+    assert executor.fan_out(32) == 2 and executor.fan_out(1) == 1
+    release = threading.Event()
+
+    def block(model):
+        release.wait(5)
+        return "done"
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(block, slots=2))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run(block, slots=2)
+        release.set()
+        return await running, await executor.run(block, slots=3)
+
+    try:
+        assert asyncio.run(scenario()) == ("done", "done")
+    finally:
+        executor.shutdown()
+
+
+def test_sensitivity_workers_are_capped_at_the_pool_size(client, parameters, monkeypatch):
+    from backend import main
+    seen = []
+    run_sensitivity = main.run_sensitivity
+
+    def recording(model, **kwargs):
+        seen.append(kwargs['workers'])
+        return run_sensitivity(model, **kwargs)
+
+    monkeypatch.setattr(main, "run_sensitivity", recording)
+    body = {"parameters": parameters, "methods": ["local"], "workers": 32, "seed": 3}
+    assert client.post("/api/analyze/sensitivity", json=body).status_code == 200
+    assert seen == [main.prediction_executor.max_workers]
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from backend.models.database import PredictionRecord, prediction_record_values
+from backend.models.persistence import PredictionWriter
+from backend.models.prediction_model import PredictionModel
+
+
+@pytest.fixture
+def record(parameters):
+    prediction = PredictionModel().predict(parameters, 'mild', 10, seed=1)
+    return prediction_record_values(prediction, parameters, 'mild', 10)
+
+
+def writer_for(db, **kwargs):
+    return PredictionWriter(session_factory=sessionmaker(bind=db.get_bind()), **kwargs)
+
+
+def blocked(writer):
+    """Make every flush wait for the returned event"""
+    release = threading.Event()
+    write = writer._write
+
+    def slow_write(rows):
+        release.wait(5)
+        write(rows)
+
+    writer._write = slow_write
+    return release
+
+
+async def until(condition, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("Condition not reached")
+
+
+def test_full_batches_flush_without_waiting_for_the_interval(db, record):
+    writer = writer_for(db, batch_size=10, flush_interval_ms=60000)
+
+    async def scenario():
+        for _ in range(25):
+            await writer.enqueue(dict(record))
+        await until(lambda: writer.written == 20)
+        assert writer.flushes == 2 and writer.stats()["queue_depth"] <= 5
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert writer.written == 25 and writer.failed == 0
+    assert db.query(PredictionRecord).count() == 25
+
+
+def test_partial_batches_flush_after_the_interval(db, record):
+    writer = writer_for(db, batch_size=100, flush_interval_ms=50)
+
+    async def scenario():
+        for _ in range(3):
+            await writer.enqueue(dict(record))
+        await until(lambda: writer.written == 3)
+        assert writer.running
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert writer.flushes == 1
+    assert db.query(PredictionRecord).count() == 3
+
+
+def test_full_queue_slows_producers_down(db, record):
+    writer = writer_for(db, batch_size=1, flush_interval_ms=0, max_queue=2)
+    release = blocked(writer)
+
+    async def scenario():
+        # One record is being written, two fill the queue
+        for _ in range(3):
+            await writer.enqueue(dict(record))
+        await until(lambda: writer.stats()["queue_depth"] == 2)
+        producer = asyncio.ensure_future(writer.enqueue(dict(record)))
+        await asyncio.sleep(0.1)
+        assert not producer.done() and writer.enqueued == 3
+
+        release.set()
+        await asyncio.wait_for(producer, 5)
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert writer.enqueued == writer.written == 4
+    assert db.query(PredictionRecord).count() == 4
+
+
+def test_stop_drains_records_queued_before_and_after_it(db, record):
+    writer = writer_for(db, batch_size=2, flush_interval_ms=60000)
+    release = blocked(writer)
+
+    async def scenario():
+        for _ in range(5):
+            await writer.enqueue(dict(record))
+        stopping = asyncio.ensure_future(writer.stop())
+        await asyncio.sleep(0.05)
+        # Records that arrive while the writer is stopping still land
+        for _ in range(3):
+            await writer.enqueue(dict(record))
+        release.set()
+        await asyncio.wait_for(stopping, 5)
+
+    asyncio.run(scenario())
+    assert not writer.running
+    assert writer.written == 8 and writer.stats()["queue_depth"] == 0
+    assert db.query(PredictionRecord).count() == 8
+
+
+def test_failed_flushes_are_counted_and_writing_continues(db, record):
+    writer = writer_for(db, batch_size=1, flush_interval_ms=0)
+    write = writer._write
+    calls = []
+
+    def flaky_write(rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise RuntimeError("database unavailable")
+        write(rows)
+
+    writer._write = flaky_write
+
+    async def scenario():
+        for _ in range(3):
+            await writer.enqueue(dict(record))
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert writer.failed == 1 and writer.written == 2
+    assert db.query(PredictionRecord).count() == 2
+
+
+def test_disabled_writer_drops_records(db, record):
+    writer = writer_for(db, enabled=False)
+    asyncio.run(writer.enqueue(dict(record)))
+    assert not writer.running and writer.enqueued == 0
+    assert db.query(PredictionRecord).count() == 0
@@ -0,0 +1,49 @@
+import pytest
+
+from backend.models.registry import ModelRegistry, UnknownModelError
+
+
+@pytest.mark.parametrize("overrides", [
+    {"PRESSURE_DROP_FACTOR": "x"},
+    {"PRESSURE_DROP_FACTOR": 1.5},
+    {"PRESSURE_THRESHOLD": True},
+    {"PRESSURE_THRESHOLD": float("nan")},
+    {"BACKWASH_DURATIONS": []},
+    {"BACKWASH_DURATIONS": [140, "220"]},
+    {"FOULING_FACTORS": {"clean": -1}},
+    {"FOULING_FACTORS": []},
+    {"UNKNOWN": 1},
+])
+def test_register_calibrated_rejects_invalid_overrides(overrides):
+    registry = ModelRegistry()
+    with pytest.raises(ValueError):
+        registry.register_calibrated("bad", overrides)
+    assert "bad" not in registry
+
+
+def test_register_calibrated_runs_the_model():
+    registry = ModelRegistry()
+    registry.register_calibrated("1.1.0", {"PRESSURE_DROP_FACTOR": 0.4, "BACKWASH_DURATIONS": [200, 300]})
+    model = registry.model("1.1.0")
+    assert model.PRESSURE_DROP_FACTOR == 0.4
+    assert model.EXPECTED_BACKWASH_DURATION == 250
+
+
+def test_versions_are_immutable_and_default_switches():
+    registry = ModelRegistry()
+    registry.register_calibrated("1.1.0", {"PRESSURE_DROP_FACTOR": 0.4})
+    with pytest.raises(ValueError):
+        registry.register_calibrated("1.1.0", {"PRESSURE_DROP_FACTOR": 0.3})
+    assert registry.set_default("1.1.0") == "1.0.0"
+    assert registry.resolve() == "1.1.0"
+    with pytest.raises(UnknownModelError):
+        registry.set_default("9.9.9")
+
+
+def test_register_endpoint_maps_invalid_overrides_to_400(client):
+    response = client.post("/api/models", json={"version": "bad-type", "overrides": {"PRESSURE_DROP_FACTOR": "x"}})
+    assert response.status_code == 400
+    response = client.post("/api/models", json={"version": "bad-empty", "overrides": {"BACKWASH_DURATIONS": []}})
+    assert response.status_code == 400
+    versions = [model["version"] for model in client.get("/api/models").json()["models"]]
+    assert "bad-type" not in versions and "bad-empty" not in versions
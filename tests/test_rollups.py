@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from backend.models.database import (
+    PredictionRollup, get_rollups, prediction_record_values, rebuild_rollups, save_prediction_records
+)
+
+START = datetime(2026, 3, 1, 22, 30)
+
+
+def record_values(count, seed):
+    """Records over three days and both statuses, with varied metrics"""
+    rng = np.random.default_rng(seed)
+    parameters = {'turbidity': 1.0, 'ph': 7.0, 'temperature': 25.0, 'flow_rate': 20.0, 'inlet_pressure': 40.0}
+    records = []
+    for _ in range(count):
+        backwashes = int(rng.integers(0, 4))
+        prediction = {
+            'pressure_data': [5.0, 5.5, 6.0],
+            'backwash_points': [{'time_step': step, 'pressure': 7.0, 'intensity': 1.0, 'duration': 300,
+                                 'reason': 'pressure_threshold_exceeded'} for step in range(backwashes)],
+            'fouling_rate': round(float(rng.uniform(0.1, 1.0)), 3),
+            'efficiency': round(float(rng.uniform(0.5, 1.0)), 3),
+            'recommendations': []
+        }
+        timestamp = START + timedelta(minutes=int(rng.integers(0, 3 * 24 * 60)))
+        status = str(rng.choice(['clean', 'mild']))
+        records.append(prediction_record_values(prediction, parameters, status, 3, timestamp=timestamp))
+    return records
+
+
+def rollup_rows(db):
+    rows = db.query(PredictionRollup).all()
+    return sorted((row.granularity, row.bucket_start, row.fouling_status, row.record_count,
+                   round(row.fouling_rate_sum, 9), row.fouling_rate_max, round(row.efficiency_sum, 9),
+                   row.efficiency_min, row.efficiency_max, row.backwash_count) for row in rows)
+
+
+def save_in_batches(db, records, sizes):
+    start = 0
+    for size in sizes:
+        save_prediction_records(db, records[start:start + size])
+        start += size
+    save_prediction_records(db, records[start:])
+
+
+@pytest.mark.parametrize("sizes", [(), (1, 1, 1, 7), (25, 50)])
+def test_incremental_rollups_match_rebuild(db, sizes):
+    records = record_values(200, seed=1)
+    save_in_batches(db, records, sizes)
+    incremental = rollup_rows(db)
+
+    assert rebuild_rollups(db, batch_size=37) == len(records)
+    assert incremental == rollup_rows(db)
+    assert sum(row[3] for row in incremental if row[0] == "day") == len(records)
+
+
+def test_row_by_row_upsert_matches_rebuild(db, monkeypatch):
+    # Dialects without an upsert statement read and update each rollup row
+    monkeypatch.setattr(db.get_bind().dialect, "name", "other")
+    save_in_batches(db, record_values(120, seed=2), (10, 30))
+    incremental = rollup_rows(db)
+
+    monkeypatch.undo()
+    rebuild_rollups(db)
+    assert incremental == rollup_rows(db)
+
+
+def test_partial_rebuild_keeps_other_days(db):
+    save_prediction_records(db, record_values(150, seed=3))
+    before = rollup_rows(db)
+    day = datetime(2026, 3, 2, 15, 0)
+
+    rebuild_rollups(db, start_date=day, end_date=day)
+    assert rollup_rows(db) == before
+
+
+def test_rollups_match_records(db):
+    records = record_values(150, seed=4)
+    save_in_batches(db, records, (40,))
+    day = datetime(2026, 3, 2)
+    in_day = [record for record in records if record['timestamp'].date() == day.date()]
+
+    combined = get_rollups(db, "day", start_date=day, end_date=day, by_status=False)
+    assert len(combined) == 1
+    assert combined[0]['record_count'] == len(in_day)
+    assert combined[0]['backwash_count'] == sum(record['backwash_count'] for record in in_day)
+    assert combined[0]['fouling_rate_mean'] == pytest.approx(np.mean([r['fouling_rate'] for r in in_day]))
+    assert combined[0]['efficiency_min'] == min(record['efficiency'] for record in in_day)
+
+    hours = get_rollups(db, "hour", start_date=day, end_date=day + timedelta(hours=23), by_status=False)
+    assert sum(row['record_count'] for row in hours) == len(in_day)
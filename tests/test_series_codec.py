@@ -0,0 +1,91 @@
+import json
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from backend.models.database import PredictionRecord
+from backend.utils.series_codec import (
+    COMPRESS_MIN_VALUES, FLAG_ZLIB, SERIES_DELTA_CENTI, SERIES_DELTA_CENTI16, SERIES_FLOAT32,
+    decode_backwash_points, decode_series, decode_series_array, encode_backwash_points, encode_series
+)
+
+POINTS = [
+    {'time_step': 4, 'pressure': 7.23, 'intensity': 2.5, 'duration': 360, 'reason': 'pressure_threshold_exceeded'},
+    {'time_step': 19, 'pressure': 7.011, 'intensity': 0.1, 'duration': 300, 'reason': 'pressure_threshold_exceeded'}
+]
+
+
+def header(blob):
+    return struct.unpack_from('<BBI', blob)
+
+
+@pytest.mark.parametrize("values, codec", [
+    ([5.0, 5.12, 7.0, 3.5, 2.0], SERIES_DELTA_CENTI16),
+    ([2.0, 900.0, 2.0], SERIES_DELTA_CENTI),
+    ([-1.25, 0.0, 1e6], SERIES_DELTA_CENTI)
+])
+def test_two_decimal_series_round_trip_exactly(values, codec):
+    blob = encode_series(values)
+    assert header(blob) == (codec, 0, len(values))
+    assert decode_series(blob) == values
+
+
+def test_other_values_fall_back_to_float32():
+    values = [1.0 / 3.0, 2.5, float(np.pi)]
+    blob = encode_series(values)
+    assert header(blob)[0] == SERIES_FLOAT32
+    np.testing.assert_allclose(decode_series(blob), values, rtol=1e-7)
+    assert header(encode_series([1e12]))[0] == SERIES_FLOAT32
+
+
+def test_empty_series():
+    assert decode_series(encode_series([])) == []
+
+
+def test_only_long_series_are_compressed():
+    short = np.round(np.linspace(2.0, 7.0, COMPRESS_MIN_VALUES - 1), 2)
+    long = np.round(np.tile([2.0, 3.0, 4.0], COMPRESS_MIN_VALUES), 2)
+    assert not header(encode_series(short))[1] & FLAG_ZLIB
+    blob = encode_series(long)
+    assert header(blob)[1] & FLAG_ZLIB
+    assert decode_series(blob) == long.tolist()
+    assert not header(encode_series(long, compress=False))[1] & FLAG_ZLIB
+
+
+def test_blobs_of_the_previous_layout_still_decode():
+    # int32 deltas, zlib-compressed, as written for every series before
+    values = [5.0, 5.12, 7.0, 3.5]
+    deltas = np.diff(np.rint(np.array(values) * 100).astype(np.int64), prepend=0).astype('<i4')
+    blob = struct.pack('<BBI', SERIES_DELTA_CENTI, FLAG_ZLIB, len(values)) + zlib.compress(deltas.tobytes())
+    assert decode_series(blob) == values
+    assert decode_series_array(blob).dtype == float
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        decode_series(struct.pack('<BBI', 99, 0, 0))
+
+
+def test_backwash_points_round_trip():
+    assert decode_backwash_points(encode_backwash_points(POINTS)) == POINTS
+    assert decode_backwash_points(encode_backwash_points([])) == []
+
+
+def test_backwash_points_outside_the_packed_layout_keep_json():
+    points = [dict(POINTS[0], reason='manual'), dict(POINTS[1], operator='night shift')]
+    blob = encode_backwash_points(points)
+    assert blob[0] == 2
+    assert decode_backwash_points(blob) == points
+
+
+def test_records_read_blobs_and_legacy_json():
+    record = PredictionRecord()
+    record.pressure_data = [5.0, 5.12, 7.0]
+    record.backwash_points = POINTS
+    assert (record.pressure_data, record.backwash_points) == ([5.0, 5.12, 7.0], POINTS)
+
+    legacy = PredictionRecord(pressure_data_json=[5.0, 6.5], backwash_points_json=json.loads(json.dumps(POINTS)))
+    assert (legacy.pressure_data, legacy.backwash_points) == ([5.0, 6.5], POINTS)
+    assert PredictionRecord(pressure_data_json=[]).backwash_points == []
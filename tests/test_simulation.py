@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from backend.models.prediction_model import PredictionModel
+
+SEVERE = {'turbidity': 1.5, 'ph': 6.5, 'temperature': 30.0, 'flow_rate': 40.0, 'inlet_pressure': 40.0}
+
+
+def stream(model, total_steps, chunk_size, engine='stepwise', seed=3):
+    *chunks, summary = model.simulate_long_horizon(SEVERE, 'severe', total_steps, 7.0, chunk_size=chunk_size,
+                                                   seed=seed, engine=engine)
+    pressure = np.concatenate([chunk['pressure_data'] for chunk in chunks])
+    backwash_points = [point for chunk in chunks for point in chunk['backwash_points']]
+    return pressure, backwash_points, summary
+
+
+@pytest.mark.parametrize("engine", ["stepwise", "event"])
+def test_stream_does_not_depend_on_chunk_size(engine):
+    model = PredictionModel()
+    pressure, backwash_points, summary = stream(model, 3000, 3000, engine)
+    assert len(backwash_points) > 10
+    for chunk_size in (7, 64, 1000):
+        chunked_pressure, chunked_points, chunked_summary = stream(model, 3000, chunk_size, engine)
+        np.testing.assert_allclose(chunked_pressure, pressure, atol=1e-9)
+        assert [(p['time_step'], p['duration']) for p in chunked_points] == \
+            [(p['time_step'], p['duration']) for p in backwash_points]
+        assert chunked_summary == pytest.approx(summary, abs=1e-3)
+
+
+def test_stream_matches_full_prediction():
+    model = PredictionModel()
+    prediction = model.predict(SEVERE, 'severe', 400, 7.0, seed=3)
+    pressure, backwash_points, summary = stream(model, 400, 64)
+    np.testing.assert_allclose(prediction['pressure_data'], np.round(pressure, 2), atol=1e-9)
+    assert [(p['time_step'], p['duration']) for p in prediction['backwash_points']] == \
+        [(p['time_step'], p['duration']) for p in backwash_points]
+    assert summary['efficiency'] == pytest.approx(prediction['efficiency'], abs=1e-3)
+    assert summary['fouling_rate'] == pytest.approx(prediction['fouling_rate'], abs=1e-3)
@@ -0,0 +1,170 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from backend import main
+from backend.models.lookup import TABLE_AXES, LookupTable, build_lookup_table
+from backend.models.prediction_model import MODEL_VERSION, PredictionModel
+from backend.models.surrogate import SURROGATE_FEATURES, SURROGATE_TARGETS, SurrogateModel
+
+AXES = {'turbidity': [0.5, 1.5], 'ph': [6.5, 7.5], 'temperature': [20.0, 30.0], 'flow_rate': [15.0, 30.0],
+        'pressure_threshold': [6.0, 8.0], 'time_steps': [10, 20]}
+
+
+# Error limits the coarse test table passes
+LOOSE_ERROR = {'fouling_rate': 0.1, 'efficiency': 0.1, 'time_to_first_backwash': 3.0}
+
+
+@pytest.fixture(scope="module")
+def table_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("lookup") / "summary")
+    build_lookup_table(path, AXES, workers=1)
+    return path
+
+
+@pytest.fixture(scope="module")
+def table(table_path):
+    return LookupTable(table_path, max_error=LOOSE_ERROR)
+
+
+def summary_body(parameters, **kwargs):
+    return dict({"parameters": parameters, "fouling_status": "mild", "time_steps": 20,
+                 "pressure_threshold": 7.0}, **kwargs)
+
+
+def test_table_matches_model_at_grid_nodes(table):
+    model = PredictionModel()
+    for status in model.FOULING_STATUSES:
+        for node in itertools.product(*(AXES[name] for name in TABLE_AXES)):
+            point = dict(zip(TABLE_AXES, node))
+            parameters = dict({name: point[name] for name in TABLE_AXES[:4]}, inlet_pressure=40.0)
+            expected = model.predict_summary(parameters, status, int(point['time_steps']),
+                                             point['pressure_threshold'])
+            actual = table.predict_summary(parameters, status, int(point['time_steps']),
+                                           point['pressure_threshold'])
+            assert actual == pytest.approx(expected, abs=2e-3)
+
+
+def test_table_interpolates_between_nodes(table):
+    parameters = {'turbidity': 1.0, 'ph': 7.0, 'temperature': 25.0, 'flow_rate': 20.0, 'inlet_pressure': 40.0}
+    summary = table.predict_summary(parameters, 'mild', 15, 7.0)
+    low = table.predict_summary(dict(parameters, turbidity=0.5), 'mild', 15, 7.0)
+    high = table.predict_summary(dict(parameters, turbidity=1.5), 'mild', 15, 7.0)
+    for name in ('fouling_rate', 'efficiency'):
+        assert min(low[name], high[name]) - 1e-3 <= summary[name] <= max(low[name], high[name]) + 1e-3
+
+
+def test_recorded_interpolation_error_bounds_random_queries(table):
+    error = table.metadata['interpolation_error']
+    assert set(error) == {'fouling_rate', 'efficiency', 'time_to_first_backwash'}
+
+    model = PredictionModel()
+    rng = np.random.default_rng(1)
+    worst = dict.fromkeys(error, 0.0)
+    for _ in range(300):
+        point = {name: rng.uniform(*AXES[name]) for name in TABLE_AXES[:5]}
+        time_steps = int(rng.integers(AXES['time_steps'][0], AXES['time_steps'][1], endpoint=True))
+        status = str(rng.choice(model.FOULING_STATUSES))
+        parameters = dict({name: point[name] for name in TABLE_AXES[:4]}, inlet_pressure=40.0)
+        actual = table.predict_summary(parameters, status, time_steps, point['pressure_threshold'])
+        expected = model.predict_summary(parameters, status, time_steps, point['pressure_threshold'])
+        for name in worst:
+            worst[name] = max(worst[name], abs(actual[name] - expected[name]))
+
+    for name, measured in worst.items():
+        # Within the recorded bound, up to output rounding
+        assert measured <= error[name]['max'] * 1.1 + 0.01
+
+
+def test_summary_uses_table_only_within_error_limits(client, parameters, table_path, monkeypatch):
+    strict = LookupTable(table_path)
+    assert not strict.accurate() and strict.stats()['accurate'] is False
+    monkeypatch.setattr(main, "lookup_table", strict)
+    response = client.post("/api/predict/summary", json=summary_body(parameters)).json()
+    assert response["metadata"]["source"] == "model"
+
+    monkeypatch.setattr(main, "lookup_table", LookupTable(table_path, max_error=LOOSE_ERROR))
+    response = client.post("/api/predict/summary", json=summary_body(parameters)).json()
+    assert response["metadata"]["source"] == "table"
+
+
+def test_summary_uses_table_only_for_its_version(client, parameters, table, monkeypatch):
+    monkeypatch.setattr(main, "lookup_table", table)
+    response = client.post("/api/predict/summary", json=summary_body(parameters)).json()
+    assert response["metadata"] == dict(response["metadata"], source="table", model_version=MODEL_VERSION)
+
+    client.post("/api/models", json={"version": "test-summary", "overrides": {"PRESSURE_DROP_FACTOR": 0.3}})
+    for body in (summary_body(parameters, model_version="test-summary"), summary_body(parameters)):
+        previous = client.put("/api/models/default", json={"version": "test-summary"}).json()["previous"]
+        try:
+            response = client.post("/api/predict/summary", json=body).json()
+        finally:
+            client.put("/api/models/default", json={"version": previous})
+        assert response["metadata"]["source"] == "model"
+        assert response["metadata"]["model_version"] == "test-summary"
+
+
+def constant_surrogate(version, source_model_version):
+    """Surrogate answering the same summary everywhere"""
+    features, targets = len(SURROGATE_FEATURES), len(SURROGATE_TARGETS)
+    return {
+        'version': version, 'created_at': '2026-01-01T00:00:00', 'records_trained': 1, 'metrics': {},
+        'source_model_version': source_model_version, 'feature_names': list(SURROGATE_FEATURES),
+        'x_mean': np.zeros(features), 'x_scale': np.ones(features),
+        'y_mean': np.zeros(targets), 'y_scale': np.ones(targets),
+        'coefs': [np.zeros((features, targets))], 'intercepts': [np.array([0.123, 0.456, 7.0])]
+    }
+
+
+GOOD_METRICS = {target: {'mae': 0.01, 'r2': 0.97, 'records': 100} for target in SURROGATE_TARGETS}
+
+
+def use_surrogate(monkeypatch, version, source, metrics):
+    registry = main.model_registry
+    if version not in registry:
+        registry.register(version, lambda: SurrogateModel(constant_surrogate(version, source)))
+    monkeypatch.setattr(main, "lookup_table", None)
+    monkeypatch.setattr(registry, "surrogate_version", version)
+    monkeypatch.setitem(registry.surrogate_sources, version, source)
+    monkeypatch.setitem(registry.surrogate_metrics, version, metrics)
+
+
+@pytest.mark.parametrize("source", [MODEL_VERSION, "another-version"])
+def test_summary_uses_surrogate_only_for_its_source_version(client, parameters, monkeypatch, source):
+    version = f"surrogate-test-{source}"
+    use_surrogate(monkeypatch, version, source, GOOD_METRICS)
+
+    response = client.post("/api/predict/summary", json=summary_body(parameters)).json()
+    assert response["metadata"]["model_version"] == MODEL_VERSION
+    if source == MODEL_VERSION:
+        assert response["metadata"]["source"] == "surrogate"
+        assert response["metadata"]["surrogate_version"] == version
+        assert response["summary"]["efficiency"] == 0.456
+    else:
+        assert response["metadata"]["source"] == "model"
+        assert response["metadata"]["surrogate_version"] is None
+
+    explicit = client.post("/api/predict/summary", json=summary_body(parameters, model_version=version)).json()
+    assert explicit["metadata"]["source"] == "surrogate"
+
+
+def test_explicit_version_is_answered_by_the_model(client, parameters, monkeypatch):
+    use_surrogate(monkeypatch, "surrogate-test-explicit", MODEL_VERSION, GOOD_METRICS)
+    response = client.post("/api/predict/summary",
+                           json=summary_body(parameters, model_version=MODEL_VERSION)).json()
+    assert response["metadata"]["source"] == "model"
+    assert response["summary"] == PredictionModel().predict_summary(parameters, "mild", 20, 7.0)
+
+
+@pytest.mark.parametrize("metrics, max_mae", [
+    ({}, {}),
+    (dict(GOOD_METRICS, efficiency={'mae': 0.01, 'r2': 0.64, 'records': 100}), {}),
+    (GOOD_METRICS, {'time_to_first_backwash': 0.001})
+])
+def test_surrogate_below_quality_limits_is_not_used(client, parameters, monkeypatch, metrics, max_mae):
+    use_surrogate(monkeypatch, "surrogate-test-quality", MODEL_VERSION, metrics)
+    monkeypatch.setattr(main.model_registry, "surrogate_max_mae", max_mae)
+    response = client.post("/api/predict/summary", json=summary_body(parameters)).json()
+    assert response["metadata"]["source"] == "model"
+    assert response["metadata"]["model_version"] == MODEL_VERSION
@@ -0,0 +1,100 @@
+import time
+
+import numpy as np
+import pytest
+
+from backend.models.database import prediction_record_values, save_prediction_records
+from backend.models.prediction_model import MODEL_VERSION, PredictionModel
+from backend.models.registry import ModelRegistry, UnknownModelError
+from backend.models.surrogate import new_version, publish_artifact, read_manifest
+from backend.models.training import iter_training_chunks, train_surrogate
+
+OTHER_VERSION = "calibrated-test"
+
+
+def store(db, version, count, seed):
+    model = PredictionModel()
+    rng = np.random.default_rng(seed)
+    records = []
+    for _ in range(count):
+        parameters = {'turbidity': float(rng.uniform(0.1, 2.0)), 'ph': float(rng.uniform(6.0, 8.5)),
+                      'temperature': 25.0, 'flow_rate': float(rng.uniform(10.0, 50.0)), 'inlet_pressure': 40.0}
+        prediction = model.predict(parameters, 'mild', 20, seed=int(rng.integers(1 << 30)))
+        records.append(prediction_record_values(prediction, parameters, 'mild', 20, model_version=version))
+    save_prediction_records(db, records)
+
+
+def test_training_reads_one_model_version(db):
+    store(db, MODEL_VERSION, 30, seed=1)
+    store(db, OTHER_VERSION, 20, seed=2)
+    counts = {version: sum(ids.size for ids, _, _ in iter_training_chunks(db, version, batch_size=7))
+              for version in (MODEL_VERSION, OTHER_VERSION, "unknown")}
+    assert counts == {MODEL_VERSION: 30, OTHER_VERSION: 20, "unknown": 0}
+
+
+def test_artifact_records_its_source_version(db, tmp_path):
+    store(db, MODEL_VERSION, 40, seed=1)
+    store(db, OTHER_VERSION, 60, seed=2)
+    artifact = train_surrogate(db, OTHER_VERSION, epochs=1)
+    assert artifact['source_model_version'] == OTHER_VERSION
+    # Every tenth record of the 60 is held out
+    assert artifact['records_trained'] == 54
+    assert artifact['metrics']['efficiency']['records'] == 6
+    assert train_surrogate(db, "unknown", epochs=1) is None
+
+    with pytest.raises(ValueError):
+        train_surrogate(db, MODEL_VERSION, previous=artifact, epochs=1)
+
+    entry = publish_artifact(str(tmp_path), artifact)
+    assert entry['source_model_version'] == OTHER_VERSION
+    registry = ModelRegistry()
+    registry.artifact_dir = str(tmp_path)
+    registry.sync_artifacts(preload=False)
+    assert registry.surrogate_version == artifact['version']
+    assert registry.surrogate_source_version == OTHER_VERSION
+    assert registry.model(artifact['version']).source_model_version == OTHER_VERSION
+    assert read_manifest(str(tmp_path))['latest'] == artifact['version']
+
+
+def test_surrogate_versions_are_unique(db, tmp_path):
+    first = new_version()
+    time.sleep(0.001)
+    assert new_version() > first
+    store(db, MODEL_VERSION, 20, seed=1)
+    artifact = train_surrogate(db, MODEL_VERSION, epochs=1)
+    publish_artifact(str(tmp_path), artifact)
+    with pytest.raises(ValueError):
+        publish_artifact(str(tmp_path), artifact)
+    assert [entry['version'] for entry in read_manifest(str(tmp_path))['versions']] == [artifact['version']]
+
+
+def test_pruned_surrogates_are_unregistered(db, tmp_path):
+    store(db, MODEL_VERSION, 20, seed=1)
+    artifact = train_surrogate(db, MODEL_VERSION, epochs=1)
+    registry = ModelRegistry()
+    registry.artifact_dir = str(tmp_path)
+    versions = [f"surrogate-test-{index}" for index in range(3)]
+    for version in versions:
+        publish_artifact(str(tmp_path), dict(artifact, version=version), keep=2)
+        registry.sync_artifacts(preload=False)
+
+    assert registry.surrogate_version == versions[-1]
+    listed = [model['version'] for model in registry.describe()['models']]
+    assert versions[0] not in listed and versions[1] in listed
+    with pytest.raises(UnknownModelError):
+        registry.model(versions[0])
+    assert registry.model(versions[1]).version == versions[1]
+
+
+def test_retired_default_falls_back_to_the_heuristic_model(db, tmp_path):
+    store(db, MODEL_VERSION, 20, seed=1)
+    artifact = train_surrogate(db, MODEL_VERSION, epochs=1)
+    registry = ModelRegistry()
+    registry.artifact_dir = str(tmp_path)
+    publish_artifact(str(tmp_path), dict(artifact, version="surrogate-test-a"), keep=1)
+    registry.sync_artifacts(preload=False)
+    registry.set_default("surrogate-test-a")
+    publish_artifact(str(tmp_path), dict(artifact, version="surrogate-test-b"), keep=1)
+    registry.sync_artifacts(preload=False)
+    assert registry.default_version == MODEL_VERSION
+    assert "surrogate-test-a" not in registry
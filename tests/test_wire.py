@@ -0,0 +1,97 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from backend.utils.wire import FRAME_MAGIC, FrameError, accepts_frame, decode_frame, encode_frame
+
+ARRAYS = {'odd': np.array([1.5, -2.25, 3.0]), 'empty': np.array([]), 'long': np.linspace(0.0, 1.0, 101)}
+
+
+def framed(header, payload=b""):
+    """Frame with a hand-written header"""
+    data = json.dumps(header).encode()
+    return struct.pack('<4sI', FRAME_MAGIC, len(data)) + data + payload
+
+
+@pytest.mark.parametrize("dtype", ['<f4', '<f8'])
+def test_round_trip(dtype):
+    meta = {'time_steps': 3, 'nested': {'seed': 7}}
+    frame = encode_frame(meta, ARRAYS, dtype=dtype)
+    decoded_meta, arrays = decode_frame(frame)
+
+    assert decoded_meta == meta
+    assert list(arrays) == list(ARRAYS)
+    for name, values in ARRAYS.items():
+        assert arrays[name].dtype == np.dtype(dtype)
+        np.testing.assert_array_equal(arrays[name], values.astype(dtype))
+        assert not arrays[name].flags.writeable
+        # Payloads start 8-byte aligned
+        assert arrays[name].size == 0 or arrays[name].ctypes.data % 8 == np.frombuffer(frame, np.uint8).ctypes.data % 8
+
+
+def test_unsupported_dtype_is_not_encoded():
+    with pytest.raises(FrameError):
+        encode_frame({}, ARRAYS, dtype='<i8')
+
+
+def test_truncated_frames_fail_cleanly():
+    frame = encode_frame({'time_steps': 3}, ARRAYS)
+    expected = decode_frame(frame)[1]
+    for cut in range(len(frame)):
+        try:
+            _, arrays = decode_frame(frame[:cut])
+        except FrameError:
+            continue
+        # Only trailing padding may be cut
+        assert all(np.array_equal(arrays[name], expected[name]) for name in expected)
+
+
+@pytest.mark.parametrize("body", [
+    b"",
+    b"UFB",
+    b"XXXX" + struct.pack('<I', 2) + b"{}",
+    struct.pack('<4sI', FRAME_MAGIC, 1000) + b"{}",
+    struct.pack('<4sI', FRAME_MAGIC, 5) + b"{not",
+    struct.pack('<4sI', FRAME_MAGIC, 2) + b"\xff\xfe",
+    framed([1, 2]),
+    framed({'arrays': 5}),
+    framed({'arrays': ["name"]}),
+    framed({'arrays': [{'name': 'a', 'dtype': '<f4', 'length': 1}]}, b"\0" * 8),
+    framed({'arrays': [{'name': 'a', 'dtype': '<i8', 'length': 1, 'offset': 0}]}, b"\0" * 8),
+    framed({'arrays': [{'name': 'a', 'dtype': '<f4', 'length': 1, 'offset': -4}]}, b"\0" * 8),
+    framed({'arrays': [{'name': 'a', 'dtype': '<f4', 'length': -1, 'offset': 0}]}, b"\0" * 8),
+    framed({'arrays': [{'name': 'a', 'dtype': '<f4', 'length': 3, 'offset': 0}]}, b"\0" * 8),
+    framed({'arrays': [{'name': 'a', 'dtype': '<f4', 'length': 2 ** 62, 'offset': 0}]}, b"\0" * 8),
+    framed({'arrays': [{'name': 'a', 'dtype': '<f4', 'length': 1, 'offset': 'x'}]}, b"\0" * 8),
+    framed({'arrays': [{'name': 'a', 'dtype': '<f4', 'length': None, 'offset': 0}]}, b"\0" * 8),
+])
+def test_corrupt_frames_raise_frame_error(body):
+    with pytest.raises(FrameError):
+        decode_frame(body)
+
+
+def test_corrupted_headers_never_raise_other_errors():
+    frame = encode_frame({'time_steps': 3}, ARRAYS)
+    rng = np.random.default_rng(0)
+    header_end = 8 + struct.unpack_from('<I', frame, 4)[0]
+    for _ in range(500):
+        corrupted = bytearray(frame)
+        for position in rng.integers(0, header_end, 3):
+            corrupted[position] = int(rng.integers(256))
+        try:
+            decode_frame(bytes(corrupted))
+        except FrameError:
+            pass
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, False),
+    ("application/json", False),
+    ("application/x-uf-frame", True),
+    ("application/json, application/x-uf-frame;q=0.9", True),
+    ("application/x-uf-frame-v2", False),
+])
+def test_accepts_frame(accept, expected):
+    assert accepts_frame(accept) is expected